@@ -0,0 +1,43 @@
+"""Initial schema: users and alerts as first created by create_all
+
+Existing databases created before migrations were added can be brought
+under Alembic with `alembic stamp 0001` followed by `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("crypto_symbol", sa.String(), nullable=False),
+        sa.Column("alert_type", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_alerts_id", "alerts", ["id"])
+    op.create_index("ix_alerts_crypto_symbol", "alerts", ["crypto_symbol"])
+
+
+def downgrade():
+    op.drop_table("alerts")
+    op.drop_table("users")
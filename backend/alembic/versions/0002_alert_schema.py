@@ -0,0 +1,74 @@
+"""Align alerts with the API schema and index it for keyset pagination
+
+Renames crypto_symbol/alert_type to cryptocurrency/condition, adds the
+threshold, value, trigger and timestamp columns the API and worker use,
+and adds composite indexes for the two list queries:
+
+- (owner_id, created_at, id) for a user's alerts, newest first
+- (condition, owner_id, created_at, id) for system ai_anomaly alerts
+
+The trailing id makes the (created_at, id) keyset seek an index range scan.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_index("ix_alerts_crypto_symbol")
+        batch.alter_column("crypto_symbol", new_column_name="cryptocurrency",
+                           existing_type=sa.String(), existing_nullable=False)
+        batch.alter_column("alert_type", new_column_name="condition",
+                           existing_type=sa.String(), existing_nullable=False)
+        batch.add_column(sa.Column("threshold_value", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("current_value", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("is_triggered", sa.Boolean(), server_default="0", nullable=False))
+        batch.add_column(sa.Column("message", sa.String(), nullable=True))
+        batch.add_column(sa.Column("created_at", sa.DateTime(timezone=True),
+                                   server_default=sa.func.now(), nullable=False))
+
+    # Deactivated rules are the closest thing the old schema had to triggered ones
+    op.execute(sa.text("UPDATE alerts SET is_triggered = (is_active = :inactive)").bindparams(inactive=False))
+
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLite stores datetimes as text and CURRENT_TIMESTAMP has no fraction,
+        # while SQLAlchemy writes and binds '...HH:MM:SS.ffffff'. Pad the backfilled
+        # values so (created_at, id) keyset comparisons order them correctly.
+        op.execute(sa.text("UPDATE alerts SET created_at = created_at || '.000000' WHERE length(created_at) = 19"))
+
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_column("is_active")
+        batch.create_index("ix_alerts_cryptocurrency", ["cryptocurrency"])
+        batch.create_index("ix_alerts_owner_created", ["owner_id", "created_at", "id"])
+        batch.create_index("ix_alerts_condition_owner_created", ["condition", "owner_id", "created_at", "id"])
+
+
+def downgrade():
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_index("ix_alerts_condition_owner_created")
+        batch.drop_index("ix_alerts_owner_created")
+        batch.drop_index("ix_alerts_cryptocurrency")
+        batch.add_column(sa.Column("is_active", sa.Boolean(), nullable=True))
+
+    op.execute(sa.text("UPDATE alerts SET is_active = NOT is_triggered"))
+
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_column("created_at")
+        batch.drop_column("message")
+        batch.drop_column("is_triggered")
+        batch.drop_column("current_value")
+        batch.drop_column("threshold_value")
+        batch.alter_column("condition", new_column_name="alert_type",
+                           existing_type=sa.String(), existing_nullable=False)
+        batch.alter_column("cryptocurrency", new_column_name="crypto_symbol",
+                           existing_type=sa.String(), existing_nullable=False)
+    op.create_index("ix_alerts_crypto_symbol", "alerts", ["crypto_symbol"])
@@ -1,15 +1,25 @@
 import numpy as np
 import pandas as pd
 import joblib
-from tensorflow.keras.models import load_model
 import logging
 import os
+import time
+from .backtest import DEFAULT_BATCH_SIZE, reconstruction_errors, rolling_windows, summarize
+from .features import FEATURE_COLUMNS, StreamingFeatureEngine
+from .numpy_backend import load_inference_model
+from app.core.metrics import stage
 
 logger = logging.getLogger(__name__)
 
 class CryptoAnomalyDetector:
-    def __init__(self, model_path, scaler_path, metadata_path):
-        """Initialize the anomaly detector with trained artifacts"""
+    def __init__(self, model_path, scaler_path, metadata_path, backend="keras", weights_dir=None):
+        """Initialize the anomaly detector with trained artifacts
+
+        backend selects the inference engine: "keras" loads the model with
+        TensorFlow, "numpy" runs it through NumpyLSTMAutoencoder so the
+        process never imports TensorFlow. weights_dir points the numpy
+        backend at memory-mapped weights exported next to the model.
+        """
         try:
             logger.info(f"🔧 Loading model from: {model_path}")
             logger.info(f"🔧 Loading scaler from: {scaler_path}")
@@ -23,9 +33,8 @@ class CryptoAnomalyDetector:
             if not os.path.exists(metadata_path):
                 raise FileNotFoundError(f"Metadata file not found: {metadata_path}")
 
-            # Load model with custom objects to avoid compatibility issues
-            custom_objects = {}
-            self.model = load_model(model_path, compile=False, custom_objects=custom_objects)
+            self.backend = backend
+            self.model = load_inference_model(model_path, backend, weights_dir)
 
             # Load scaler and metadata
             self.scaler = joblib.load(scaler_path)
@@ -36,7 +45,7 @@ class CryptoAnomalyDetector:
             self.threshold = self.metadata.get('threshold', 0.1)
             self.feature_names = self.metadata.get('feature_names', [])
 
-            logger.info(f"✅ Model loaded: sequence_length={self.sequence_length}, threshold={self.threshold}")
+            logger.info(f"✅ Model loaded ({backend} backend): sequence_length={self.sequence_length}, threshold={self.threshold}")
             logger.info(f"✅ Features: {self.feature_names}")
 
         except Exception as e:
@@ -87,8 +96,56 @@ class CryptoAnomalyDetector:
             logger.error(f"❌ Error calculating features: {e}")
             raise
 
-    def detect_anomaly(self, new_data_df):
-        """Detect if the latest data contains anomalies"""
+    def _prepare_sequence(self, new_data_df):
+        """Build the scaled (sequence_length, n_features) window for one symbol.
+
+        Accepts an OHLCV DataFrame or a warm StreamingFeatureEngine. Returns
+        a tuple of (sequence, features_used, error). Exactly one of sequence
+        and error is set.
+        """
+        if isinstance(new_data_df, StreamingFeatureEngine):
+            return self._prepare_streaming_sequence(new_data_df)
+
+        # Calculate features
+        with stage('features'):
+            processed_data = self.calculate_basic_features(new_data_df)
+
+        # Use only features that are available and match training
+        available_features = [f for f in self.feature_names if f in processed_data.columns]
+        if len(available_features) == 0:
+            return None, available_features, f'No matching features found. Available: {list(processed_data.columns)}, Expected: {self.feature_names}'
+
+        features = processed_data[available_features].tail(self.sequence_length)
+
+        if len(features) < self.sequence_length:
+            return None, available_features, f'Need at least {self.sequence_length} data points, got {len(features)}'
+
+        with stage('scale'):
+            scaled_features = self.scaler.transform(features)
+        return scaled_features.reshape(self.sequence_length, len(available_features)), available_features, None
+
+    def _build_result(self, mae, available_features, threshold=None):
+        """Turn a reconstruction error into the public detection result"""
+        threshold = self.threshold if threshold is None else threshold
+        is_anomaly = mae > threshold
+        anomaly_score = mae / threshold
+
+        return {
+            'is_anomaly': bool(is_anomaly),
+            'anomaly_score': float(anomaly_score),
+            'reconstruction_error': float(mae),
+            'threshold': float(threshold),
+            'confidence': float(1 - min(anomaly_score, 2.0) / 2.0),
+            'timestamp': pd.Timestamp.now().isoformat(),
+            'features_used': available_features
+        }
+
+    def detect_anomaly(self, new_data_df, threshold=None):
+        """Detect if the latest data contains anomalies
+
+        new_data_df is an OHLCV DataFrame or a warm StreamingFeatureEngine.
+        threshold overrides the global one from the model metadata.
+        """
         if not self.model:
             return {
                 'error': 'AI model not loaded',
@@ -97,53 +154,162 @@ class CryptoAnomalyDetector:
             }
 
         try:
-            # Calculate features
-            processed_data = self.calculate_basic_features(new_data_df)
+            sequence, available_features, error = self._prepare_sequence(new_data_df)
+            if error:
+                return {
+                    'error': error,
+                    'is_anomaly': False,
+                    'anomaly_score': 0.0
+                }
 
-            # Use only features that are available and match training
+            # Predict on a batch of one
+            sequence = sequence[np.newaxis, ...]
+            with stage('predict'):
+                reconstruction = self.model.predict(sequence, verbose=0)
+            mae = np.mean(np.abs(reconstruction - sequence))
+
+            return self._build_result(mae, available_features, threshold)
+
+        except Exception as e:
+            logger.error(f"❌ Error in anomaly detection: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return {
+                'error': str(e),
+                'is_anomaly': False,
+                'anomaly_score': 0.0
+            }
+
+    def score_history(self, history_df, batch_size=DEFAULT_BATCH_SIZE):
+        """Score every sliding window over a long OHLCV history (backtest mode)
+
+        Features are computed and scaled once for the whole history; the
+        windows are strided views over that matrix and go through the model
+        batch_size at a time. Returns the reconstruction error per window,
+        stamped with the window's last candle.
+        """
+        if not self.model:
+            return {'error': 'AI model not loaded'}
+
+        try:
+            started = time.perf_counter()
+            processed_data = self.calculate_basic_features(history_df)
             available_features = [f for f in self.feature_names if f in processed_data.columns]
             if len(available_features) == 0:
-                return {
-                    'error': f'No matching features found. Available: {list(processed_data.columns)}, Expected: {self.feature_names}',
+                return {'error': f'No matching features found. Expected: {self.feature_names}'}
+            if len(processed_data) < self.sequence_length:
+                return {'error': f'Need at least {self.sequence_length} data points, got {len(processed_data)}'}
+
+            # Percent changes off a zero base (obv starts at 0) are inf; live windows rarely see
+            # them but a full history always does, and the scaler rejects non-finite input
+            features = processed_data[available_features].replace([np.inf, -np.inf], np.nan).ffill().bfill()
+            scaled = np.asarray(self.scaler.transform(features), dtype=np.float32)
+            with stage('backtest_predict'):
+                errors = reconstruction_errors(self.model, rolling_windows(scaled, self.sequence_length), batch_size)
+
+            return {
+                'timestamps': processed_data.index[self.sequence_length - 1:],
+                'reconstruction_error': errors,
+                'threshold': float(self.threshold),
+                'features_used': available_features,
+                'summary': summarize(errors, self.threshold, time.perf_counter() - started)
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Error in history scan: {e}")
+            return {'error': str(e)}
+
+    def _prepare_streaming_sequence(self, engine):
+        """Build the scaled window from a StreamingFeatureEngine instead of a DataFrame"""
+        available_features = [f for f in self.feature_names if f in FEATURE_COLUMNS]
+        if len(available_features) == 0:
+            return None, available_features, f'No matching features found. Available: {FEATURE_COLUMNS}, Expected: {self.feature_names}'
+
+        if not engine.is_ready or engine.window_size != self.sequence_length:
+            return None, available_features, f'Streaming features not ready: {engine.count} candles seen'
+
+        with stage('scale'):
+            scaled_features = self.scaler.transform(engine.window(available_features))
+        return scaled_features.reshape(self.sequence_length, len(available_features)), available_features, None
+
+    def detect_anomaly_batch(self, data_by_symbol, thresholds=None):
+        """Detect anomalies for many symbols with a single forward pass
+
+        Takes a dict of symbol -> OHLCV DataFrame (or warm
+        StreamingFeatureEngine) and returns a dict of
+        symbol -> result in the same shape detect_anomaly returns. Symbols
+        that cannot be prepared get their own error result and are left
+        out of the batch instead of failing it. thresholds optionally maps
+        symbols to their own threshold.
+        """
+        thresholds = thresholds or {}
+        if not self.model:
+            return {
+                symbol: {
+                    'error': 'AI model not loaded',
                     'is_anomaly': False,
                     'anomaly_score': 0.0
                 }
+                for symbol in data_by_symbol
+            }
 
-            features = processed_data[available_features].tail(self.sequence_length)
+        results = {}
+        batch_symbols = []
+        batch_sequences = []
+        batch_features = []
 
-            if len(features) < self.sequence_length:
-                return {
-                    'error': f'Need at least {self.sequence_length} data points, got {len(features)}',
+        for symbol, new_data_df in data_by_symbol.items():
+            try:
+                sequence, available_features, error = self._prepare_sequence(new_data_df)
+            except Exception as e:
+                logger.error(f"❌ Error preparing {symbol} for batch detection: {e}")
+                sequence, available_features, error = None, [], str(e)
+
+            if error:
+                results[symbol] = {
+                    'error': error,
                     'is_anomaly': False,
                     'anomaly_score': 0.0
                 }
+                continue
 
-            # Scale and predict
-            scaled_features = self.scaler.transform(features)
-            sequence = scaled_features.reshape(1, self.sequence_length, len(available_features))
+            # Windows built from different feature subsets cannot share a tensor
+            if batch_features and available_features != batch_features[0]:
+                results[symbol] = {
+                    'error': f'Feature mismatch in batch: {available_features} != {batch_features[0]}',
+                    'is_anomaly': False,
+                    'anomaly_score': 0.0
+                }
+                continue
 
-            reconstruction = self.model.predict(sequence, verbose=0)
-            mae = np.mean(np.abs(reconstruction - sequence))
+            batch_symbols.append(symbol)
+            batch_sequences.append(sequence)
+            batch_features.append(available_features)
 
-            is_anomaly = mae > self.threshold
-            anomaly_score = mae / self.threshold
+        if not batch_symbols:
+            return results
 
-            return {
-                'is_anomaly': bool(is_anomaly),
-                'anomaly_score': float(anomaly_score),
-                'reconstruction_error': float(mae),
-                'threshold': float(self.threshold),
-                'confidence': float(1 - min(anomaly_score, 2.0) / 2.0),
-                'timestamp': pd.Timestamp.now().isoformat(),
-                'features_used': available_features
-            }
+        try:
+            sequences = np.stack(batch_sequences)
+            with stage('predict_batch'):
+                reconstruction = self.model.predict(sequences, verbose=0)
+            maes = np.mean(np.abs(reconstruction - sequences), axis=(1, 2))
+
+            for symbol, mae, available_features in zip(batch_symbols, maes, batch_features):
+                results[symbol] = self._build_result(mae, available_features, thresholds.get(symbol))
+
+            logger.info(f"✅ Batch detection completed for {len(batch_symbols)} symbols in one forward pass")
 
         except Exception as e:
-            logger.error(f"❌ Error in anomaly detection: {e}")
+            logger.error(f"❌ Error in batch anomaly detection: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            return {
-                'error': str(e),
-                'is_anomaly': False,
-                'anomaly_score': 0.0
-            }
+            for symbol in batch_symbols:
+                results[symbol] = {
+                    'error': str(e),
+                    'is_anomaly': False,
+                    'anomaly_score': 0.0
+                }
+
+        # Preserve the caller's symbol order
+        return {symbol: results[symbol] for symbol in data_by_symbol}
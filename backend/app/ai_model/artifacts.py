@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "lstm_autoencoder.h5"
+SCALER_FILE = "scaler.pkl"
+METADATA_FILE = "model_metadata.pkl"
+MANIFEST_FILE = "manifest.json"
+WEIGHTS_DIR = "weights"
+VERSIONS_DIR = "versions"
+# Name of the active version, replaced atomically on activation
+CURRENT_FILE = "CURRENT"
+
+
+class ArtifactError(Exception):
+    """Raised when a model version is missing, incomplete or fails its checksums"""
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _atomic_write(path: str, content: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _artifact_files(version_dir: str) -> List[str]:
+    """Every file under a version directory except the manifest, as sorted relative paths"""
+    files = []
+    for dirpath, _, filenames in os.walk(version_dir):
+        for filename in filenames:
+            relative = os.path.relpath(os.path.join(dirpath, filename), version_dir)
+            if relative != MANIFEST_FILE:
+                files.append(relative)
+    return sorted(files)
+
+
+def build_manifest(version_dir: str, version: str) -> Dict:
+    """Describe a version directory: checksums and sizes of all its files plus the model metadata"""
+    import joblib
+
+    metadata = joblib.load(os.path.join(version_dir, METADATA_FILE))
+    return {
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'training_date': str(metadata.get('training_date', 'unknown')),
+        'sequence_length': metadata.get('sequence_length'),
+        'threshold': metadata.get('threshold'),
+        'files': {
+            name: {'sha256': sha256_file(os.path.join(version_dir, name)), 'bytes': os.path.getsize(os.path.join(version_dir, name))}
+            for name in _artifact_files(version_dir)
+        }
+    }
+
+
+def verify_version(version_dir: str) -> Dict:
+    """Check every file listed in the manifest; returns the manifest or raises ArtifactError"""
+    manifest_path = os.path.join(version_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ArtifactError(f"No manifest in {version_dir}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    for required in (MODEL_FILE, SCALER_FILE, METADATA_FILE):
+        if required not in manifest['files']:
+            raise ArtifactError(f"Manifest of {manifest['version']} does not list {required}")
+    for name, expected in manifest['files'].items():
+        path = os.path.join(version_dir, name)
+        if not os.path.exists(path):
+            raise ArtifactError(f"{name} listed in the manifest of {manifest['version']} is missing")
+        if sha256_file(path) != expected['sha256']:
+            raise ArtifactError(f"Checksum mismatch for {name} in {manifest['version']}")
+    return manifest
+
+
+def list_versions(root: str) -> List[str]:
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(name for name in os.listdir(versions_dir) if not name.startswith('.'))
+
+
+def active_version(root: str) -> Optional[str]:
+    """Version named in CURRENT, or None for a flat (unversioned) artifacts directory"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_active(root: str) -> Tuple[Optional[str], str]:
+    """Return (version, directory) of the artifacts to serve
+
+    Without a CURRENT file the flat layout (files directly under root) is
+    served and the version is None; callers fall back to the training date.
+    """
+    version = active_version(root)
+    if version is None:
+        return None, root
+    version_dir = os.path.join(root, VERSIONS_DIR, version)
+    if not os.path.isdir(version_dir):
+        raise ArtifactError(f"Active model version {version} not found in {root}")
+    return version, version_dir
+
+
+def publish(source_dir: str, root: str, version: Optional[str] = None, activate: bool = False) -> str:
+    """Copy a trained model into root/versions/<version> with exported weights and a manifest
+
+    The version directory is assembled under a temporary name and renamed
+    into place, so a reader never sees a half-written version.
+    """
+    import joblib
+    from .numpy_backend import export_weights
+
+    metadata = joblib.load(os.path.join(source_dir, METADATA_FILE))
+    version = version or str(metadata.get('training_date') or time.strftime('%Y%m%d_%H%M%S'))
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    version_dir = os.path.join(versions_dir, version)
+    if os.path.exists(version_dir):
+        raise ArtifactError(f"Model version {version} already exists")
+
+    tmp_dir = os.path.join(versions_dir, f".{version}.{os.getpid()}.tmp")
+    os.makedirs(tmp_dir)
+    try:
+        for name in os.listdir(source_dir):
+            path = os.path.join(source_dir, name)
+            if name in (MODEL_FILE, SCALER_FILE, METADATA_FILE):
+                shutil.copy2(path, tmp_dir)
+            elif os.path.isdir(path) and os.path.exists(os.path.join(path, MODEL_FILE)):
+                # Per-interval model, e.g. <source>/1m/
+                os.makedirs(os.path.join(tmp_dir, name))
+                for artifact in (MODEL_FILE, SCALER_FILE, METADATA_FILE):
+                    shutil.copy2(os.path.join(path, artifact), os.path.join(tmp_dir, name))
+
+        for model_dir, _, filenames in list(os.walk(tmp_dir)):
+            if MODEL_FILE in filenames:
+                export_weights(os.path.join(model_dir, MODEL_FILE), os.path.join(model_dir, WEIGHTS_DIR))
+
+        manifest = build_manifest(tmp_dir, version)
+        _atomic_write(os.path.join(tmp_dir, MANIFEST_FILE), json.dumps(manifest, indent=2))
+        os.rename(tmp_dir, version_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    logger.info(f"📦 Published model version {version} ({len(manifest['files'])} files)")
+    if activate:
+        activate_version(root, version)
+    return version
+
+
+def activate_version(root: str, version: str) -> Dict:
+    """Verify a published version and point CURRENT at it; running processes pick it up on their next check"""
+    manifest = verify_version(os.path.join(root, VERSIONS_DIR, version))
+    _atomic_write(os.path.join(root, CURRENT_FILE), version + "\n")
+    logger.info(f"🚀 Activated model version {version}")
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+
+    default_root = os.path.join(os.path.dirname(__file__), "model_artifacts")
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts")
+    parser.add_argument("--root", default=default_root, help="artifacts directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish_cmd = commands.add_parser("publish", help="add a trained model as a new version")
+    publish_cmd.add_argument("source_dir")
+    publish_cmd.add_argument("--version")
+    publish_cmd.add_argument("--activate", action="store_true")
+
+    activate_cmd = commands.add_parser("activate", help="make a published version the active one")
+    activate_cmd.add_argument("version")
+
+    verify_cmd = commands.add_parser("verify", help="check a version against its manifest")
+    verify_cmd.add_argument("version")
+
+    commands.add_parser("list", help="list published versions")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "publish":
+        print(publish(args.source_dir, args.root, args.version, args.activate))
+    elif args.command == "activate":
+        activate_version(args.root, args.version)
+    elif args.command == "verify":
+        manifest = verify_version(os.path.join(args.root, VERSIONS_DIR, args.version))
+        print(f"{args.version}: {len(manifest['files'])} files OK")
+    else:
+        current = active_version(args.root)
+        for version in list_versions(args.root):
+            print(f"{'*' if version == current else ' '} {version}")
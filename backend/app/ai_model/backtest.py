@@ -0,0 +1,80 @@
+import logging
+import time
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1024
+
+
+def rolling_windows(scaled: np.ndarray, sequence_length: int) -> np.ndarray:
+    """Every (sequence_length, n_features) window of a scaled feature matrix, as a view
+
+    Window i covers rows i .. i + sequence_length - 1. No data is copied;
+    the result shares memory with `scaled`.
+    """
+    # sliding_window_view puts the window axis last: (n_windows, n_features, sequence_length)
+    return sliding_window_view(scaled, sequence_length, axis=0).transpose(0, 2, 1)
+
+
+def iter_batches(windows: np.ndarray, batch_size: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (offset, contiguous batch) so at most one batch is materialized at a time"""
+    for offset in range(0, len(windows), batch_size):
+        yield offset, np.ascontiguousarray(windows[offset:offset + batch_size], dtype=np.float32)
+
+
+def reconstruction_errors(model, windows: np.ndarray, batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+    """Mean absolute reconstruction error of every window, in fixed-size batches"""
+    errors = np.empty(len(windows), dtype=np.float64)
+    for offset, batch in iter_batches(windows, batch_size):
+        reconstruction = model.predict(batch, verbose=0, batch_size=len(batch))
+        errors[offset:offset + len(batch)] = np.mean(np.abs(reconstruction - batch), axis=(1, 2))
+    return errors
+
+
+def summarize(errors: np.ndarray, threshold: float, elapsed: float) -> Dict:
+    """Headline numbers for a scored series"""
+    if len(errors) == 0:
+        return {'windows': 0, 'anomalies': 0, 'seconds': round(elapsed, 4)}
+    return {
+        'windows': int(len(errors)),
+        'anomalies': int(np.count_nonzero(errors > threshold)),
+        'mean_error': float(errors.mean()),
+        'p95_error': float(np.percentile(errors, 95)),
+        'p99_error': float(np.percentile(errors, 99)),
+        'max_error': float(errors.max()),
+        'seconds': round(elapsed, 4),
+        'windows_per_second': round(len(errors) / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Score every window of a symbol's history with the anomaly model")
+    parser.add_argument("symbol")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--csv", help="write the per-timestamp series to this CSV file")
+    args = parser.parse_args()
+
+    from app.ai_model.service import ai_service
+
+    started = time.perf_counter()
+    report = ai_service.backtest(args.symbol, interval=args.interval, period=args.period, batch_size=args.batch_size)
+    if 'error' in report:
+        raise SystemExit(f"Backtest failed: {report['error']}")
+
+    if args.csv:
+        import pandas as pd
+
+        pd.DataFrame(report['points']).to_csv(args.csv, index=False)
+
+    report.pop('points')
+    report['total_seconds'] = round(time.perf_counter() - started, 4)
+    print(json.dumps(report, indent=2))
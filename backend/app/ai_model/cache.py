@@ -0,0 +1,197 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryCacheBackend:
+    """Process-local LRU store with a hard expiry per entry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict, expire_seconds: float):
+        with self._lock:
+            self._entries[key] = (time.time() + expire_seconds, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Redis store shared by API and Celery workers; Redis handles expiry and eviction"""
+
+    def __init__(self, url: str, prefix: str = "crypto-sentry:analysis:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Dict]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, entry: Dict, expire_seconds: float):
+        self.client.set(self.prefix + key, json.dumps(entry, default=str), ex=max(1, int(expire_seconds)))
+
+
+class ResultCache:
+    """Cache of analysis results per (symbol, interval, last candle, model version)
+
+    One entry is kept per (symbol, interval, model version), recording the
+    timestamp of the candle it was computed from. Within ttl_seconds the
+    entry is returned without touching market data. After that, and for up
+    to stale_seconds more, the stale result is returned while a background
+    refresh runs. A refresh that finds the same last closed candle reuses
+    the stored result instead of running the model again; analyses never
+    include the in-progress candle, so a closed one does not change.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 60, stale_seconds: float = 300):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.refresh_errors = 0
+
+    @staticmethod
+    def _key(symbol: str, interval: str, model_version: str) -> str:
+        return f"{symbol}:{interval}:{model_version}"
+
+    def get_or_compute(self, symbol: str, interval: str, model_version: str,
+                       compute: Callable[[Optional[Dict]], Tuple[Optional[str], Dict]]) -> Dict:
+        """Return a cached result or compute a new one
+
+        compute receives the previous entry (or None) and returns a tuple of
+        (last candle timestamp, result). Results with an 'error' are not cached.
+        """
+        key = self._key(symbol, interval, model_version)
+        entry = self._safe_get(key)
+
+        if entry is not None:
+            age = time.time() - entry['stored_at']
+            if age < self.ttl_seconds:
+                self.hits += 1
+                return dict(entry['result'], cache_status='hit')
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._schedule_refresh(key, entry, compute)
+                return dict(entry['result'], cache_status='stale')
+
+        self.misses += 1
+        result = self._refresh(key, entry, compute)
+        return dict(result, cache_status='miss')
+
+    def _refresh(self, key: str, previous: Optional[Dict], compute) -> Dict:
+        candle, result = compute(previous)
+        # compute hands back the previous result when the last candle is unchanged
+        self._store(key, candle, result, reused=previous is not None and result is previous['result'])
+        return result
+
+    def _store(self, key: str, candle: Optional[str], result: Dict, reused: bool = False):
+        if reused:
+            self.revalidated += 1
+
+        if 'error' not in result:
+            entry = {'candle': candle, 'result': result, 'stored_at': time.time()}
+            try:
+                self.backend.set(key, entry, self.ttl_seconds + self.stale_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not store analysis result in cache: {e}")
+
+    def lookup(self, symbol: str, interval: str, model_version: str) -> Tuple[Optional[Dict], bool]:
+        """Return (entry, is_fresh) for callers that batch their own refreshes
+
+        A fresh entry counts as a hit, anything else as a miss.
+        """
+        entry = self._safe_get(self._key(symbol, interval, model_version))
+        fresh = entry is not None and time.time() - entry['stored_at'] < self.ttl_seconds
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry, fresh
+
+    def store(self, symbol: str, interval: str, model_version: str, candle: Optional[str],
+              result: Dict, reused: bool = False):
+        """Store a result computed outside get_or_compute"""
+        self._store(self._key(symbol, interval, model_version), candle, result, reused)
+
+    def _schedule_refresh(self, key: str, previous: Dict, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._refresh(key, previous, compute)
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.error(f"❌ Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(run)
+
+    def _safe_get(self, key: str) -> Optional[Dict]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Analysis cache unavailable: {e}")
+            return None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'refresh_errors': self.refresh_errors,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+        }
+
+
+def build_result_cache(backend: str, redis_url: str, ttl_seconds: float,
+                       stale_seconds: float, max_entries: int) -> ResultCache:
+    """Build the result cache selected in the settings"""
+    if backend == 'redis':
+        cache_backend = RedisCacheBackend(redis_url)
+    elif backend == 'memory':
+        cache_backend = InMemoryCacheBackend(max_entries)
+    else:
+        raise ValueError(f"Unknown result cache backend: {backend}")
+    return ResultCache(cache_backend, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
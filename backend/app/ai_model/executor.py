@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisOverloaded(Exception):
+    """Raised when too many distinct analyses are already queued or running"""
+
+
+class AnalysisExecutor:
+    """Bounded thread pool for blocking analysis work, with per-key request coalescing
+
+    Concurrent callers asking for the same key share one in-flight
+    computation. Once max_pending distinct keys are queued or running,
+    new keys are rejected with AnalysisOverloaded instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, name: str = "analysis"):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs) -> Future:
+        """Start fn for key, or join the computation already running for it"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            if len(self._in_flight) >= self.max_pending:
+                self.rejected += 1
+                raise AnalysisOverloaded(f"{len(self._in_flight)} analyses already pending")
+
+            future = self._executor.submit(fn, *args, **kwargs)
+            self._in_flight[key] = future
+            self.submitted += 1
+
+        future.add_done_callback(lambda done: self._release(key, done))
+        return future
+
+    def _release(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    async def run(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Await fn(*args) off the event loop, sharing the result with concurrent callers"""
+        future = self.submit(key, fn, *args, **kwargs)
+        # Shield so one disconnecting client does not cancel work others are waiting on
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._in_flight)
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'pending': pending,
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'rejected': self.rejected
+        }
+
+
+# Global instance
+analysis_executor = AnalysisExecutor(
+    max_workers=settings.ANALYSIS_MAX_WORKERS,
+    max_pending=settings.ANALYSIS_MAX_PENDING
+)
+
+# Backtests scan whole histories; their own pool keeps them from starving live analyses
+backtest_executor = AnalysisExecutor(
+    max_workers=settings.BACKTEST_MAX_WORKERS,
+    max_pending=settings.BACKTEST_MAX_PENDING,
+    name="backtest"
+)
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class _FittedModel:
+    __slots__ = ('clf', 'last_timestamp', 'rows', 'fitted_at')
+
+    def __init__(self, clf, last_timestamp, rows: int, fitted_at: float):
+        self.clf = clf
+        self.last_timestamp = last_timestamp
+        self.rows = rows
+        self.fitted_at = fitted_at
+
+
+class FallbackModelCache:
+    """Fitted IsolationForest per symbol for the demo fallback path
+
+    The fallback runs at full traffic whenever the LSTM is unavailable, so
+    the forest is fitted once per symbol and reused to score the newest
+    candle. It is refitted when refit_candles new candles have arrived
+    since the last fit or when the fit is older than refit_seconds.
+    Concurrent requests for a symbol that needs a refit wait for a single
+    fit instead of each fitting their own.
+    """
+
+    def __init__(self, refit_candles: int = 24, refit_seconds: float = 3600, max_symbols: int = 256):
+        self.refit_candles = refit_candles
+        self.refit_seconds = refit_seconds
+        self.max_symbols = max_symbols
+        self._models: "OrderedDict[str, _FittedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fit_locks: Dict[str, threading.Lock] = {}
+
+        self.fits = 0
+        self.reuses = 0
+
+    def _fit_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            if symbol not in self._fit_locks:
+                self._fit_locks[symbol] = threading.Lock()
+            return self._fit_locks[symbol]
+
+    def _get(self, symbol: str) -> Optional[_FittedModel]:
+        with self._lock:
+            model = self._models.get(symbol)
+            if model is not None:
+                self._models.move_to_end(symbol)
+            return model
+
+    def _is_current(self, model: Optional[_FittedModel], features: pd.DataFrame) -> bool:
+        if model is None or time.monotonic() - model.fitted_at > self.refit_seconds:
+            return False
+        # Candles newer than the fit; an unknown last timestamp means the history moved under us
+        try:
+            position = features.index.searchsorted(model.last_timestamp, side='right')
+        except TypeError:
+            # tz-aware stored candles vs. tz-naive generated fallback data
+            return False
+        if position == 0 or features.index[position - 1] != model.last_timestamp:
+            return False
+        return len(features) - position < self.refit_candles
+
+    def model_for(self, symbol: str, features: pd.DataFrame) -> Tuple[object, bool]:
+        """Return (fitted forest, refitted) for the symbol, fitting only when it is due"""
+        model = self._get(symbol)
+        if self._is_current(model, features):
+            self.reuses += 1
+            return model.clf, False
+
+        with self._fit_lock(symbol):
+            # Another request may have refitted while we waited
+            model = self._get(symbol)
+            if self._is_current(model, features):
+                self.reuses += 1
+                return model.clf, False
+
+            from sklearn.ensemble import IsolationForest
+
+            clf = IsolationForest(contamination=0.1, random_state=42)
+            clf.fit(features.values)
+            self.fits += 1
+            logger.info(f"🌲 Fitted fallback model for {symbol} on {len(features)} candles")
+
+            with self._lock:
+                self._models[symbol] = _FittedModel(clf, features.index[-1], len(features), time.monotonic())
+                self._models.move_to_end(symbol)
+                while len(self._models) > self.max_symbols:
+                    evicted, _ = self._models.popitem(last=False)
+                    self._fit_locks.pop(evicted, None)
+            return clf, True
+
+    def predict_latest(self, symbol: str, features: pd.DataFrame) -> Tuple[bool, bool]:
+        """Score only the newest row; returns (is_anomaly, refitted)"""
+        clf, refitted = self.model_for(symbol, features)
+        prediction = clf.predict(features.iloc[-1:].values)
+        return bool(prediction[0] == -1), refitted
+
+    def stats(self) -> Dict:
+        return {
+            'symbols': len(self._models),
+            'fits': self.fits,
+            'reuses': self.reuses
+        }
@@ -0,0 +1,310 @@
+import math
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Output columns, in the same names calculate_basic_features produces
+FEATURE_COLUMNS = [
+    'price_change',
+    'high_low_ratio',
+    'open_close_ratio',
+    'volume_change',
+    'volume_ma_ratio',
+    'sma_30',
+    'sma_50',
+    'sma_ratio',
+    'volatility',
+    'rsi',
+    'obv',
+    'obv_change',
+]
+
+VOLUME_MA_WINDOW = 7
+RSI_WINDOW = 14
+SMA_SHORT_WINDOW = 30
+SMA_LONG_WINDOW = 50
+
+# Longest indicator lookback; rows before this are back-filled in batch mode
+LONGEST_LOOKBACK = SMA_LONG_WINDOW
+
+OBV = FEATURE_COLUMNS.index('obv')
+OBV_CHANGE = FEATURE_COLUMNS.index('obv_change')
+
+
+class _RunningWindow:
+    """Fixed-size window that keeps a running sum for an O(1) rolling mean"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self._updates = 0
+        # Value pushed out by the last push, so it can be undone
+        self._evicted = None
+
+    def push(self, value: float):
+        self._evicted = self.values[0] if len(self.values) == self.size else None
+        if self._evicted is not None:
+            self.total -= self._evicted
+        self.values.append(value)
+        self.total += value
+
+        # Re-sum once per full rotation so floating-point drift stays bounded
+        self._updates += 1
+        if self._updates >= self.size:
+            self.total = math.fsum(self.values)
+            self._updates = 0
+
+    def undo(self):
+        """Take back the last push; only one level deep"""
+        self.total -= self.values.pop()
+        if self._evicted is not None:
+            self.values.appendleft(self._evicted)
+            self.total += self._evicted
+            self._evicted = None
+        self._updates = max(self._updates - 1, 0)
+
+    def mean(self) -> float:
+        if len(self.values) < self.size:
+            return math.nan
+        return self.total / self.size
+
+
+def _pct_change(current: float, previous: float) -> float:
+    """pandas-compatible percent change between two scalars"""
+    if math.isnan(previous) or math.isnan(current):
+        return math.nan
+    if previous == 0:
+        if current == 0:
+            return math.nan
+        return math.copysign(math.inf, current)
+    return (current / previous - 1) * 100
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    """pandas-compatible division between two scalars"""
+    if math.isnan(numerator) or math.isnan(denominator):
+        return math.nan
+    if denominator == 0:
+        if numerator == 0:
+            return math.nan
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class StreamingFeatureEngine:
+    """Incremental per-symbol version of CryptoAnomalyDetector.calculate_basic_features
+
+    Keeps running windows for the SMAs, volume MA, RSI gain/loss and OBV,
+    so each new candle is folded in with O(1) work instead of recomputing
+    indicators over the whole history. Once warm, the last window_size
+    rows match calculate_basic_features run on the last `history` candles
+    (the live candle buffer) to within floating-point tolerance.
+
+    OBV is a cumulative sum from the first candle the batch path sees, so
+    it is kept as a rolling sum of signed volume over `history` candles and
+    the window's OBV and obv_change are rebuilt from it when read. Gaps
+    are filled on read too, backward then forward like the batch path.
+    """
+
+    def __init__(self, window_size: int = 30, history: Optional[int] = None):
+        self.window_size = window_size
+        # Candles the batch path sees: the live buffer capacity
+        self.history = history or window_size + LONGEST_LOOKBACK
+        self.count = 0
+        self.last_timestamp = None
+
+        self._prev_close = math.nan
+        self._prev_volume = math.nan
+
+        self._volume_window = _RunningWindow(VOLUME_MA_WINDOW)
+        self._close_short = _RunningWindow(SMA_SHORT_WINDOW)
+        self._close_long = _RunningWindow(SMA_LONG_WINDOW)
+        self._gain_window = _RunningWindow(RSI_WINDOW)
+        self._loss_window = _RunningWindow(RSI_WINDOW)
+        # The first candle's signed volume is zero, so OBV sums the other history - 1
+        self._obv_window = _RunningWindow(max(self.history - 1, 1))
+        # Signed volume of each row in the window, to rebuild OBV from the rolling sum
+        self._signed_volumes = _RunningWindow(window_size)
+
+        # Last non-NaN value per column, used when a column has no value in the whole window
+        self._last_valid = np.full(len(FEATURE_COLUMNS), np.nan)
+        self._rows = deque(maxlen=window_size)
+        self._timestamps = deque(maxlen=window_size)
+        self._evicted_row = None
+        self._checkpoint = None
+
+        # Re-entrant so callers can hold it across several engine calls
+        self.lock = threading.RLock()
+
+    @property
+    def is_ready(self) -> bool:
+        """True once every row in the window is past the longest lookback"""
+        return self.count >= LONGEST_LOOKBACK - 1 + self.window_size
+
+    def _checkpoint_scalars(self):
+        """Scalar state before the latest candle; the windows undo their own last push"""
+        return (
+            self.count, self.last_timestamp,
+            self._prev_close, self._prev_volume,
+            self._last_valid.copy(),
+        )
+
+    def _revise_last(self):
+        """Undo the latest candle in O(1) so a revised version can replace it"""
+        (
+            self.count, self.last_timestamp,
+            self._prev_close, self._prev_volume,
+            self._last_valid,
+        ) = self._checkpoint
+        for window in self._windows():
+            window.undo()
+        self._rows.pop()
+        self._timestamps.pop()
+        if self._evicted_row is not None:
+            self._rows.appendleft(self._evicted_row[0])
+            self._timestamps.appendleft(self._evicted_row[1])
+            self._evicted_row = None
+
+    def _windows(self):
+        return (
+            self._volume_window, self._close_short, self._close_long, self._gain_window, self._loss_window,
+            self._obv_window, self._signed_volumes,
+        )
+
+    def update(self, timestamp, open_: float, high: float, low: float, close: float, volume: float) -> Optional[np.ndarray]:
+        """Fold one candle into the state and return its feature row
+
+        A candle with the same timestamp as the previous one replaces it,
+        which is how an in-progress candle is revised. Older candles are
+        ignored.
+        """
+        with self.lock:
+            return self._update(timestamp, open_, high, low, close, volume)
+
+    def _update(self, timestamp, open_, high, low, close, volume):
+        if self.last_timestamp is not None:
+            if timestamp == self.last_timestamp and self._checkpoint is not None:
+                self._revise_last()
+            elif timestamp <= self.last_timestamp:
+                logger.debug(f"Skipping out-of-order candle {timestamp} (last {self.last_timestamp})")
+                return None
+
+        self._checkpoint = self._checkpoint_scalars()
+
+        open_, high, low, close, volume = float(open_), float(high), float(low), float(close), float(volume)
+
+        # Price and volume changes
+        price_change = _pct_change(close, self._prev_close)
+        volume_change = _pct_change(volume, self._prev_volume)
+
+        # Volume MA and SMAs
+        self._volume_window.push(volume)
+        self._close_short.push(close)
+        self._close_long.push(close)
+        sma_30 = self._close_short.mean()
+        sma_50 = self._close_long.mean()
+
+        # RSI gain/loss; the first delta is NaN and counts as zero like in pandas
+        delta = close - self._prev_close
+        self._gain_window.push(delta if delta > 0 else 0.0)
+        self._loss_window.push(-delta if delta < 0 else 0.0)
+        rs = _ratio(self._gain_window.mean(), self._loss_window.mean())
+        rsi = 100 - (100 / (1 + rs)) if not math.isnan(rs) else math.nan
+
+        # OBV over the last `history` candles; the first delta is NaN and counts as zero
+        signed_volume = float(np.sign(delta)) * volume if not math.isnan(delta) else 0.0
+        self._obv_window.push(signed_volume)
+        self._signed_volumes.push(signed_volume)
+        obv = self._obv_window.total
+
+        row = np.array([
+            price_change,
+            _ratio(high, low),
+            _ratio(open_, close),
+            volume_change,
+            _ratio(volume, self._volume_window.mean()),
+            sma_30,
+            sma_50,
+            _ratio(sma_30, sma_50),
+            _ratio(high - low, close) * 100,
+            rsi,
+            obv,
+            _pct_change(obv, obv - signed_volume),
+        ])
+        valid = ~np.isnan(row)
+        self._last_valid[valid] = row[valid]
+
+        self._prev_close = close
+        self._prev_volume = volume
+        self.count += 1
+        self.last_timestamp = timestamp
+
+        full = len(self._rows) == self.window_size
+        self._evicted_row = (self._rows[0], self._timestamps[0]) if full else None
+        self._rows.append(row)
+        self._timestamps.append(timestamp)
+        return row
+
+    def _window_rows(self) -> np.ndarray:
+        """The stored rows with OBV re-anchored and gaps filled like the batch path"""
+        rows = np.array(self._rows)
+        signed = np.array(self._signed_volumes.values)[-len(rows):]
+        # OBV of each row is the rolling sum less the signed volume that came after it
+        after = np.concatenate((np.cumsum(signed[::-1])[::-1][1:], [0.0]))
+        obv = self._obv_window.total - after
+        previous = np.concatenate(([obv[0] - signed[0]], obv[:-1]))
+        rows[:, OBV] = obv
+        rows[:, OBV_CHANGE] = [_pct_change(current, prev) for current, prev in zip(obv, previous)]
+
+        # Back-fill, then forward-fill, then fall back to the last value seen before the window
+        for column in np.flatnonzero(np.isnan(rows).any(axis=0)):
+            values = pd.Series(rows[:, column]).bfill().ffill().to_numpy()
+            values[np.isnan(values)] = self._last_valid[column]
+            rows[:, column] = values
+        return rows
+
+    def window(self, feature_names: Optional[List[str]] = None) -> np.ndarray:
+        """Return the last window_size feature rows as a (rows, features) array"""
+        with self.lock:
+            rows = self._window_rows() if self._rows else np.empty((0, len(FEATURE_COLUMNS)))
+        if feature_names is None:
+            return rows
+
+        indices = [FEATURE_COLUMNS.index(name) for name in feature_names]
+        return rows[:, indices]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the current window as a DataFrame, mainly for debugging"""
+        with self.lock:
+            return pd.DataFrame(self.window(), index=list(self._timestamps), columns=FEATURE_COLUMNS)
+
+
+class FeatureEngineRegistry:
+    """Holds one StreamingFeatureEngine per symbol"""
+
+    def __init__(self, window_size: int = 30):
+        self.window_size = window_size
+        self._engines: Dict[str, StreamingFeatureEngine] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> StreamingFeatureEngine:
+        with self._lock:
+            engine = self._engines.get(symbol)
+            if engine is None:
+                engine = StreamingFeatureEngine(self.window_size)
+                self._engines[symbol] = engine
+            return engine
+
+    def reset(self, symbol: str):
+        with self._lock:
+            self._engines.pop(symbol, None)
+
+    def __len__(self) -> int:
+        return len(self._engines)
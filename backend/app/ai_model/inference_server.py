@@ -0,0 +1,390 @@
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import (
+    INFERENCE_BATCH_SIZE, INFERENCE_QUEUE_DEPTH, INFERENCE_QUEUE_WAIT_SECONDS, INFERENCE_REQUESTS
+)
+from .artifacts import WEIGHTS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Frame: header length, payload length, JSON header, raw float32 payload
+_FRAME = struct.Struct('!II')
+MAX_HEADER_BYTES = 1 << 16
+MAX_PAYLOAD_BYTES = 1 << 28
+
+
+def send_frame(sock: socket.socket, header: Dict, payload=b''):
+    body = json.dumps(header).encode()
+    sock.sendall(_FRAME.pack(len(body), len(payload)) + body)
+    if len(payload):
+        sock.sendall(payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytearray]:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            return None
+        received += count
+    return buffer
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[Dict, bytearray]]:
+    """Read one frame; None when the peer closed the connection"""
+    prefix = _recv_exact(sock, _FRAME.size)
+    if prefix is None:
+        return None
+    header_size, payload_size = _FRAME.unpack(prefix)
+    if header_size > MAX_HEADER_BYTES or payload_size > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Frame too large: {header_size} + {payload_size} bytes")
+    header = _recv_exact(sock, header_size)
+    payload = _recv_exact(sock, payload_size) if payload_size else bytearray()
+    if header is None or payload is None:
+        return None
+    return json.loads(header), payload
+
+
+class _Pending:
+    """One client request waiting for its slice of a batch"""
+
+    __slots__ = ('model_path', 'windows', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, model_path: str, windows: np.ndarray):
+        self.model_path = model_path
+        self.windows = windows
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+
+
+class InferenceServer:
+    """Owns the autoencoder for every API and Celery process on the host
+
+    Clients (RemoteModel) send windows over a Unix socket; one batcher
+    thread takes the first queued request, keeps collecting until
+    max_batch_size windows or max_wait_ms, then runs one forward pass per
+    model and hands every client its rows back. A client has one request
+    in flight at a time, so once every connected client is in the batch
+    there is nothing left to wait for. Models are keyed by the
+    artifacts path the client asks for, so a newly activated version is
+    loaded on first use while the old one keeps serving until evicted.
+    """
+
+    def __init__(self, socket_path: str, root: str, backend: str = "numpy", max_batch_size: int = 64,
+                 max_wait_ms: float = 5.0, max_models: int = 4):
+        self.socket_path = socket_path
+        self.root = os.path.realpath(root)
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_models = max_models
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._models: "OrderedDict[str, object]" = OrderedDict()
+        self._stopped = threading.Event()
+        self._listener: Optional[socket.socket] = None
+        self._clients = 0
+        self._clients_lock = threading.Lock()
+
+        self.batches = 0
+        self.windows = 0
+        self.requests = 0
+
+    def _model(self, model_path: str):
+        """Load (or reuse) the model at model_path; only called from the batcher thread"""
+        model = self._models.get(model_path)
+        if model is None:
+            from .numpy_backend import load_inference_model
+
+            if os.path.commonpath([self.root, model_path]) != self.root:
+                raise PermissionError(f"{model_path} is outside the served artifacts root {self.root}")
+            weights_dir = os.path.join(os.path.dirname(model_path), WEIGHTS_DIR)
+            model = load_inference_model(model_path, self.backend, weights_dir if os.path.isdir(weights_dir) else None)
+            self._models[model_path] = model
+            logger.info(f"✅ Inference server loaded {model_path} ({self.backend} backend)")
+            while len(self._models) > self.max_models:
+                evicted, _ = self._models.popitem(last=False)
+                logger.info(f"🔄 Inference server dropped {evicted}")
+        self._models.move_to_end(model_path)
+        return model
+
+    def _collect(self) -> List[_Pending]:
+        """Block for one request, then gather more until the batch is full or max_wait has passed"""
+        batch = [self._queue.get()]
+        rows = len(batch[0].windows)
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_size and len(batch) < self._clients:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            rows += len(pending.windows)
+        INFERENCE_QUEUE_DEPTH.set(self._queue.qsize())
+        return batch
+
+    def _run(self, batch: List[_Pending]):
+        groups: Dict[Tuple, List[_Pending]] = {}
+        for pending in batch:
+            groups.setdefault((pending.model_path, pending.windows.shape[1:]), []).append(pending)
+
+        started = time.perf_counter()
+        for (model_path, _), group in groups.items():
+            try:
+                windows = np.concatenate([p.windows for p in group]) if len(group) > 1 else group[0].windows
+                reconstruction = np.asarray(self._model(model_path).predict(windows, verbose=0), dtype=np.float32)
+                offsets = np.cumsum([len(p.windows) for p in group])[:-1]
+                for pending, rows in zip(group, np.split(reconstruction, offsets)):
+                    pending.result = rows
+                INFERENCE_BATCH_SIZE.observe(len(windows))
+                self.batches += 1
+                self.windows += len(windows)
+            except Exception as e:
+                logger.error(f"❌ Inference batch for {model_path} failed: {e}")
+                for pending in group:
+                    pending.error = str(e)
+
+        for pending in batch:
+            INFERENCE_QUEUE_WAIT_SECONDS.observe(started - pending.enqueued)
+            pending.done.set()
+
+    def _batch_loop(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if self._stopped.is_set():
+                break
+            self._run(batch)
+
+    def stats(self) -> Dict:
+        return {
+            'socket_path': self.socket_path,
+            'backend': self.backend,
+            'models': list(self._models),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'clients': self._clients,
+            'queue_depth': self._queue.qsize(),
+            'requests': self.requests,
+            'batches': self.batches,
+            'windows': self.windows,
+            'mean_batch_size': self.windows / self.batches if self.batches else 0.0
+        }
+
+    def _serve_client(self, conn: socket.socket):
+        with self._clients_lock:
+            self._clients += 1
+        try:
+            self._handle(conn)
+        finally:
+            with self._clients_lock:
+                self._clients -= 1
+
+    def _handle(self, conn: socket.socket):
+        with conn:
+            while True:
+                try:
+                    frame = recv_frame(conn)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Dropping inference client: {e}")
+                    return
+                if frame is None:
+                    return
+                header, payload = frame
+
+                if header.get('op') == 'stats':
+                    send_frame(conn, self.stats())
+                    continue
+
+                try:
+                    windows = np.frombuffer(payload, dtype=np.float32).reshape(header['shape'])
+                    model_path = os.path.realpath(header['model'])
+                except (KeyError, TypeError, ValueError) as e:
+                    send_frame(conn, {'error': f"Bad request: {e}"})
+                    continue
+
+                pending = _Pending(model_path, windows)
+                self.requests += 1
+                INFERENCE_REQUESTS.inc()
+                self._queue.put(pending)
+                INFERENCE_QUEUE_DEPTH.set(self._queue.qsize())
+                pending.done.wait()
+
+                try:
+                    if pending.error:
+                        send_frame(conn, {'error': pending.error})
+                    else:
+                        result = np.ascontiguousarray(pending.result)
+                        send_frame(conn, {'shape': list(result.shape)}, memoryview(result).cast('B'))
+                except OSError:
+                    return
+
+    def start(self):
+        """Bind the socket and start the batcher and accept threads"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self._listener.listen(128)
+
+        threading.Thread(target=self._batch_loop, name="inference-batcher", daemon=True).start()
+        threading.Thread(target=self._accept_loop, name="inference-accept", daemon=True).start()
+        logger.info(f"🚀 Inference server listening on {self.socket_path} "
+                    f"(batch <= {self.max_batch_size}, wait <= {self.max_wait * 1000.0:.1f}ms)")
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_client, args=(conn,), name="inference-client", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        # Wake the batcher if it is blocked on an empty queue
+        self._queue.put(_Pending('', np.zeros((0,), dtype=np.float32)))
+        if self._listener is not None:
+            self._listener.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+# Client side: one connection per thread and process, shared by every RemoteModel
+_connections = threading.local()
+
+
+def _connection(socket_path: str, timeout: float) -> socket.socket:
+    sock = getattr(_connections, 'sock', None)
+    if sock is None or _connections.pid != os.getpid() or _connections.path != socket_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        _connections.sock, _connections.pid, _connections.path = sock, os.getpid(), socket_path
+    return sock
+
+
+def _drop_connection():
+    sock = getattr(_connections, 'sock', None)
+    _connections.sock = None
+    if sock is not None:
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+
+def _request(socket_path: str, timeout: float, header: Dict, payload=b'') -> Tuple[Dict, bytearray]:
+    # A cached connection the server closed (restart) fails on connect or send, or reads EOF;
+    # the request never ran then, so it is retried once. A timeout waiting for the reply is
+    # not retried: the server may still be computing it.
+    for attempt in range(2):
+        try:
+            sock = _connection(socket_path, timeout)
+            send_frame(sock, header, payload)
+        except (ConnectionError, FileNotFoundError):
+            _drop_connection()
+            if attempt:
+                raise
+            continue
+        except OSError:
+            _drop_connection()
+            raise
+
+        try:
+            frame = recv_frame(sock)
+        except OSError:
+            _drop_connection()
+            raise
+        if frame is not None:
+            return frame
+        _drop_connection()
+        if attempt:
+            raise ConnectionError("Inference server closed the connection")
+
+
+class RemoteModel:
+    """Stands in for the Keras/NumPy model: predict() is answered by the inference server
+
+    The client process keeps only the scaler and metadata; the weights
+    live once, in the server.
+    """
+
+    def __init__(self, model_path: str, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.model_path = os.path.realpath(model_path)
+        self.socket_path = socket_path or settings.INFERENCE_SOCKET_PATH
+        self.timeout = timeout or settings.INFERENCE_TIMEOUT_SECONDS
+
+    def predict(self, x, verbose=0, batch_size=None) -> np.ndarray:
+        windows = np.ascontiguousarray(x, dtype=np.float32)
+        header, payload = _request(
+            self.socket_path, self.timeout,
+            {'model': self.model_path, 'shape': list(windows.shape)}, memoryview(windows).cast('B')
+        )
+        if 'error' in header:
+            raise RuntimeError(f"Inference server error: {header['error']}")
+        return np.frombuffer(payload, dtype=np.float32).reshape(header['shape'])
+
+
+def server_stats(socket_path: Optional[str] = None, timeout: float = 1.0) -> Dict:
+    """Ask the inference server for its counters; an 'error' entry when it is unreachable
+
+    Uses its own short-lived connection so status checks are not counted
+    as a client the batcher waits for.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path or settings.INFERENCE_SOCKET_PATH)
+            send_frame(sock, {'op': 'stats'})
+            frame = recv_frame(sock)
+        return frame[0] if frame else {'error': 'Inference server closed the connection'}
+    except (OSError, ValueError) as e:
+        return {'error': str(e)}
+
+
+if __name__ == "__main__":
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Serve the anomaly model to local processes over a Unix socket")
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET_PATH)
+    parser.add_argument("--backend", default=settings.INFERENCE_SERVER_BACKEND, choices=("numpy", "keras"))
+    parser.add_argument("--max-batch-size", type=int, default=settings.INFERENCE_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.INFERENCE_MAX_WAIT_MS)
+    parser.add_argument("--metrics-port", type=int, default=settings.INFERENCE_METRICS_PORT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    root = settings.MODEL_ARTIFACTS_DIR or os.path.join(os.path.dirname(__file__), "model_artifacts")
+    server = InferenceServer(args.socket, root, args.backend, args.max_batch_size, args.max_wait_ms,
+                             settings.INFERENCE_SERVER_MAX_MODELS)
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+        from app.core.metrics import metrics_registry
+        start_http_server(args.metrics_port, registry=metrics_registry())
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    server.start()
+    stop.wait()
+    server.stop()
@@ -0,0 +1,380 @@
+import os
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# One record per candle, so a series is replaced with a single atomic rename
+CANDLE_DTYPE = np.dtype([('timestamp', np.int64), ('ohlcv', np.float64, (len(OHLCV_COLUMNS),))])
+
+_INTERVALS = {
+    '1m': pd.Timedelta(minutes=1),
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '60m': pd.Timedelta(hours=1),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1),
+    '1wk': pd.Timedelta(weeks=1),
+}
+
+# History requested on first sync and used for live analysis, within yfinance's intraday limits
+# (1m: last 7 days per request, 2m-30m: last 60 days)
+DEFAULT_PERIODS = {
+    '1m': '5d',
+    '2m': '30d',
+    '5m': '30d',
+    '15m': '30d',
+    '30m': '30d',
+    '60m': '180d',
+    '1h': '180d',
+    '1d': '60d',
+    '1wk': '2y',
+}
+
+
+def interval_to_timedelta(interval: str) -> pd.Timedelta:
+    """Convert a yfinance interval string such as '1d' or '5m' to a Timedelta"""
+    if interval not in _INTERVALS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return _INTERVALS[interval]
+
+
+def closed_candles(timestamps: np.ndarray, interval: str, now_ns: Optional[int] = None) -> int:
+    """How many of the (open-time, ascending) timestamps belong to candles that have closed by now"""
+    now_ns = time.time_ns() if now_ns is None else now_ns
+    return int(np.searchsorted(timestamps, now_ns - interval_to_timedelta(interval).value, side='right'))
+
+
+def default_period(interval: str) -> str:
+    """History to fetch and analyse for an interval when the caller does not pick one"""
+    interval_to_timedelta(interval)
+    return DEFAULT_PERIODS.get(interval, '60d')
+
+
+def period_to_timedelta(period: str) -> pd.Timedelta:
+    """Convert a yfinance period string such as '60d', '6mo' or '2y' to a Timedelta"""
+    if period.endswith('mo'):
+        return pd.Timedelta(days=30 * int(period[:-2]))
+    if period.endswith('wk'):
+        return pd.Timedelta(weeks=int(period[:-2]))
+    if period.endswith('y'):
+        return pd.Timedelta(days=365 * int(period[:-1]))
+    if period.endswith('d'):
+        return pd.Timedelta(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _normalize_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """Lower-case the OHLCV columns and put the index in UTC"""
+    data = data.rename(columns={
+        'Open': 'open',
+        'High': 'high',
+        'Low': 'low',
+        'Close': 'close',
+        'Volume': 'volume'
+    })
+    if not all(col in data.columns for col in OHLCV_COLUMNS):
+        raise ValueError(f"Missing required columns in market data: {list(data.columns)}")
+
+    index = pd.DatetimeIndex(data.index)
+    index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+    data = data[OHLCV_COLUMNS].astype(float)
+    data.index = index
+    return data[~data.index.duplicated(keep='last')].sort_index()
+
+
+class MarketDataProvider:
+    """Source of OHLCV candles; subclasses decide where the candles come from"""
+
+    name = 'base'
+
+    def fetch(self, symbol: str, interval: str = "1d", period: Optional[str] = None,
+              start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Return candles with lower-case OHLCV columns and a UTC DatetimeIndex
+
+        Either period (most recent history) or start/end (a range) is used.
+        """
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Fetches candles from Yahoo Finance"""
+
+    name = 'yfinance'
+
+    def fetch(self, symbol, interval="1d", period=None, start=None, end=None):
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            data = ticker.history(start=start, end=end, interval=interval)
+        else:
+            data = ticker.history(period=period or "60d", interval=interval)
+
+        if data.empty:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz='UTC'))
+        return _normalize_frame(data)
+
+
+class LocalFileProvider(MarketDataProvider):
+    """Serves candles from CSV files on disk, for tests and air-gapped deployments
+
+    Files are looked up as <directory>/<symbol>_<interval>.csv with a
+    timestamp column followed by open, high, low, close and volume.
+    """
+
+    name = 'local'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, symbol: str, interval: str) -> pd.DataFrame:
+        key = (symbol, interval)
+        with self._lock:
+            if key not in self._frames:
+                path = os.path.join(self.directory, f"{symbol}_{interval}.csv")
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"No local market data for {symbol} ({interval}): {path}")
+                data = pd.read_csv(path, index_col=0, parse_dates=True)
+                self._frames[key] = _normalize_frame(data)
+            return self._frames[key]
+
+    def fetch(self, symbol, interval="1d", period=None, start=None, end=None):
+        data = self._load(symbol, interval)
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+            if end is not None:
+                data = data[data.index < pd.Timestamp(end)]
+        elif len(data) and period:
+            data = data[data.index >= data.index[-1] - period_to_timedelta(period)]
+        return data
+
+
+def get_provider(name: str, local_dir: Optional[str] = None) -> MarketDataProvider:
+    """Build the market data provider selected in the settings"""
+    if name == 'yfinance':
+        return YFinanceProvider()
+    if name == 'local':
+        return LocalFileProvider(local_dir or 'data/local_market')
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+class CandleStore:
+    """Persistent per-(symbol, interval) candle store backed by memory-mapped NumPy files
+
+    Each series lives in <root>/<symbol>/<interval>/candles.npy as one
+    record per candle: an int64 UTC-nanosecond timestamp and the float64
+    OHLCV values. Reads memory-map the file and hand out views, so serving a window
+    never touches the network or copies the history. sync() only asks the
+    provider for candles from the last stored timestamp onwards and
+    back-fills gaps it finds in the stored series.
+
+    retention caps the candles kept per interval; older candles are dropped
+    whenever a series is rewritten, so a minute series stays the same size
+    however long the process runs.
+    """
+
+    def __init__(self, root: str, provider: MarketDataProvider,
+                 refresh_seconds: float = 60.0, max_gap_repairs: int = 5,
+                 retention: Optional[Dict[str, int]] = None):
+        self.root = root
+        self.provider = provider
+        self.refresh_seconds = refresh_seconds
+        self.max_gap_repairs = max_gap_repairs
+        self.retention = retention or {}
+        self._last_sync: Dict[Tuple[str, str], float] = {}
+        # Gaps the provider returned nothing for (weekends, illiquid minutes); not asked for again
+        self._empty_gaps: Dict[Tuple[str, str], Set[Tuple[int, int]]] = {}
+        self._cache: Dict[Tuple[str, str], Tuple[tuple, np.ndarray]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _series_dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol.replace('/', '_'), interval)
+
+    def read(self, symbol: str, interval: str = "1d") -> Tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, ohlcv) as read-only memory-mapped arrays, without copying"""
+        key = (symbol, interval)
+        series_dir = self._series_dir(symbol, interval)
+        path = os.path.join(series_dir, 'candles.npy')
+        if not os.path.exists(path):
+            return np.empty(0, dtype=np.int64), np.empty((0, len(OHLCV_COLUMNS)))
+
+        # Re-map only when the file was replaced since the last read
+        stat = os.stat(path)
+        version = (stat.st_ino, stat.st_mtime_ns)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]['timestamp'], cached[1]['ohlcv']
+
+        candles = np.load(path, mmap_mode='r')
+        self._cache[key] = (version, candles)
+        return candles['timestamp'], candles['ohlcv']
+
+    def window(self, symbol: str, interval: str = "1d", rows: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return views over the last `rows` candles (all of them when rows is None)"""
+        timestamps, ohlcv = self.read(symbol, interval)
+        if rows is None:
+            return timestamps, ohlcv
+        return timestamps[-rows:], ohlcv[-rows:]
+
+    def _write(self, symbol: str, interval: str, timestamps: np.ndarray, ohlcv: np.ndarray):
+        """Atomically replace the stored series"""
+        series_dir = self._series_dir(symbol, interval)
+        os.makedirs(series_dir, exist_ok=True)
+
+        candles = np.empty(len(timestamps), dtype=CANDLE_DTYPE)
+        candles['timestamp'] = timestamps
+        candles['ohlcv'] = ohlcv
+
+        tmp_path = os.path.join(series_dir, f".candles.{os.getpid()}.{threading.get_ident()}.npy")
+        np.save(tmp_path, candles)
+        os.replace(tmp_path, os.path.join(series_dir, 'candles.npy'))
+
+    def _merge(self, symbol: str, interval: str, fresh: pd.DataFrame) -> int:
+        """Merge fetched candles into the stored series; newer values win on equal timestamps"""
+        if fresh is None or fresh.empty:
+            return 0
+
+        timestamps, ohlcv = self.read(symbol, interval)
+        fresh_ts = fresh.index.asi8
+        fresh_values = fresh[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+
+        # Nothing to do when every fetched candle is already stored unchanged
+        if len(timestamps):
+            positions = np.minimum(np.searchsorted(timestamps, fresh_ts), len(timestamps) - 1)
+            if np.array_equal(timestamps[positions], fresh_ts) and np.array_equal(ohlcv[positions], fresh_values):
+                return 0
+
+        all_ts = np.concatenate([np.asarray(timestamps), fresh_ts])
+        all_values = np.concatenate([np.asarray(ohlcv).reshape(-1, len(OHLCV_COLUMNS)), fresh_values])
+
+        # Keep the last occurrence of each timestamp, i.e. the freshly fetched one
+        order = np.argsort(all_ts, kind='stable')
+        all_ts, all_values = all_ts[order], all_values[order]
+        keep = np.append(all_ts[1:] != all_ts[:-1], True)
+        merged_ts, merged_values = all_ts[keep], all_values[keep]
+        added = len(merged_ts) - len(timestamps)
+
+        limit = self.retention.get(interval)
+        if limit and len(merged_ts) > limit:
+            merged_ts, merged_values = merged_ts[-limit:], merged_values[-limit:]
+
+        self._write(symbol, interval, merged_ts, merged_values)
+        return added
+
+    def _repair_gaps(self, symbol: str, interval: str) -> int:
+        """Re-fetch ranges where consecutive stored candles are further apart than one interval
+
+        A gap the provider has no candles for is remembered and skipped on
+        later syncs, so a series with real holes does not re-fetch them forever.
+        """
+        timestamps, _ = self.read(symbol, interval)
+        if len(timestamps) < 2:
+            return 0
+
+        step = interval_to_timedelta(interval).value
+        empty = self._empty_gaps.setdefault((symbol, interval), set())
+        # Forget gaps that have fallen out of the retained history
+        empty -= {gap for gap in empty if gap[1] <= timestamps[0]}
+
+        gaps = [
+            (int(timestamps[i]), int(timestamps[i + 1]))
+            for i in np.nonzero(np.diff(timestamps) > step * 1.5)[0]
+        ]
+        gaps = [gap for gap in gaps if gap not in empty]
+        repaired = 0
+        for gap in gaps[-self.max_gap_repairs:]:
+            start = pd.Timestamp(gap[0] + step, tz='UTC')
+            end = pd.Timestamp(gap[1], tz='UTC')
+            try:
+                fresh = self.provider.fetch(symbol, interval, start=start, end=end)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not repair gap {start} - {end} for {symbol}: {e}")
+                continue
+            if fresh is None or not ((fresh.index >= start) & (fresh.index < end)).any():
+                empty.add(gap)
+                continue
+            repaired += self._merge(symbol, interval, fresh)
+
+        if repaired:
+            logger.info(f"🩹 Repaired {repaired} missing candles for {symbol} ({interval})")
+        return repaired
+
+    def sync(self, symbol: str, interval: str = "1d", period: str = "60d", force: bool = False) -> int:
+        """Bring the stored series up to date, fetching only what is missing
+
+        Returns the number of new candles stored. Calls within
+        refresh_seconds of the previous sync are served from disk.
+        """
+        key = (symbol, interval)
+        with self._lock_for(key):
+            if not force and time.monotonic() - self._last_sync.get(key, float('-inf')) < self.refresh_seconds:
+                return 0
+
+            timestamps, _ = self.read(symbol, interval)
+            if len(timestamps) == 0:
+                fresh = self.provider.fetch(symbol, interval, period=period)
+            else:
+                # Start at the last stored candle so an in-progress candle gets revised
+                fresh = self.provider.fetch(symbol, interval, start=pd.Timestamp(int(timestamps[-1]), tz='UTC'))
+
+            added = self._merge(symbol, interval, fresh)
+            added += self._repair_gaps(symbol, interval)
+            self._last_sync[key] = time.monotonic()
+
+            logger.info(f"💾 Synced {symbol} ({interval}): {added} new candles")
+            return added
+
+    def backfill(self, symbol: str, interval: str = "1d", period: str = "1y") -> int:
+        """Fetch history older than the first stored candle so the series covers `period`"""
+        key = (symbol, interval)
+        with self._lock_for(key):
+            timestamps, _ = self.read(symbol, interval)
+            if len(timestamps) == 0:
+                return self._merge(symbol, interval, self.provider.fetch(symbol, interval, period=period))
+
+            first = pd.Timestamp(int(timestamps[0]), tz='UTC')
+            span = period_to_timedelta(period)
+            limit = self.retention.get(interval)
+            if limit:
+                # Anything older than the retention would be dropped again on write
+                span = min(span, interval_to_timedelta(interval) * limit)
+            start = pd.Timestamp(int(timestamps[-1]), tz='UTC') - span
+            if start >= first - interval_to_timedelta(interval):
+                return 0
+
+            added = self._merge(symbol, interval, self.provider.fetch(symbol, interval, start=start, end=first))
+            logger.info(f"💾 Back-filled {symbol} ({interval}): {added} older candles")
+            return added
+
+    def get_frame(self, symbol: str, interval: str = "1d", period: str = "60d",
+                  max_rows: Optional[int] = None) -> pd.DataFrame:
+        """Return the stored candles covering `period`, at most the last max_rows of them, as a DataFrame"""
+        timestamps, ohlcv = self.read(symbol, interval)
+        if len(timestamps) == 0:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz='UTC'))
+
+        cutoff = timestamps[-1] - period_to_timedelta(period).value
+        start = int(np.searchsorted(timestamps, cutoff, side='left'))
+        if max_rows is not None:
+            start = max(start, len(timestamps) - max_rows)
+        index = pd.to_datetime(np.asarray(timestamps[start:]), utc=True)
+        return pd.DataFrame(np.asarray(ohlcv[start:]), index=index, columns=OHLCV_COLUMNS)
@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .anomaly_detector import CryptoAnomalyDetector
+from .artifacts import ArtifactError, METADATA_FILE, MODEL_FILE, SCALER_FILE, WEIGHTS_DIR, resolve_active, verify_version
+from .features import FeatureEngineRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSet:
+    """The detectors of one artifacts version, swapped in and out as a unit
+
+    A request takes the service's current ModelSet once and uses it to the
+    end, so a hot swap never mixes two versions inside one analysis and
+    in-flight requests finish on the set they started with. Streaming
+    feature engines belong to the set because their window length is the
+    model's sequence_length.
+    """
+
+    def __init__(self, version: str, model: CryptoAnomalyDetector, models: Dict[str, CryptoAnomalyDetector],
+                 directory: str, manifest: Optional[Dict] = None):
+        self.version = version
+        self.model = model
+        self.models = models
+        self.directory = directory
+        self.manifest = manifest
+        self.loaded_at = time.time()
+        self._engines: Dict[str, FeatureEngineRegistry] = {}
+        self._lock = threading.Lock()
+
+    def detector_for(self, interval: str) -> CryptoAnomalyDetector:
+        """The model trained on this interval, else the default model"""
+        return self.models.get(interval, self.model)
+
+    def engines_for(self, interval: str) -> FeatureEngineRegistry:
+        with self._lock:
+            registry = self._engines.get(interval)
+            if registry is None:
+                registry = FeatureEngineRegistry(self.detector_for(interval).sequence_length)
+                self._engines[interval] = registry
+            return registry
+
+    def warm_up(self):
+        """Run one dummy predict through every distinct model"""
+        for detector in {id(d): d for d in self.models.values()}.values():
+            input_shape = detector.metadata.get('input_shape', (detector.sequence_length, len(detector.feature_names)))
+            detector.model.predict(np.zeros((1, *input_shape), dtype=np.float32), verbose=0)
+
+    def stats(self) -> Dict:
+        return {
+            'version': self.version,
+            'directory': self.directory,
+            'verified': self.manifest is not None,
+            'loaded_at': self.loaded_at,
+            'intervals': sorted(self.models),
+            'mmap_weights': os.path.isdir(os.path.join(self.directory, WEIGHTS_DIR))
+        }
+
+
+def load_detector(directory: str, backend: str) -> Optional[CryptoAnomalyDetector]:
+    """Load the model, scaler and metadata in one artifacts directory"""
+    # Define exact file paths
+    model_path = os.path.join(directory, MODEL_FILE)
+    scaler_path = os.path.join(directory, SCALER_FILE)
+    metadata_path = os.path.join(directory, METADATA_FILE)
+    weights_dir = os.path.join(directory, WEIGHTS_DIR)
+
+    logger.info(f"🔄 Loading AI model from: {model_path}")
+    logger.info(f"🔄 Loading scaler from: {scaler_path}")
+    logger.info(f"🔄 Loading metadata from: {metadata_path}")
+
+    # Check if files exist
+    for path in (model_path, scaler_path, metadata_path):
+        if not os.path.exists(path):
+            logger.error(f"❌ Model artifact not found: {path}")
+            return None
+
+    detector = CryptoAnomalyDetector(
+        model_path, scaler_path, metadata_path, backend=backend,
+        weights_dir=weights_dir if os.path.isdir(weights_dir) else None
+    )
+    if detector.model is None or detector.scaler is None:
+        return None
+    return detector
+
+
+def load_model_set(root: str, backend: str, intervals) -> ModelSet:
+    """Load the active version under root, verifying its manifest checksums first
+
+    A flat root without a CURRENT file is loaded as-is, versioned by the
+    training date in its metadata. Per-interval models live in
+    <version dir>/<interval>/.
+    """
+    version, directory = resolve_active(root)
+    manifest = verify_version(directory) if version else None
+
+    model = load_detector(directory, backend)
+    if model is None:
+        raise ArtifactError(f"No loadable model in {directory}")
+
+    models = {model.metadata.get('interval', '1d'): model}
+    for interval in intervals:
+        interval_dir = os.path.join(directory, interval)
+        if os.path.isdir(interval_dir):
+            detector = load_detector(interval_dir, backend)
+            if detector is not None:
+                models[interval] = detector
+                logger.info(f"✅ Loaded {interval} model: sequence_length={detector.sequence_length}")
+
+    return ModelSet(version or str(model.metadata.get('training_date', 'unknown')), model, models, directory, manifest)
@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, dtype=np.float32),
+    'tanh': np.tanh,
+    # Same as 1 / (1 + exp(-x)) without overflow warnings for large inputs
+    'sigmoid': lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),
+}
+
+
+def _activation(name: str):
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return _ACTIVATIONS[name]
+
+
+class _Dense:
+    def __init__(self, config: Dict, weights: List[np.ndarray]):
+        self.kernel = weights[0]
+        self.bias = weights[1] if config.get('use_bias', True) else None
+        self.activation = _activation(config.get('activation', 'linear'))
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        # matmul broadcasts over any leading (batch, time) axes
+        y = x @ self.kernel
+        if self.bias is not None:
+            y += self.bias
+        return self.activation(y)
+
+
+class _LSTM:
+    """Keras LSTM forward pass; gates are packed as (input, forget, cell, output)"""
+
+    def __init__(self, config: Dict, weights: List[np.ndarray]):
+        if config.get('go_backwards') or config.get('stateful'):
+            raise ValueError(f"Unsupported LSTM options in {config.get('name')}")
+
+        self.units = config['units']
+        self.kernel, self.recurrent_kernel = weights[0], weights[1]
+        self.bias = weights[2] if config.get('use_bias', True) else np.zeros(4 * self.units, dtype=np.float32)
+        self.activation = _activation(config.get('activation', 'tanh'))
+        self.recurrent_activation = _activation(config.get('recurrent_activation', 'sigmoid'))
+        self.return_sequences = config.get('return_sequences', False)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        batch, steps, _ = x.shape
+        units = self.units
+
+        # Input projections for every timestep in one matmul
+        projected = x @ self.kernel + self.bias
+
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32) if self.return_sequences else None
+
+        for t in range(steps):
+            z = projected[:, t, :] + h @ self.recurrent_kernel
+            i = self.recurrent_activation(z[:, :units])
+            f = self.recurrent_activation(z[:, units:2 * units])
+            g = self.activation(z[:, 2 * units:3 * units])
+            o = self.recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * self.activation(c)
+            if outputs is not None:
+                outputs[:, t, :] = h
+
+        return outputs if outputs is not None else h
+
+
+class _RepeatVector:
+    def __init__(self, config: Dict, weights: List[np.ndarray]):
+        self.n = config['n']
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return np.repeat(x[:, np.newaxis, :], self.n, axis=1)
+
+
+class _Identity:
+    """Layers that are no-ops at inference time (Dropout and friends)"""
+
+    def __init__(self, config: Dict, weights: List[np.ndarray]):
+        pass
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return x
+
+
+_LAYERS = {
+    'Dense': _Dense,
+    'LSTM': _LSTM,
+    'RepeatVector': _RepeatVector,
+    'Dropout': _Identity,
+    'GaussianNoise': _Identity,
+}
+
+
+class NumpyLSTMAutoencoder:
+    """TensorFlow-free inference for the Keras LSTM autoencoder saved as .h5
+
+    Reads the layer graph and weights from the file once and runs the
+    forward pass in vectorized float32 NumPy. Only sequential graphs of
+    LSTM, Dense, RepeatVector and TimeDistributed(Dense) layers are
+    supported, which covers the trained autoencoder. predict() mirrors
+    the Keras signature so CryptoAnomalyDetector can use either backend.
+
+    With weights_dir (written by export_weights) the weights are
+    memory-mapped .npy files instead of copies read from the .h5, so every
+    process serving the same artifacts shares one physical copy through
+    the page cache.
+    """
+
+    def __init__(self, model_path: str, weights_dir: Optional[str] = None):
+        import h5py
+
+        self.layers = []
+        with h5py.File(model_path, 'r') as f:
+            model_config = json.loads(f.attrs['model_config'])
+            weights_group = f['model_weights']
+
+            for layer in model_config['config']['layers']:
+                class_name = layer['class_name']
+                config = layer['config']
+                if class_name == 'InputLayer':
+                    continue
+                if len(layer.get('inbound_nodes', [])) != 1:
+                    raise ValueError(f"Only sequential models are supported, {config['name']} has several inputs")
+
+                if class_name == 'TimeDistributed':
+                    inner = config['layer']
+                    class_name, config = inner['class_name'], inner['config']
+
+                if class_name not in _LAYERS:
+                    raise ValueError(f"Unsupported layer type: {class_name}")
+
+                name = layer['config']['name']
+                weights = _mapped_weights(weights_dir, name) if weights_dir else self._layer_weights(weights_group, name)
+                self.layers.append(_LAYERS[class_name](config, weights))
+
+        source = f"memory-mapped from {weights_dir}" if weights_dir else f"from {model_path}"
+        logger.info(f"✅ NumPy backend loaded {len(self.layers)} layers {source}")
+
+    @staticmethod
+    def _layer_weights(weights_group, layer_name: str) -> List[np.ndarray]:
+        if layer_name not in weights_group:
+            return []
+        group = weights_group[layer_name]
+        names = [n.decode() if isinstance(n, bytes) else n for n in group.attrs.get('weight_names', [])]
+        return [np.asarray(group[name], dtype=np.float32) for name in names]
+
+    def predict(self, x, verbose=0, batch_size=None) -> np.ndarray:
+        """Run the forward pass on a (batch, timesteps, features) array"""
+        x = np.asarray(x, dtype=np.float32)
+        if batch_size is None or len(x) <= batch_size:
+            return self._forward(x)
+        return np.concatenate([self._forward(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
+
+    def _forward(self, x: np.ndarray) -> np.ndarray:
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+
+def _mapped_weights(weights_dir: str, layer_name: str) -> List[np.ndarray]:
+    """A layer's weights from <weights_dir>/<layer>.<i>.npy, memory-mapped read-only"""
+    weights = []
+    while True:
+        path = os.path.join(weights_dir, f"{layer_name}.{len(weights)}.npy")
+        if not os.path.exists(path):
+            return weights
+        # asarray drops the memmap subclass but keeps the mapped buffer
+        weights.append(np.asarray(np.load(path, mmap_mode='r')))
+
+
+def export_weights(model_path: str, weights_dir: str) -> List[str]:
+    """Write every layer's weights as float32 .npy files for memory-mapped loading"""
+    import h5py
+
+    os.makedirs(weights_dir, exist_ok=True)
+    written = []
+    with h5py.File(model_path, 'r') as f:
+        weights_group = f['model_weights']
+        for layer_name in weights_group:
+            for i, weight in enumerate(NumpyLSTMAutoencoder._layer_weights(weights_group, layer_name)):
+                filename = f"{layer_name}.{i}.npy"
+                np.save(os.path.join(weights_dir, filename), np.ascontiguousarray(weight, dtype=np.float32))
+                written.append(filename)
+    return written
+
+
+def load_inference_model(model_path: str, backend: str = "keras", weights_dir: Optional[str] = None):
+    """Load the autoencoder with the configured backend ("keras", "numpy" or "remote")
+
+    weights_dir is only used by the numpy backend. "remote" loads nothing
+    and forwards predict() to the inference server.
+    """
+    if backend == 'numpy':
+        return NumpyLSTMAutoencoder(model_path, weights_dir)
+    if backend == 'remote':
+        from .inference_server import RemoteModel
+
+        return RemoteModel(model_path)
+    if backend == 'keras':
+        from tensorflow.keras.models import load_model
+
+        # Load model with custom objects to avoid compatibility issues
+        custom_objects = {}
+        return load_model(model_path, compile=False, custom_objects=custom_objects)
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def verify_against_keras(model_path: str, samples: int = 256, atol: float = 1e-4, seed: int = 0) -> float:
+    """Compare the NumPy backend with Keras model.predict on random inputs
+
+    Returns the largest absolute difference and raises AssertionError when
+    it exceeds atol. Needs TensorFlow installed.
+    """
+    keras_model = load_inference_model(model_path, 'keras')
+    numpy_model = NumpyLSTMAutoencoder(model_path)
+
+    _, timesteps, features = keras_model.input_shape
+    x = np.random.default_rng(seed).standard_normal((samples, timesteps, features)).astype(np.float32)
+
+    max_diff = float(np.max(np.abs(keras_model.predict(x, verbose=0) - numpy_model.predict(x))))
+    if max_diff > atol:
+        raise AssertionError(f"NumPy backend differs from Keras by {max_diff} (atol={atol})")
+    return max_diff
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the NumPy inference backend against Keras")
+    parser.add_argument("model_path")
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    print(f"max abs difference: {verify_against_keras(args.model_path, args.samples, args.atol):.3e}")
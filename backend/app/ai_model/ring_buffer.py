@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .market_data import OHLCV_COLUMNS
+
+
+class CandleRingBuffer:
+    """Fixed-capacity OHLCV history in preallocated NumPy arrays
+
+    Appending a candle writes one row in place (O(1)); once full, the
+    oldest candle is overwritten. A candle with the same timestamp as the
+    newest one replaces it, so an in-progress candle can be revised.
+    last(n) returns views when the rows are contiguous and one copy when
+    they wrap around the end of the arrays.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.ohlcv = np.zeros((capacity, len(OHLCV_COLUMNS)), dtype=dtype)
+        self._next = 0
+        self.size = 0
+
+        # Re-entrant so callers can hold it across a read-and-append
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.ohlcv.nbytes
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Newest timestamp in UTC nanoseconds, None when empty"""
+        if self.size == 0:
+            return None
+        return int(self.timestamps[self._next - 1])
+
+    def append(self, timestamp: int, values) -> bool:
+        """Store one candle; returns False for a candle older than the newest one"""
+        last = self.last_timestamp
+        if last is not None and timestamp <= last:
+            if timestamp < last:
+                return False
+            # Revision of the newest candle
+            self.ohlcv[self._next - 1] = values
+            return True
+
+        self.timestamps[self._next] = timestamp
+        self.ohlcv[self._next] = values
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def extend(self, timestamps: np.ndarray, ohlcv: np.ndarray) -> int:
+        """Append candles in order; returns how many were stored or revised"""
+        stored = 0
+        for timestamp, values in zip(timestamps.tolist(), ohlcv):
+            stored += self.append(timestamp, values)
+        return stored
+
+    def last(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, ohlcv) for the newest n candles, oldest first"""
+        n = self.size if n is None else min(n, self.size)
+        start = self._next - n
+        if start >= 0:
+            return self.timestamps[start:self._next], self.ohlcv[start:self._next]
+        # Wrapped: stitch the tail and the head together
+        return (
+            np.concatenate((self.timestamps[start:], self.timestamps[:self._next])),
+            np.concatenate((self.ohlcv[start:], self.ohlcv[:self._next]))
+        )
+
+    def clear(self):
+        self._next = 0
+        self.size = 0
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy the buffer into an OHLCV DataFrame, for code paths that still need pandas"""
+        timestamps, ohlcv = self.last()
+        return pd.DataFrame(
+            np.asarray(ohlcv, dtype=np.float64),
+            index=pd.to_datetime(timestamps, utc=True),
+            columns=OHLCV_COLUMNS
+        )
+
+
+class CandleBufferRegistry:
+    """Holds one CandleRingBuffer per (symbol, interval), least recently used evicted first
+
+    Every buffer costs capacity * (8 + 5 * itemsize) bytes, so memory is
+    bounded by max_series times the largest capacity in use.
+    """
+
+    def __init__(self, max_series: int = 10000, dtype=np.float64):
+        self.max_series = max_series
+        self.dtype = np.dtype(dtype)
+        self._buffers: "OrderedDict[Hashable, CandleRingBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.evictions = 0
+
+    def get(self, key: Hashable, capacity: int) -> CandleRingBuffer:
+        """Return the key's buffer, replacing it when it was built for another capacity"""
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None or buffer.capacity != capacity:
+                buffer = CandleRingBuffer(capacity, self.dtype)
+                self._buffers[key] = buffer
+                while len(self._buffers) > self.max_series:
+                    self._buffers.popitem(last=False)
+                    self.evictions += 1
+            self._buffers.move_to_end(key)
+            return buffer
+
+    def reset(self, key: Hashable):
+        with self._lock:
+            self._buffers.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    @staticmethod
+    def bytes_for(capacity: int, dtype=np.float64) -> int:
+        """Footprint of one buffer's arrays"""
+        return capacity * (np.dtype(np.int64).itemsize + len(OHLCV_COLUMNS) * np.dtype(dtype).itemsize)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            buffers = list(self._buffers.values())
+        largest = max((b.capacity for b in buffers), default=0)
+        return {
+            'series': len(buffers),
+            'max_series': self.max_series,
+            'dtype': self.dtype.name,
+            'bytes': sum(b.nbytes for b in buffers),
+            'budget_bytes': self.max_series * self.bytes_for(largest, self.dtype),
+            'evictions': self.evictions
+        }
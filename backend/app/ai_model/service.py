@@ -1,101 +1,223 @@
 import os
+import threading
+import time
 import pandas as pd
-import yfinance as yf
 import numpy as np
 import logging
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
 from .anomaly_detector import CryptoAnomalyDetector
+from .backtest import DEFAULT_BATCH_SIZE
+from .fallback import FallbackModelCache
+from .inference_server import server_stats
+from .artifacts import active_version, list_versions
+from .features import LONGEST_LOOKBACK, FeatureEngineRegistry
+from .market_data import CandleStore, closed_candles, default_period, get_provider, interval_to_timedelta, period_to_timedelta
+from .cache import build_result_cache
+from .model_set import ModelSet, load_model_set
+from .ring_buffer import CandleBufferRegistry, CandleRingBuffer
+from .thresholds import build_adaptive_thresholds
+from app.core.config import settings
+from app.core.metrics import ANALYSIS_REQUESTS, ANALYSIS_RESULTS, stage
+from app.core.startup import startup_report
 
 logger = logging.getLogger(__name__)
 
+# Window the demo fallback scores when no model sets a sequence_length
+DEMO_SEQUENCE_LENGTH = 30
+
 class AIService:
     def __init__(self):
-        self.model = None
-        self.is_loaded = False
-        self.load_trained_model()
+        # Swapped as a whole on reload; None in demo mode
+        self.active: Optional[ModelSet] = None
+        self.artifacts_root = settings.MODEL_ARTIFACTS_DIR or os.path.join(os.path.dirname(__file__), "model_artifacts")
+        self.is_warm = False
+        self._load_attempted = False
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._served_version: Optional[str] = None
+        self._next_reload_check = 0.0
+        self.last_reload_error: Optional[str] = None
+        self._fetch_executor = None
+        self.candle_store = CandleStore(
+            settings.MARKET_DATA_DIR,
+            get_provider(settings.MARKET_DATA_PROVIDER, settings.LOCAL_MARKET_DATA_DIR),
+            refresh_seconds=settings.MARKET_DATA_REFRESH_SECONDS,
+            retention=settings.CANDLE_RETENTION
+        )
+        self.result_cache = build_result_cache(
+            settings.RESULT_CACHE_BACKEND,
+            settings.REDIS_URL,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+            stale_seconds=settings.RESULT_CACHE_STALE_SECONDS,
+            max_entries=settings.RESULT_CACHE_MAX_ENTRIES
+        )
+        self.fallback_models = FallbackModelCache(
+            refit_candles=settings.FALLBACK_REFIT_CANDLES,
+            refit_seconds=settings.FALLBACK_REFIT_SECONDS
+        )
+        self.candle_buffers = CandleBufferRegistry(
+            max_series=settings.CANDLE_BUFFER_MAX_SERIES,
+            dtype=settings.CANDLE_BUFFER_DTYPE
+        )
+        # None when ADAPTIVE_THRESHOLDS is off: every symbol uses the model's global threshold
+        self.thresholds = build_adaptive_thresholds(
+            settings.ADAPTIVE_THRESHOLD_BACKEND,
+            settings.ADAPTIVE_THRESHOLD_FILE,
+            settings.REDIS_URL,
+            quantile=settings.ADAPTIVE_THRESHOLD_QUANTILE,
+            window=settings.ADAPTIVE_THRESHOLD_WINDOW,
+            min_samples=settings.ADAPTIVE_THRESHOLD_MIN_SAMPLES,
+            min_factor=settings.ADAPTIVE_THRESHOLD_MIN_FACTOR,
+            max_factor=settings.ADAPTIVE_THRESHOLD_MAX_FACTOR,
+            refresh_seconds=settings.ADAPTIVE_THRESHOLD_REFRESH_SECONDS
+        ) if settings.ADAPTIVE_THRESHOLDS else None
+
+    def ensure_loaded(self) -> bool:
+        """Load the model on first use; safe to call from many threads"""
+        if not self._load_attempted:
+            with self._load_lock:
+                if not self._load_attempted:
+                    with startup_report.phase('model_load'):
+                        self.load_trained_model()
+                    self._load_attempted = True
+        return self.is_loaded
+
+    def warm_up(self) -> bool:
+        """Load the model and run one dummy predict so the first request is not slow"""
+        if not self.ensure_loaded():
+            logger.warning("🔄 AI model not loaded, nothing to warm up")
+            return False
 
-    def load_trained_model(self):
-        """Load the trained LSTM Autoencoder model with exact paths"""
         try:
-            # Use absolute paths to your model files
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            model_artifacts_dir = os.path.join(base_dir, "app", "ai_model", "model_artifacts")
-
-            # Define exact file paths
-            model_path = os.path.join(model_artifacts_dir, "lstm_autoencoder.h5")
-            scaler_path = os.path.join(model_artifacts_dir, "scaler.pkl")
-            metadata_path = os.path.join(model_artifacts_dir, "model_metadata.pkl")
-
-            logger.info(f"🔄 Loading AI model from: {model_path}")
-            logger.info(f"🔄 Loading scaler from: {scaler_path}")
-            logger.info(f"🔄 Loading metadata from: {metadata_path}")
-
-            # Check if files exist
-            if not os.path.exists(model_path):
-                logger.error(f"❌ Model file not found: {model_path}")
-                return
-            if not os.path.exists(scaler_path):
-                logger.error(f"❌ Scaler file not found: {scaler_path}")
-                return
-            if not os.path.exists(metadata_path):
-                logger.error(f"❌ Metadata file not found: {metadata_path}")
-                return
+            with startup_report.phase('model_warm_up'):
+                self.active.warm_up()
+            self.is_warm = True
+            logger.info("🔥 AI model warmed up")
+        except Exception as e:
+            logger.error(f"❌ Model warm-up failed: {e}")
+        return self.is_warm
 
-            # Load the model
-            self.model = CryptoAnomalyDetector(model_path, scaler_path, metadata_path)
-            self.is_loaded = self.model.model is not None and self.model.scaler is not None
+    @property
+    def is_loaded(self) -> bool:
+        return self.active is not None
 
-            if self.is_loaded:
-                logger.info("✅ AI Model loaded successfully!")
-                logger.info(f"✅ Sequence length: {self.model.sequence_length}")
-                logger.info(f"✅ Threshold: {self.model.threshold}")
-                logger.info(f"✅ Features: {self.model.feature_names}")
-            else:
-                logger.error("❌ Failed to load AI model components")
+    @property
+    def model(self) -> Optional[CryptoAnomalyDetector]:
+        """Default detector of the active model set"""
+        return self.active.model if self.active else None
+
+    @property
+    def models(self) -> Dict[str, CryptoAnomalyDetector]:
+        return self.active.models if self.active else {}
+
+    def load_trained_model(self):
+        """Load the active model version (see artifacts.py), plus any per-interval models
+
+        The version named in model_artifacts/CURRENT is checked against its
+        manifest before use; without CURRENT the flat model_artifacts/
+        layout is loaded. A model in <version dir>/<interval>/ serves that
+        interval, every other interval uses the default model.
+        """
+        try:
+            self._served_version = active_version(self.artifacts_root)
+            self.active = load_model_set(self.artifacts_root, settings.AI_INFERENCE_BACKEND, settings.ANALYSIS_INTERVALS)
+            logger.info("✅ AI Model loaded successfully!")
+            logger.info(f"✅ Version: {self.active.version}")
+            logger.info(f"✅ Sequence length: {self.model.sequence_length}")
+            logger.info(f"✅ Threshold: {self.model.threshold}")
+            logger.info(f"✅ Features: {self.model.feature_names}")
+            logger.info(f"✅ Models by interval: {sorted(self.models)}")
 
         except Exception as e:
             logger.error(f"❌ Error loading AI model: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            self.is_loaded = False
+            self.last_reload_error = str(e)
 
-    def fetch_market_data(self, symbol: str = "BTC-USD", period: str = "60d") -> pd.DataFrame:
-        """Fetch real market data for analysis"""
+    def reload_model(self) -> bool:
+        """Load the active version and swap it in once it is warm; requests already running keep the old set"""
+        version = active_version(self.artifacts_root)
         try:
-            logger.info(f"📊 Fetching market data for {symbol}...")
+            candidate = load_model_set(self.artifacts_root, settings.AI_INFERENCE_BACKEND, settings.ANALYSIS_INTERVALS)
+            candidate.warm_up()
+        except Exception as e:
+            logger.error(f"❌ Could not load model version {version}, still serving {self.active.version if self.active else 'demo'}: {e}")
+            self.last_reload_error = str(e)
+            self._served_version = version
+            return False
+
+        previous, self.active = self.active, candidate
+        self._served_version = version
+        self.last_reload_error = None
+        self.is_warm = True
+        logger.info(f"🔁 Swapped model {previous.version if previous else 'demo'} -> {candidate.version}")
+        return True
+
+    def check_for_new_model(self):
+        """Reload in the background when CURRENT names another version; checked at most every MODEL_RELOAD_CHECK_SECONDS"""
+        if settings.MODEL_RELOAD_CHECK_SECONDS <= 0 or not self._load_attempted:
+            return
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + settings.MODEL_RELOAD_CHECK_SECONDS
 
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period=period, interval="1d")
+        try:
+            if active_version(self.artifacts_root) == self._served_version:
+                return
+        except OSError as e:
+            logger.warning(f"⚠️ Could not read the active model version: {e}")
+            return
+
+        if self._reload_lock.acquire(blocking=False):
+            def reload():
+                try:
+                    self.reload_model()
+                finally:
+                    self._reload_lock.release()
+
+            threading.Thread(target=reload, name="model-reload", daemon=True).start()
+
+    def detector_for(self, interval: str) -> Optional[CryptoAnomalyDetector]:
+        """The active model for this interval; None in demo mode"""
+        active = self.active
+        return active.detector_for(interval) if active else None
+
+    def fetch_market_data(self, symbol: str = "BTC-USD", period: Optional[str] = None, interval: str = "1d") -> pd.DataFrame:
+        """Fetch market data for analysis from the local candle store
+
+        The store only downloads candles newer than the last stored one, so
+        repeated analyses of the same symbol stay off the network. At most
+        ANALYSIS_MAX_CANDLES of the newest candles are returned.
+        """
+        try:
+            period = period or default_period(interval)
+            logger.info(f"📊 Fetching {interval} market data for {symbol}...")
+
+            try:
+                with stage('fetch'):
+                    self.candle_store.sync(symbol, interval, period)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not refresh {symbol} from {self.candle_store.provider.name}: {e}")
+
+            with stage('read_candles'):
+                data = self.candle_store.get_frame(symbol, interval, period, max_rows=settings.ANALYSIS_MAX_CANDLES)
 
             if data.empty:
-                logger.warning("No data from yfinance, using fallback data")
-                return self._generate_fallback_data()
-
-            # Ensure we have all required columns
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            if not all(col in data.columns for col in required_columns):
-                logger.error("Missing required columns in market data")
-                return self._generate_fallback_data()
-
-            # Rename columns to match our model's expected format
-            data = data.rename(columns={
-                'Open': 'open',
-                'High': 'high',
-                'Low': 'low',
-                'Close': 'close',
-                'Volume': 'volume'
-            })
+                logger.warning("No stored market data, using fallback data")
+                return self._generate_fallback_data(interval)
 
             logger.info(f"✅ Successfully fetched {len(data)} records for {symbol}")
             return data
 
         except Exception as e:
             logger.error(f"❌ Error fetching market data: {e}")
-            return self._generate_fallback_data()
+            return self._generate_fallback_data(interval)
 
-    def _generate_fallback_data(self) -> pd.DataFrame:
+    def _generate_fallback_data(self, interval: str = "1d") -> pd.DataFrame:
         """Generate fallback data when real data is unavailable"""
-        dates = pd.date_range(start='2024-01-01', periods=60, freq='D')
+        dates = pd.date_range(start='2024-01-01', periods=60, freq=interval_to_timedelta(interval))
         return pd.DataFrame({
             'open': 40000 + np.random.randn(60) * 1000,
             'high': 41000 + np.random.randn(60) * 1000,
@@ -104,38 +226,104 @@ class AIService:
             'volume': np.random.exponential(10000000000, 60)
         }, index=dates)
 
-    def check_market_anomaly(self, symbol: str = "BTC-USD") -> Dict:
+    def live_market_data(self, symbol: str, interval: str = "1d", models: Optional[ModelSet] = None):
+        """Bring the symbol's ring buffer up to date and return it (fallback DataFrame when nothing is stored)
+
+        Only stored candles from the buffer's newest one onwards are read
+        into the buffer, and the streaming feature engine of `models` only
+        sees candles it has not folded in yet, so no DataFrame is built on
+        the live path. The in-progress candle is left out: it keeps changing
+        until it closes, so a score (and a cached result keyed by its
+        timestamp) would be stale as soon as it was computed.
+        """
+        try:
+            with stage('fetch'):
+                self.candle_store.sync(symbol, interval, default_period(interval))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not refresh {symbol} from {self.candle_store.provider.name}: {e}")
+
+        detector = models.detector_for(interval) if models else None
+        capacity = (detector.sequence_length if detector else DEMO_SEQUENCE_LENGTH) + LONGEST_LOOKBACK
+        buffer = self.candle_buffers.get((symbol, interval), capacity)
+
+        with buffer.lock:
+            with stage('read_candles'):
+                timestamps, ohlcv = self.candle_store.window(symbol, interval, capacity + 1)
+                closed = closed_candles(timestamps, interval)
+                timestamps, ohlcv = timestamps[:closed][-capacity:], ohlcv[:closed][-capacity:]
+            if len(timestamps) == 0:
+                logger.warning("No stored market data, using fallback data")
+                return self._generate_fallback_data(interval)
+
+            last = buffer.last_timestamp
+            start = int(np.searchsorted(timestamps, last)) if last is not None else 0
+            if last is None or start == len(timestamps) or timestamps[start] != last:
+                # First read, or the stored history moved under us: start over
+                buffer.clear()
+                start = 0
+            buffer.extend(timestamps[start:], np.asarray(ohlcv[start:]))
+
+            if models is not None:
+                with stage('streaming_features'):
+                    self._sync_engine(models.engines_for(interval), symbol, buffer)
+        return buffer
+
+    @staticmethod
+    def _sync_engine(engines: FeatureEngineRegistry, symbol: str, buffer: CandleRingBuffer):
+        """Fold the buffered candles the symbol's engine has not seen yet into it"""
+        engine = engines.get(symbol)
+        timestamps, ohlcv = buffer.last()
+        last = engine.last_timestamp
+        start = int(np.searchsorted(timestamps, last)) if last is not None else 0
+        if last is not None and (start == len(timestamps) or timestamps[start] != last):
+            # Engine state no longer lines up with the buffer (new model set, gap, eviction)
+            engines.reset(symbol)
+            engine = engines.get(symbol)
+            start = 0
+        for timestamp, values in zip(timestamps[start:].tolist(), np.asarray(ohlcv[start:]).tolist()):
+            engine.update(timestamp, *values)
+
+    @staticmethod
+    def _last_candle(market_data) -> Optional[str]:
+        if len(market_data) == 0:
+            return None
+        if isinstance(market_data, CandleRingBuffer):
+            return pd.Timestamp(market_data.last_timestamp, tz='UTC').isoformat()
+        return market_data.index[-1].isoformat()
+
+    @staticmethod
+    def _as_frame(market_data) -> pd.DataFrame:
+        return market_data.to_frame() if isinstance(market_data, CandleRingBuffer) else market_data
+
+    @property
+    def model_version(self) -> str:
+        """Version of the active model set, used to keep cached results apart"""
+        self.ensure_loaded()
+        active = self.active
+        return active.version if active else 'demo'
+
+    def _current_models(self) -> Optional[ModelSet]:
+        """The model set a request should use from start to finish"""
+        self.ensure_loaded()
+        self.check_for_new_model()
+        return self.active
+
+    def check_market_anomaly(self, symbol: str = "BTC-USD", interval: str = "1d") -> Dict:
         """Detect market anomalies using the trained LSTM Autoencoder"""
         try:
-            logger.info(f"🔍 Starting AI anomaly detection for {symbol}...")
-
-            # Fetch market data
-            market_data = self.fetch_market_data(symbol)
-
-            if self.is_loaded and self.model:
-                # Use the real AI model
-                logger.info("🤖 Using trained LSTM Autoencoder for analysis...")
-                result = self.model.detect_anomaly(market_data)
-
-                if 'error' not in result:
-                    result['model_type'] = 'LSTM Autoencoder'
-                    result['symbol'] = symbol
-                    result['data_points'] = len(market_data)
-                    result['model_status'] = 'real_model'
-                    logger.info(f"✅ Real AI analysis completed: Anomaly={result['is_anomaly']}, Score={result['anomaly_score']:.3f}")
-                else:
-                    logger.warning(f"⚠️ Real model failed: {result['error']}. Falling back to demo.")
-                    result = self._demo_analysis(market_data, symbol)
-                    result['model_status'] = 'real_model_failed'
-            else:
-                # Fallback to demo analysis
-                logger.warning("🔄 AI model not loaded, using demo analysis...")
-                result = self._demo_analysis(market_data, symbol)
-                result['model_status'] = 'demo_model'
-
+            if interval not in settings.ANALYSIS_INTERVALS:
+                raise ValueError(f"Unsupported interval {interval}, expected one of {settings.ANALYSIS_INTERVALS}")
+
+            models = self._current_models()
+            result = self.result_cache.get_or_compute(
+                symbol, interval, models.version if models else 'demo',
+                lambda previous: self._analyze(symbol, interval, models, previous)
+            )
+            ANALYSIS_REQUESTS.labels(result.get('cache_status', 'none')).inc()
             return result
 
         except Exception as e:
+            ANALYSIS_REQUESTS.labels('error').inc()
             logger.error(f"❌ Error in AI analysis: {e}")
             return {
                 'error': str(e),
@@ -146,10 +334,229 @@ class AIService:
                 'message': 'AI analysis failed'
             }
 
-    def _demo_analysis(self, market_data: pd.DataFrame, symbol: str) -> Dict:
+    def _analyze(self, symbol: str, interval: str, models: Optional[ModelSet],
+                 previous: Optional[Dict]) -> Tuple[Optional[str], Dict]:
+        """Run one uncached analysis; returns (last candle timestamp, result)"""
+        logger.info(f"🔍 Starting AI anomaly detection for {symbol} ({interval})...")
+
+        # Fetch market data
+        market_data = self.live_market_data(symbol, interval, models)
+        candle = self._last_candle(market_data)
+
+        # Same last candle as the cached result: features and model output cannot have changed
+        if previous is not None and candle is not None and previous.get('candle') == candle:
+            logger.info(f"♻️ No new candle for {symbol} since {candle}, reusing previous result")
+            return candle, previous['result']
+
+        detection = None
+        if models is not None:
+            # Use the real AI model
+            logger.info("🤖 Using trained LSTM Autoencoder for analysis...")
+            threshold, source = self._threshold_for(symbol, interval, models)
+            with stage('detect'):
+                detection = models.detector_for(interval).detect_anomaly(
+                    self._feature_input(symbol, interval, market_data, models), threshold=threshold
+                )
+            self._label_threshold(interval, models, detection, source)
+
+        return candle, self._finalize_result(symbol, interval, market_data, detection, models)
+
+    def _threshold_for(self, symbol: str, interval: str, models: ModelSet) -> Tuple[Optional[float], str]:
+        """The symbol's adaptive threshold and its source; (None, 'global') keeps the model's own"""
+        if self.thresholds is None:
+            return None, 'global'
+        detector = models.detector_for(interval)
+        return self.thresholds.threshold_for(f"{symbol}:{interval}", models.version, detector.threshold)
+
+    def _label_threshold(self, interval: str, models: ModelSet, detection: Dict, source: str):
+        """Label the threshold a detection was scored against"""
+        if 'error' in detection:
+            return
+        detection['threshold_source'] = source
+        detection['global_threshold'] = float(models.detector_for(interval).threshold)
+
+    def observe_scores(self, results: Dict[str, Dict]) -> int:
+        """Fold real-model scores into the adaptive thresholds; called only by the persist step"""
+        if self.thresholds is None:
+            return 0
+        # Folded in after scoring, so an anomaly does not raise its own bar
+        return self.thresholds.observe_many(
+            (f"{symbol}:{result['interval']}", result['model_version'], result.get('candle'), result['reconstruction_error'])
+            for symbol, result in results.items()
+            if result.get('model_status') == 'real_model' and 'reconstruction_error' in result
+        )
+
+    def _finalize_result(self, symbol: str, interval: str, market_data, detection: Optional[Dict],
+                         models: Optional[ModelSet] = None) -> Dict:
+        """Annotate a detector result, or fall back to the demo model when there is none"""
+        if detection is None:
+            # Fallback to demo analysis
+            logger.warning("🔄 AI model not loaded, using demo analysis...")
+            result = self._demo_analysis(self._as_frame(market_data), symbol, interval)
+            result['model_status'] = 'demo_model'
+        elif 'error' not in detection:
+            result = detection
+            result['model_type'] = 'LSTM Autoencoder'
+            result['symbol'] = symbol
+            result['data_points'] = len(market_data)
+            result['model_status'] = 'real_model'
+            logger.info(f"✅ Real AI analysis completed: Anomaly={result['is_anomaly']}, Score={result['anomaly_score']:.3f}")
+        else:
+            logger.warning(f"⚠️ Real model failed: {detection['error']}. Falling back to demo.")
+            result = self._demo_analysis(self._as_frame(market_data), symbol, interval)
+            result['model_status'] = 'real_model_failed'
+
+        result['interval'] = interval
+        result['candle'] = self._last_candle(market_data)
+        result['model_version'] = models.version if models else 'demo'
+        ANALYSIS_RESULTS.labels(result['model_status']).inc()
+        return result
+
+    def _feature_input(self, symbol: str, interval: str, market_data, models: ModelSet):
+        """Return the symbol's streaming feature engine when it is warm, else an OHLCV DataFrame"""
+        if isinstance(market_data, CandleRingBuffer):
+            engine = models.engines_for(interval).get(symbol)
+            if engine.is_ready:
+                return engine
+        return self._as_frame(market_data)
+
+    def check_market_anomaly_batch(self, symbols: List[str], interval: str = "1d",
+                                   fetch_timeout: Optional[float] = None) -> Dict[str, Dict]:
+        """Analyze many symbols with concurrent fetches and one batched forward pass
+
+        Fresh cached results are reused. A symbol whose fetch does not finish
+        within fetch_timeout seconds gets an error result instead of holding
+        up the rest of the batch.
+        """
+        if interval not in settings.ANALYSIS_INTERVALS:
+            error = f"Unsupported interval {interval}, expected one of {settings.ANALYSIS_INTERVALS}"
+            return {symbol: {'error': error, 'is_anomaly': False, 'anomaly_score': 0.0, 'symbol': symbol} for symbol in symbols}
+
+        models = self._current_models()
+        version = models.version if models else 'demo'
+        results: Dict[str, Dict] = {}
+        previous: Dict[str, Optional[Dict]] = {}
+
+        for symbol in symbols:
+            entry, fresh = self.result_cache.lookup(symbol, interval, version)
+            if fresh:
+                results[symbol] = dict(entry['result'], cache_status='hit')
+            else:
+                previous[symbol] = entry
+
+        # Fetch everything that missed the cache concurrently
+        futures = {symbol: self._fetch_pool.submit(self.live_market_data, symbol, interval, models) for symbol in previous}
+        wait(futures.values(), timeout=fetch_timeout)
+
+        market_data: Dict[str, object] = {}
+        candles: Dict[str, Optional[str]] = {}
+        for symbol, future in futures.items():
+            if not future.done():
+                future.cancel()
+                logger.warning(f"⏱️ Market data fetch for {symbol} timed out")
+                results[symbol] = {'error': f'Market data fetch timed out after {fetch_timeout}s', 'is_anomaly': False, 'anomaly_score': 0.0, 'symbol': symbol}
+                continue
+            try:
+                data = future.result()
+            except Exception as e:
+                results[symbol] = {'error': str(e), 'is_anomaly': False, 'anomaly_score': 0.0, 'symbol': symbol}
+                continue
+
+            candle = self._last_candle(data)
+            entry = previous[symbol]
+            if entry is not None and candle is not None and entry.get('candle') == candle:
+                self.result_cache.store(symbol, interval, version, candle, entry['result'], reused=True)
+                results[symbol] = dict(entry['result'], cache_status='revalidated')
+                continue
+
+            market_data[symbol] = data
+            candles[symbol] = candle
+
+        detections: Dict[str, Dict] = {}
+        if market_data and models is not None:
+            logger.info(f"🤖 Running batched LSTM Autoencoder analysis for {len(market_data)} symbols ({interval})...")
+            thresholds = {symbol: self._threshold_for(symbol, interval, models) for symbol in market_data}
+            with stage('detect_batch'):
+                detections = models.detector_for(interval).detect_anomaly_batch(
+                    {symbol: self._feature_input(symbol, interval, data, models) for symbol, data in market_data.items()},
+                    thresholds={symbol: threshold for symbol, (threshold, _) in thresholds.items()}
+                )
+            for symbol, detection in detections.items():
+                self._label_threshold(interval, models, detection, thresholds[symbol][1])
+
+        for symbol, data in market_data.items():
+            result = self._finalize_result(symbol, interval, data, detections.get(symbol), models)
+            self.result_cache.store(symbol, interval, version, candles[symbol], result)
+            results[symbol] = dict(result, cache_status='miss')
+
+        for result in results.values():
+            ANALYSIS_REQUESTS.labels(result.get('cache_status', 'error')).inc()
+        return {symbol: results[symbol] for symbol in symbols}
+
+    def backtest(self, symbol: str = "BTC-USD", interval: str = "1d", period: str = "1y",
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+        """Score every window of the stored history and return the per-candle error series"""
+        models = self._current_models()
+        if models is None:
+            return {'error': 'AI model not loaded, backtests need the trained model', 'symbol': symbol}
+
+        try:
+            interval_to_timedelta(interval)
+            period_to_timedelta(period)
+        except ValueError as e:
+            return {'error': str(e), 'symbol': symbol}
+
+        try:
+            self.candle_store.sync(symbol, interval, period)
+            self.candle_store.backfill(symbol, interval, period)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not refresh {symbol} history from {self.candle_store.provider.name}: {e}")
+
+        history = self.candle_store.get_frame(symbol, interval, period)
+        if history.empty:
+            return {'error': f'No stored market data for {symbol} ({interval})', 'symbol': symbol}
+
+        logger.info(f"⏪ Backtesting {symbol} over {len(history)} candles...")
+        scan = models.detector_for(interval).score_history(history, batch_size=batch_size)
+        if 'error' in scan:
+            return dict(scan, symbol=symbol)
+
+        errors = scan['reconstruction_error']
+        scores = errors / scan['threshold']
+        points = [
+            {'timestamp': ts.isoformat(), 'reconstruction_error': err, 'anomaly_score': score, 'is_anomaly': err > scan['threshold']}
+            for ts, err, score in zip(scan['timestamps'], errors.tolist(), scores.tolist())
+        ]
+        logger.info(f"✅ Backtest of {symbol} scored {len(points)} windows in {scan['summary']['seconds']}s")
+
+        return {
+            'symbol': symbol,
+            'interval': interval,
+            'period': period,
+            'model_version': models.version,
+            'threshold': scan['threshold'],
+            'features_used': scan['features_used'],
+            'summary': scan['summary'],
+            'points': points
+        }
+
+    @property
+    def _fetch_pool(self) -> ThreadPoolExecutor:
+        if self._fetch_executor is None:
+            with self._load_lock:
+                if self._fetch_executor is None:
+                    self._fetch_executor = ThreadPoolExecutor(
+                        max_workers=settings.WATCHLIST_FETCH_CONCURRENCY,
+                        thread_name_prefix="market-data"
+                    )
+        return self._fetch_executor
+
+    def _demo_analysis(self, market_data: pd.DataFrame, symbol: str, interval: str = "1d") -> Dict:
         """Fallback demo analysis when real model is unavailable"""
-        from sklearn.ensemble import IsolationForest
+        with stage('demo'):
+            return self._run_demo_analysis(market_data, symbol, interval)
 
+    def _run_demo_analysis(self, market_data: pd.DataFrame, symbol: str, interval: str) -> Dict:
         try:
             # Simple feature engineering for demo
             features = pd.DataFrame({
@@ -166,15 +573,8 @@ class AIService:
                     'model_type': 'Demo (Failed)'
                 }
 
-            # Use last point for prediction
-            latest_features = features.iloc[-1:].values
-
-            # Simple anomaly detection (Isolation Forest)
-            clf = IsolationForest(contamination=0.1, random_state=42)
-            clf.fit(features.values)
-
-            prediction = clf.predict(latest_features)
-            is_anomaly = prediction[0] == -1
+            # Score the last point with the symbol's cached Isolation Forest
+            is_anomaly, _ = self.fallback_models.predict_latest(f"{symbol}:{interval}", features)
 
             # Generate realistic demo scores
             if is_anomaly:
@@ -207,20 +607,47 @@ class AIService:
 
     def get_model_status(self) -> Dict:
         """Get the status of the AI model"""
+        self.ensure_loaded()
         status_info = {
             'model_loaded': self.is_loaded,
             'model_type': 'LSTM Autoencoder' if self.is_loaded else 'Demo (Isolation Forest)',
-            'status': 'ready' if self.is_loaded else 'demo_mode'
+            'status': 'ready' if self.is_loaded else 'demo_mode',
+            'warmed_up': self.is_warm
         }
 
         if self.is_loaded and self.model:
             status_info.update({
+                'inference_backend': self.model.backend,
                 'sequence_length': self.model.sequence_length,
                 'threshold': self.model.threshold,
                 'feature_count': len(self.model.feature_names)
             })
 
+        active = self.active
+        status_info['model_version'] = active.version if active else 'demo'
+        status_info['artifacts'] = {
+            'root': self.artifacts_root,
+            'active_version': active_version(self.artifacts_root),
+            'versions': list_versions(self.artifacts_root),
+            'serving': active.stats() if active else None,
+            'last_reload_error': self.last_reload_error
+        }
+        status_info['intervals'] = {
+            interval: {
+                'sequence_length': active.detector_for(interval).sequence_length if active else None,
+                'dedicated_model': bool(active) and interval in active.models,
+                'candle_retention': settings.CANDLE_RETENTION.get(interval)
+            }
+            for interval in settings.ANALYSIS_INTERVALS
+        }
+        if settings.AI_INFERENCE_BACKEND == 'remote':
+            status_info['inference_server'] = server_stats()
+        status_info['result_cache'] = self.result_cache.stats()
+        status_info['fallback_models'] = self.fallback_models.stats()
+        status_info['candle_buffers'] = self.candle_buffers.stats()
+        status_info['adaptive_thresholds'] = self.thresholds.stats() if self.thresholds else None
+
         return status_info
 
-# Global instance
+# Global instance; the model itself is loaded lazily by ensure_loaded()
 ai_service = AIService()
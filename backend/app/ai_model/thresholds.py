@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P² algorithm (Jain & Chlamtac, 1985)
+
+    Keeps five marker heights and positions, so memory and update cost are
+    constant however many scores are seen. Once the sketch holds `window`
+    scores the marker positions are rescaled to that count on every update,
+    which makes each new score move the markers as much as one in `window`
+    and lets old data fade out geometrically.
+    """
+
+    __slots__ = ('p', 'window', 'q', 'n', 'count')
+
+    def __init__(self, p: float, window: int = 500):
+        self.p = p
+        self.window = max(window, 5)
+        # Marker heights (the first five scores until count reaches 5) and positions
+        self.q = array('d')
+        self.n = array('d', (0.0, 1.0, 2.0, 3.0, 4.0))
+        self.count = 0
+
+    def _increments(self):
+        p = self.p
+        return (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def update(self, x: float):
+        self.count += 1
+        q, n = self.q, self.n
+        if len(q) < 5:
+            q.append(x)
+            if len(q) == 5:
+                self.q = array('d', sorted(q))
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+
+        if n[4] + 1 > self.window:
+            scale = (self.window - 1) / n[4]
+            for i in range(1, 5):
+                n[i] *= scale
+
+        # Desired positions are always n[4] times the marker quantiles
+        increments = self._increments()
+        for i in (1, 2, 3):
+            d = n[4] * increments[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1.0 if d > 0 else -1.0
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    j = i + int(d)
+                    height = q[i] + d * (q[j] - q[i]) / (n[j] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i: int, d: float) -> float:
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        if not self.q:
+            return None
+        if len(self.q) < 5:
+            ordered = sorted(self.q)
+            return ordered[min(len(ordered) - 1, int(self.p * len(ordered)))]
+        return self.q[2]
+
+    def to_dict(self) -> Dict:
+        return {'q': list(self.q), 'n': list(self.n), 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, state: Dict, p: float, window: int) -> "P2Quantile":
+        sketch = cls(p, window)
+        sketch.q = array('d', state['q'])
+        sketch.n = array('d', state['n'])
+        sketch.count = int(state['count'])
+        return sketch
+
+
+class _Series:
+    __slots__ = ('sketch', 'version', 'last_candle')
+
+    def __init__(self, sketch: P2Quantile, version: str, last_candle: Optional[str]):
+        self.sketch = sketch
+        self.version = version
+        self.last_candle = last_candle
+
+    def to_dict(self) -> Dict:
+        return {**self.sketch.to_dict(), 'version': self.version, 'candle': self.last_candle}
+
+
+class FileThresholdStore:
+    """Sketch states in one JSON file, for single-host deployments
+
+    Reads are re-parsed only when the file changed. A save re-reads the
+    file under a lock and replaces just the series it was given, so
+    writers of different series keep each other's updates; two writers of
+    the same series are last-writer-wins, which is why AdaptiveThresholds
+    folds scores in from one place only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._states: Dict[str, Dict] = {}
+        self._version = None
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, key: str) -> Optional[Dict]:
+        try:
+            stat = os.stat(self.path)
+            version = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+        if version != self._version:
+            self._states, self._version = self._read(), version
+        return self._states.get(key)
+
+    def save(self, states: Dict[str, Dict]):
+        import fcntl
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            merged = self._read()
+            merged.update(states)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.path)
+
+
+class RedisThresholdStore:
+    """Sketch states in one Redis hash shared by API and Celery workers"""
+
+    def __init__(self, url: str, key: str = "crypto-sentry:thresholds"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def load(self, key: str) -> Optional[Dict]:
+        raw = self.client.hget(self.key, key)
+        return json.loads(raw) if raw else None
+
+    def save(self, states: Dict[str, Dict]):
+        self.client.hset(self.key, mapping={key: json.dumps(state) for key, state in states.items()})
+
+
+class AdaptiveThresholds:
+    """Per-series anomaly threshold from a quantile of its recent reconstruction errors
+
+    A series (symbol and interval) uses the model's global threshold until
+    it has seen min_samples scores, then the sketch's quantile, clamped to
+    [min_factor, max_factor] times the global threshold so a long anomalous
+    stretch cannot raise its own bar without limit.
+
+    Scores are folded in from one place, the worker step that persists
+    scheduled analyses (observe_many): it reads each sketch from the
+    shared store, counts each candle once and writes it straight back. A
+    sketch is reset when the model version changes, since scores of
+    different models are not comparable. Every process scores against the
+    stored sketches through a cache refreshed every refresh_seconds, so API
+    and worker processes agree on a series' threshold.
+    """
+
+    def __init__(self, store, quantile: float = 0.99, window: int = 500, min_samples: int = 50,
+                 min_factor: float = 0.5, max_factor: float = 3.0, refresh_seconds: float = 60,
+                 max_series: int = 100000):
+        self.store = store
+        self.quantile = quantile
+        self.window = window
+        self.min_samples = min_samples
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.refresh_seconds = refresh_seconds
+        self.max_series = max_series
+        # key -> (loaded at, series or None when the store has none)
+        self._cache: "OrderedDict[str, Tuple[float, Optional[_Series]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.saves = 0
+        self.last_save_error: Optional[str] = None
+
+    def _load(self, key: str) -> Optional[_Series]:
+        try:
+            state = self.store.load(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load threshold sketch for {key}: {e}")
+            return None
+        if state is None:
+            return None
+        return _Series(P2Quantile.from_dict(state, self.quantile, self.window), state.get('version'), state.get('candle'))
+
+    def _remember(self, key: str, series: Optional[_Series]):
+        with self._lock:
+            self._cache[key] = (time.monotonic(), series)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_series:
+                self._cache.popitem(last=False)
+
+    def _cached(self, key: str) -> Optional[_Series]:
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.refresh_seconds:
+            return entry[1]
+        series = self._load(key)
+        self._remember(key, series)
+        return series
+
+    def threshold_for(self, key: str, version: str, default: float) -> Tuple[float, str]:
+        """Return (threshold, source) for the next score of a series; source is 'adaptive' or 'global'"""
+        series = self._cached(key)
+        if series is None or series.version != version or series.sketch.count < self.min_samples:
+            return default, 'global'
+        estimate = series.sketch.value()
+        return min(max(estimate, default * self.min_factor), default * self.max_factor), 'adaptive'
+
+    def observe_many(self, observations: Iterable[Tuple[str, str, Optional[str], float]]) -> int:
+        """Fold (key, version, candle, error) scores into the stored sketches; returns how many changed"""
+        changed: Dict[str, _Series] = {}
+        for key, version, candle, error in observations:
+            series = changed.get(key) or self._load(key)
+            if series is None or series.version != version:
+                series = _Series(P2Quantile(self.quantile, self.window), version, None)
+            if candle is not None and candle == series.last_candle:
+                continue
+            series.sketch.update(float(error))
+            series.last_candle = candle
+            changed[key] = series
+        if not changed:
+            return 0
+
+        try:
+            self.store.save({key: series.to_dict() for key, series in changed.items()})
+            self.saves += 1
+            self.last_save_error = None
+        except Exception as e:
+            logger.error(f"❌ Could not save {len(changed)} threshold sketches: {e}")
+            self.last_save_error = str(e)
+            return 0
+        for key, series in changed.items():
+            self._remember(key, series)
+        return len(changed)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            series = [entry[1] for entry in self._cache.values() if entry[1] is not None]
+        return {
+            'series': len(series),
+            'adaptive': sum(1 for s in series if s.sketch.count >= self.min_samples),
+            'quantile': self.quantile,
+            'window': self.window,
+            'min_samples': self.min_samples,
+            'refresh_seconds': self.refresh_seconds,
+            'saves': self.saves,
+            'last_save_error': self.last_save_error
+        }
+
+
+def build_adaptive_thresholds(backend: str, path: str, redis_url: str, **kwargs) -> AdaptiveThresholds:
+    """Build the threshold tracker with the sketch store selected in the settings"""
+    if backend == 'redis':
+        store = RedisThresholdStore(redis_url)
+    elif backend == 'file':
+        store = FileThresholdStore(path)
+    else:
+        raise ValueError(f"Unknown adaptive threshold backend: {backend}")
+    return AdaptiveThresholds(store, **kwargs)
@@ -3,6 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.auth_cache import principal_cache, token_id
 from app.db.base import get_db
 from app.db import models
 from app.schemas import token as token_schema
@@ -10,22 +11,39 @@ from app.schemas import user as user_schema
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> user_schema.User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_token(token: str) -> dict:
+    """Verify the JWT signature and expiry and return its claims"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = token_schema.TokenData(email=email)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> user_schema.User:
+    # The session is lazy, so a cache hit never opens a database connection
+    tid = token_id(token)
+    principal, generation = principal_cache.get(tid)
+    if principal is not None:
+        return principal
+
+    payload = decode_token(token)
+    token_data = token_schema.TokenData(email=payload["sub"])
+    if principal_cache.is_revoked(tid, token_data.email, payload.get("iat", 0)):
+        raise _credentials_exception()
 
     user = db.query(models.User).filter(models.User.email == token_data.email).first()
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+
+    principal = user_schema.User.model_validate(user)
+    principal_cache.put(tid, user.email, principal, payload["exp"], generation)
+    return principal
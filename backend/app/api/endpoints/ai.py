@@ -1,28 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.ai_model.service import ai_service
-from typing import Dict
+from app.ai_model.executor import analysis_executor, backtest_executor, AnalysisExecutor, AnalysisOverloaded
+from app.core.config import settings
+from typing import Dict, Hashable
 
 router = APIRouter()
 
+async def _run_on_executor(key: Hashable, fn, *args, executor: AnalysisExecutor = analysis_executor, **kwargs) -> Dict:
+    try:
+        return await executor.run(key, fn, *args, **kwargs)
+    except AnalysisOverloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Analysis queue is full, try again shortly ({e})",
+            headers={"Retry-After": "1"}
+        )
+
+def validate_interval(interval: str) -> str:
+    if interval not in settings.ANALYSIS_INTERVALS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unsupported interval {interval}, expected one of {settings.ANALYSIS_INTERVALS}"
+        )
+    return interval
+
+async def run_analysis(symbol: str, interval: str = "1d") -> Dict:
+    """Run check_market_anomaly off the event loop, coalescing requests per symbol and interval"""
+    return await _run_on_executor((symbol, interval), ai_service.check_market_anomaly, symbol, interval)
+
 @router.get("/status")
-async def get_ai_status() -> Dict:
-    """Get the status of the AI model"""
-    return ai_service.get_model_status()
+def get_ai_status() -> Dict:
+    """Get the status of the AI model; plain def so loading and file/socket I/O run off the event loop"""
+    status = ai_service.get_model_status()
+    status['executor'] = analysis_executor.stats()
+    status['backtest_executor'] = backtest_executor.stats()
+    return status
 
 @router.get("/analyze/{symbol}")
-async def analyze_symbol(symbol: str) -> Dict:
-    """Analyze a cryptocurrency symbol for anomalies"""
+async def analyze_symbol(symbol: str, interval: str = "1d") -> Dict:
+    """Analyze a cryptocurrency symbol for anomalies on the given candle interval"""
     try:
         # Convert symbol to yfinance format if needed
         if '-' not in symbol:
             symbol = f"{symbol}-USD"
 
-        result = ai_service.check_market_anomaly(symbol)
+        result = await run_analysis(symbol, validate_interval(interval))
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @router.get("/analyze")
-async def analyze_default() -> Dict:
+async def analyze_default(interval: str = "1d") -> Dict:
     """Analyze default symbol (BTC-USD)"""
-    return ai_service.check_market_anomaly("BTC-USD")
+    return await run_analysis("BTC-USD", validate_interval(interval))
+
+@router.get("/backtest/{symbol}")
+async def backtest_symbol(
+    symbol: str,
+    interval: str = "1d",
+    period: str = "1y",
+    batch_size: int = Query(1024, ge=1, le=8192)
+) -> Dict:
+    """Reconstruction error for every window of the symbol's history, for charts and threshold tuning"""
+    if '-' not in symbol:
+        symbol = f"{symbol}-USD"
+
+    result = await _run_on_executor(
+        ('backtest', symbol, interval, period), ai_service.backtest,
+        symbol, interval=validate_interval(interval), period=period, batch_size=batch_size,
+        executor=backtest_executor
+    )
+    if 'error' in result:
+        # No trained model is a server-side condition, anything else is a bad request
+        status_code = 503 if not ai_service.is_loaded else 422
+        raise HTTPException(status_code=status_code, detail=result['error'])
+    return result
@@ -1,6 +1,6 @@
 # app/api/endpoints/alerts.py
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.db.base import get_db
@@ -8,7 +8,9 @@ from app.db import models
 from app.schemas import alert as alert_schema
 from app.schemas import user as user_schema
 from app.api import deps
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
 from app.ai_model.service import ai_service
+from app.api.endpoints.ai import run_analysis, validate_interval
 
 router = APIRouter()
 
@@ -26,42 +28,53 @@ def create_alert(
 
 @router.get("/", response_model=List[alert_schema.Alert])
 def read_alerts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(deps.get_current_user)
 ):
-    alerts = db.query(models.Alert).filter(models.Alert.owner_id == current_user.id).all()
-    return alerts
+    """List the user's alerts, newest first; pass X-Next-Cursor back as cursor for the next page"""
+    query = db.query(models.Alert).filter(models.Alert.owner_id == current_user.id)
+    return keyset_page(query, models.Alert, response, cursor, limit)
 
 # NEW AI ENDPOINTS
 @router.get("/ai/status")
-async def get_ai_status():
-    """Check if AI model is loaded and ready"""
+def get_ai_status():
+    """Check if AI model is loaded and ready; plain def so a first load runs off the event loop"""
+    model_loaded = ai_service.ensure_loaded()
     status = {
-        'model_loaded': ai_service.detector is not None,
-        'status': 'ready' if ai_service.detector else 'not_ready',
-        'message': 'AI anomaly detection system' + (' is READY' if ai_service.detector else ' failed to load')
+        'model_loaded': model_loaded,
+        'status': 'ready' if model_loaded else 'not_ready',
+        'message': 'AI anomaly detection system' + (' is READY' if model_loaded else ' failed to load')
     }
     return status
 
 @router.post("/ai/analyze", response_model=alert_schema.AIAnalysisResult)
 async def analyze_market(
-    symbol: str = "BTC-USD"
+    symbol: str = "BTC-USD",
+    interval: str = "1d"
 ):
     """Manually trigger AI market analysis"""
     try:
-        result = ai_service.check_market_anomaly(symbol)
+        result = await run_analysis(symbol, validate_interval(interval))
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/ai/system-alerts")
+@router.get("/ai/system-alerts", response_model=List[alert_schema.Alert])
 def get_system_alerts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: user_schema.User = Depends(deps.get_current_user)
 ):
     """Get AI-generated system alerts (available to all authenticated users)"""
-    system_alerts = db.query(models.Alert).filter(
-        models.Alert.owner_id.is_(None),  # System alerts have no owner
-        models.Alert.condition == "ai_anomaly"
-    ).order_by(models.Alert.created_at.desc()).limit(50).all()
-    return system_alerts
+    query = db.query(models.Alert).filter(
+        models.Alert.condition == "ai_anomaly",
+        models.Alert.owner_id.is_(None)  # System alerts have no owner
+    )
+    return keyset_page(query, models.Alert, response, cursor, limit)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
@@ -8,30 +9,54 @@ from app.db import models
 from app.schemas import user as user_schema
 from app.schemas import token as token_schema
 from app.core import security
+from app.core.auth_cache import principal_cache, token_id
 from app.core.config import settings
+from app.api import deps
 
 router = APIRouter()
 
+def _password_hasher_busy(e: security.PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Too many sign-in attempts in progress, try again shortly ({e})",
+        headers={"Retry-After": "1"}
+    )
+
+def _find_user(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
 @router.post("/register", response_model=user_schema.User)
-def register_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_user, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = security.get_password_hash(user.password)
-    new_user = models.User(email=user.email, hashed_password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    try:
+        hashed_password = await security.password_hasher.hash(user.password)
+    except security.PasswordHasherBusy as e:
+        raise _password_hasher_busy(e)
+
+    def save():
+        new_user = models.User(email=user.email, hashed_password=hashed_password)
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        return new_user
+
+    return await run_in_threadpool(save)
 
 @router.post("/login", response_model=token_schema.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),  # Use standard OAuth2 form
     db: Session = Depends(get_db)
 ):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(_find_user, db, form_data.username)
+    try:
+        valid = user is not None and await security.password_hasher.verify(form_data.password, user.hashed_password)
+    except security.PasswordHasherBusy as e:
+        raise _password_hasher_busy(e)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -43,3 +68,32 @@ def login_for_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(token: str = Depends(deps.oauth2_scheme)):
+    """Revoke the presented token until it expires"""
+    payload = deps.decode_token(token)
+    principal_cache.invalidate_token(token_id(token), payload["exp"])
+
+@router.post("/change-password", status_code=status.HTTP_204_NO_CONTENT)
+async def change_password(
+    passwords: user_schema.PasswordChange,
+    db: Session = Depends(get_db),
+    current_user: user_schema.User = Depends(deps.get_current_user)
+):
+    """Change the password and revoke every token issued before the change"""
+    user = await run_in_threadpool(_find_user, db, current_user.email)
+    try:
+        valid = user is not None and await security.password_hasher.verify(passwords.current_password, user.hashed_password)
+        if not valid:
+            raise HTTPException(status_code=400, detail="Incorrect password")
+        hashed_password = await security.password_hasher.hash(passwords.new_password)
+    except security.PasswordHasherBusy as e:
+        raise _password_hasher_busy(e)
+
+    def save():
+        user.hashed_password = hashed_password
+        db.commit()
+
+    await run_in_threadpool(save)
+    principal_cache.invalidate_user(current_user.email)
@@ -0,0 +1,96 @@
+# app/api/endpoints/stream.py
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.api.stream_hub import ALL_SYMBOLS, StreamFull, normalize_symbols, stream_hub
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket, symbols: str = ALL_SYMBOLS):
+    """Push analysis results as they are published
+
+    Send {"subscribe": [...]} or {"unsubscribe": [...]} to change the
+    symbols of an open connection.
+    """
+    await websocket.accept()
+    try:
+        subscription = stream_hub.subscribe(normalize_symbols(symbols), 'websocket')
+    except (StreamFull, ValueError) as e:
+        await websocket.close(code=1013, reason=str(e))
+        return
+
+    async def receive_commands():
+        while True:
+            command = await websocket.receive_json()
+            try:
+                stream_hub.update(
+                    subscription,
+                    add=normalize_symbols(','.join(command.get('subscribe', []))),
+                    remove=normalize_symbols(','.join(command.get('unsubscribe', [])))
+                )
+            except ValueError as e:
+                await websocket.send_json({'error': str(e)})
+
+    async def send_results():
+        while True:
+            batch = await subscription.next_batch(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+            # A client that stops reading is dropped rather than buffered for
+            await asyncio.wait_for(
+                websocket.send_json({'type': 'results', 'results': batch, 'coalesced': subscription.coalesced}),
+                settings.STREAM_SEND_TIMEOUT_SECONDS
+            )
+
+    tasks = [asyncio.create_task(receive_commands()), asyncio.create_task(send_results())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        stream_hub.unsubscribe(subscription)
+
+    for task in tasks:
+        if task.done() and not task.cancelled():
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.info(f"🔌 Closing result stream: {error!r}")
+                await websocket.close(code=1011)
+
+@router.get("/sse")
+async def stream_events(request: Request, symbols: str = ALL_SYMBOLS):
+    """Server-Sent Events version of the result stream, one event per result"""
+    try:
+        subscription = stream_hub.subscribe(normalize_symbols(symbols), 'sse')
+    except StreamFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+                if not batch:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ": heartbeat\n\n"
+                for result in batch:
+                    yield f"event: result\ndata: {json.dumps(result, default=str)}\n\n"
+        finally:
+            stream_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/status")
+def stream_status():
+    return stream_hub.stats()
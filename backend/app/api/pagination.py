@@ -0,0 +1,46 @@
+# app/api/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the (created_at, id) of the last row returned"""
+    raw = json.dumps({'created_at': created_at.isoformat(), 'id': row_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(data['created_at']), int(data['id'])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query: Query, model, response: Response, cursor: Optional[str], limit: int) -> List:
+    """Return one page of rows, newest first, using (created_at, id) as the keyset
+
+    The filter on the cursor is served by the (..., created_at, id) indexes,
+    so later pages cost the same as the first one instead of growing with an
+    OFFSET. The cursor for the next page is set in the X-Next-Cursor header.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
@@ -0,0 +1,173 @@
+# app/api/stream_hub.py
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import STREAM_MESSAGES, STREAM_SUBSCRIBERS
+from app.core.pubsub import result_broker
+
+logger = logging.getLogger(__name__)
+
+ALL_SYMBOLS = "*"
+
+
+class StreamFull(Exception):
+    """Raised when the hub already serves STREAM_MAX_SUBSCRIBERS clients"""
+
+
+class Subscription:
+    """One client's symbols and the results waiting to be sent to it
+
+    Pending results are kept per symbol and interval and a newer result
+    replaces an unsent older one. A slow client therefore holds at most one
+    message per series and always receives the latest state, instead of
+    growing a queue or stalling delivery to everyone else.
+    """
+
+    def __init__(self, symbols: Set[str], transport: str):
+        self.symbols = symbols
+        self.transport = transport
+        self._pending: Dict[Tuple[str, Optional[str]], Dict] = {}
+        self._ready = asyncio.Event()
+        self.coalesced = 0
+
+    def offer(self, symbol: str, message: Dict):
+        key = (symbol, message.get('interval'))
+        if key in self._pending:
+            self.coalesced += 1
+            STREAM_MESSAGES.labels('coalesced').inc()
+        self._pending[key] = message
+        self._ready.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Wait for pending results and take them all; [] when the timeout passes first"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch, self._pending = list(self._pending.values()), {}
+        self._ready.clear()
+        STREAM_MESSAGES.labels('sent').inc(len(batch))
+        return batch
+
+
+class StreamHub:
+    """Fans results from the pub/sub broker out to WebSocket and SSE subscribers
+
+    The broker calls in from its own thread; every message is handed to the
+    event loop and dispatched only to the subscribers of that symbol. One
+    published result per symbol per tick reaches every open dashboard
+    without any of them triggering an analysis.
+    """
+
+    def __init__(self, broker, max_subscribers: int = 10000):
+        self.broker = broker
+        self.max_subscribers = max_subscribers
+        # symbol -> interval -> latest result
+        self.latest: Dict[str, Dict[Optional[str], Dict]] = {}
+        self._by_symbol: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.received = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self.broker.start(self._on_message)
+
+    def stop(self):
+        self.broker.stop()
+        self._loop = None
+
+    def _on_message(self, symbol: str, message: Dict):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(symbol, message)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, symbol, message)
+
+    def _dispatch(self, symbol: str, message: Dict):
+        self.received += 1
+        self.latest.setdefault(symbol, {})[message.get('interval')] = message
+        for subscription in self._by_symbol.get(symbol, ()):
+            subscription.offer(symbol, message)
+        for subscription in self._by_symbol.get(ALL_SYMBOLS, ()):
+            subscription.offer(symbol, message)
+
+    def subscribe(self, symbols: Iterable[str], transport: str) -> Subscription:
+        """Register a subscriber and queue the latest known result for each of its symbols"""
+        if self._count >= self.max_subscribers:
+            raise StreamFull(f"{self._count} stream subscribers already connected")
+        subscription = Subscription(set(), transport)
+        self._count += 1
+        STREAM_SUBSCRIBERS.labels(transport).inc()
+        try:
+            self.update(subscription, add=symbols)
+        except ValueError:
+            self.unsubscribe(subscription)
+            raise
+        return subscription
+
+    def update(self, subscription: Subscription, add: Iterable[str] = (), remove: Iterable[str] = ()):
+        for symbol in remove:
+            subscription.symbols.discard(symbol)
+            subscribers = self._by_symbol.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_symbol[symbol]
+        for symbol in add:
+            if symbol in subscription.symbols:
+                continue
+            if len(subscription.symbols) >= settings.STREAM_MAX_SYMBOLS_PER_CLIENT:
+                raise ValueError(f"At most {settings.STREAM_MAX_SYMBOLS_PER_CLIENT} symbols per stream")
+            subscription.symbols.add(symbol)
+            self._by_symbol.setdefault(symbol, set()).add(subscription)
+            # Send the current state right away instead of waiting for the next tick
+            known = self.latest.keys() if symbol == ALL_SYMBOLS else [symbol]
+            for name in known:
+                for message in self.latest.get(name, {}).values():
+                    subscription.offer(name, message)
+
+    def unsubscribe(self, subscription: Subscription):
+        for symbol in subscription.symbols:
+            subscribers = self._by_symbol.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_symbol[symbol]
+        subscription.symbols = set()
+        self._count -= 1
+        STREAM_SUBSCRIBERS.labels(subscription.transport).dec()
+
+    def stats(self) -> Dict:
+        return {
+            'subscribers': self._count,
+            'symbols': len(self._by_symbol),
+            'received': self.received,
+            'broker': type(self.broker).__name__
+        }
+
+
+def normalize_symbols(raw: str) -> List[str]:
+    """Parse a comma-separated symbol list, adding -USD like the analyze endpoints do"""
+    symbols = []
+    for symbol in raw.split(','):
+        symbol = symbol.strip().upper()
+        if not symbol:
+            continue
+        if symbol != ALL_SYMBOLS and '-' not in symbol:
+            symbol = f"{symbol}-USD"
+        symbols.append(symbol)
+    return symbols
+
+
+# Global instance
+stream_hub = StreamHub(result_broker, max_subscribers=settings.STREAM_MAX_SUBSCRIBERS)
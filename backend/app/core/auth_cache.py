@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def token_id(token: str) -> str:
+    """Stable id for a JWT, so raw tokens are never used as cache or Redis keys"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class InMemoryRevocationStore:
+    """Per-process record of logged-out tokens and users whose tokens were revoked
+
+    Only the process that handled the logout or password change sees the
+    revocation; other API workers keep accepting the token until it
+    expires. Use RedisRevocationStore when running more than one worker.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, float] = {}
+        self._users: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def revoke_token(self, tid: str, expires_at: float):
+        with self._lock:
+            now = time.time()
+            self._tokens[tid] = expires_at
+            # Revoked tokens only matter until they would have expired anyway
+            if len(self._tokens) > 10000:
+                self._tokens = {t: exp for t, exp in self._tokens.items() if exp > now}
+
+    def is_token_revoked(self, tid: str) -> bool:
+        with self._lock:
+            return tid in self._tokens
+
+    def revoke_user(self, email: str, issued_before: int):
+        with self._lock:
+            self._users[email] = issued_before
+
+    def user_revoked_before(self, email: str) -> Optional[int]:
+        with self._lock:
+            return self._users.get(email)
+
+
+class RedisRevocationStore:
+    """Revocations shared by every API process through Redis keys with a TTL"""
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "crypto-sentry:auth:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def revoke_token(self, tid: str, expires_at: float):
+        self.client.set(f"{self.prefix}token:{tid}", 1, ex=max(1, int(expires_at - time.time())))
+
+    def is_token_revoked(self, tid: str) -> bool:
+        return bool(self.client.exists(f"{self.prefix}token:{tid}"))
+
+    def revoke_user(self, email: str, issued_before: int):
+        # No token issued before the change outlives ttl_seconds, so neither does the marker
+        self.client.set(f"{self.prefix}user:{email}", issued_before, ex=self.ttl_seconds)
+
+    def user_revoked_before(self, email: str) -> Optional[int]:
+        raw = self.client.get(f"{self.prefix}user:{email}")
+        return int(raw) if raw else None
+
+
+class PrincipalCache:
+    """Short-lived, bounded cache of verified token -> user principal
+
+    A hit skips the JWT decode and the users query. Entries live for at
+    most ttl_seconds and never past the token's own expiry. Logout and
+    password changes drop entries in this process immediately; other
+    processes stop trusting their copies within ttl_seconds, after which
+    the revocation store is consulted again on the miss path. That only
+    reaches them when the store is shared (Redis).
+    """
+
+    def __init__(self, revocations, ttl_seconds: float = 60, max_entries: int = 10000):
+        self.revocations = revocations
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str, object]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a lookup racing a logout cannot re-cache the token
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tid: str) -> Tuple[Optional[object], int]:
+        """Return (principal or None, generation); pass the generation back to put()"""
+        with self._lock:
+            item = self._entries.get(tid)
+            if item is None or time.time() >= item[0]:
+                if item is not None:
+                    self._drop(tid)
+                self.misses += 1
+                return None, self._generation
+            self._entries.move_to_end(tid)
+            self.hits += 1
+            return item[2], self._generation
+
+    def put(self, tid: str, email: str, principal, token_expires_at: float, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            if tid in self._entries:
+                self._drop(tid)
+            self._entries[tid] = (min(time.time() + self.ttl_seconds, token_expires_at), email, principal)
+            self._by_user.setdefault(email, set()).add(tid)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, tid: str):
+        _, email, _ = self._entries.pop(tid)
+        tokens = self._by_user.get(email)
+        if tokens is not None:
+            tokens.discard(tid)
+            if not tokens:
+                del self._by_user[email]
+
+    def is_revoked(self, tid: str, email: str, issued_at: int) -> bool:
+        """Check the revocation store; fails closed when it is unreachable"""
+        try:
+            if self.revocations.is_token_revoked(tid):
+                return True
+            revoked_before = self.revocations.user_revoked_before(email)
+        except Exception as e:
+            logger.error(f"❌ Token revocation store unavailable: {e}")
+            return True
+        return revoked_before is not None and issued_at < revoked_before
+
+    def invalidate_token(self, tid: str, token_expires_at: float):
+        """Log one token out: record the revocation, then forget it here"""
+        # Revoke first: lookups that start after the generation bump must see it
+        self.revocations.revoke_token(tid, token_expires_at)
+        with self._lock:
+            self._generation += 1
+            if tid in self._entries:
+                self._drop(tid)
+
+    def invalidate_user(self, email: str):
+        """Revoke every token issued to a user so far, e.g. after a password change"""
+        # iat has one-second resolution; tokens from earlier in this second stay valid
+        self.revocations.revoke_user(email, int(time.time()))
+        with self._lock:
+            self._generation += 1
+            for tid in list(self._by_user.get(email, ())):
+                self._drop(tid)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+
+def build_revocation_store(backend: str, redis_url: str, ttl_seconds: int):
+    """Build the revocation store selected in the settings"""
+    if backend == 'redis':
+        return RedisRevocationStore(redis_url, ttl_seconds)
+    if backend == 'memory':
+        return InMemoryRevocationStore()
+    raise ValueError(f"Unknown auth revocation backend: {backend}")
+
+
+# Global instance
+principal_cache = PrincipalCache(
+    build_revocation_store(
+        settings.AUTH_REVOCATION_BACKEND, settings.REDIS_URL, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    ),
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+)
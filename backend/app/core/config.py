@@ -1,17 +1,153 @@
 import os
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Run Alembic migrations (upgrade head) when the API starts. Turn off when several
+    # API processes start at once and run `alembic upgrade head` once before them instead.
+    DB_MIGRATE_ON_STARTUP: bool = True
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Verified token -> user cache; revocations use "memory" or "redis" (shared).
+    # "memory" revokes only in the process that handled the logout or password change:
+    # with more than one API worker, other workers accept the token until it expires.
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_REVOCATION_BACKEND: str = "memory"
+
+    # bcrypt runs on its own pool so login bursts cannot starve other endpoints
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
     CLIENT_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost", "http://localhost:5173", "http://localhost:8000", "http://localhost:8080"]
 
     CELERY_BROKER_URL: str = "redis://redis:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/0"
+    # Port for the worker's Prometheus metrics server; 0 disables it
+    WORKER_METRICS_PORT: int = 9540
+
+    # Model inference: "keras" (TensorFlow), "numpy" (no TensorFlow import) or "remote" (inference server)
+    AI_INFERENCE_BACKEND: str = "keras"
+    AI_WARMUP_ON_STARTUP: bool = True
+    # Versioned artifacts (see app/ai_model/artifacts.py); empty means the packaged model_artifacts/.
+    # Processes poll CURRENT every MODEL_RELOAD_CHECK_SECONDS (0 disables) and hot-swap new versions.
+    MODEL_ARTIFACTS_DIR: str = ""
+    MODEL_RELOAD_CHECK_SECONDS: int = 30
+    # Load the model in the Celery parent before forking; use with the "numpy" backend,
+    # whose memory-mapped weights are then shared by every child
+    AI_PRELOAD_BEFORE_FORK: bool = False
+
+    # Shared inference server (python -m app.ai_model.inference_server); processes use it with
+    # AI_INFERENCE_BACKEND="remote". Requests are batched up to MAX_BATCH_SIZE windows or MAX_WAIT_MS.
+    INFERENCE_SOCKET_PATH: str = "/tmp/crypto-sentry-inference.sock"
+    INFERENCE_SERVER_BACKEND: str = "numpy"
+    INFERENCE_MAX_BATCH_SIZE: int = 64
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+    INFERENCE_SERVER_MAX_MODELS: int = 4
+    INFERENCE_TIMEOUT_SECONDS: float = 10.0
+    INFERENCE_METRICS_PORT: int = 9541
+
+    # Demo fallback: refit a symbol's Isolation Forest after this many new candles or seconds
+    FALLBACK_REFIT_CANDLES: int = 24
+    FALLBACK_REFIT_SECONDS: int = 3600
+
+    # Watchlist analysed by the Celery worker every tick
+    WATCHLIST: List[str] = ["BTC-USD", "ETH-USD", "ADA-USD", "DOT-USD"]
+    WATCHLIST_INTERVALS: List[str] = ["1m", "1d"]
+    WATCHLIST_CHUNK_SIZE: int = 25
+    WATCHLIST_FETCH_CONCURRENCY: int = 8
+    WATCHLIST_SYMBOL_TIMEOUT_SECONDS: int = 20
+    WATCHLIST_CHUNK_TIME_LIMIT_SECONDS: int = 50
+
+    # Change-aware scheduling: every tick, only symbols whose next candle is due are analysed,
+    # SETTLE_SECONDS plus up to JITTER_FRACTION of the interval (capped) after it opens.
+    # State is kept in Redis ("redis", shared by the worker's processes); "memory" is only
+    # for a single-process worker, since due() and record() run in different children.
+    SCHEDULER_TICK_SECONDS: int = 15
+    SCHEDULER_SETTLE_SECONDS: float = 5.0
+    SCHEDULER_JITTER_FRACTION: float = 0.1
+    SCHEDULER_MAX_JITTER_SECONDS: float = 300.0
+    SCHEDULER_RETRY_SECONDS: float = 60.0
+    SCHEDULER_STATE_BACKEND: str = "redis"
+
+    # CoinGecko prices: one bulk simple/price call per MAX_IDS_PER_CALL ids, rate limited client-side
+    COINGECKO_API_URL: str = "https://api.coingecko.com/api/v3"
+    COINGECKO_IDS: Dict[str, str] = {"BTC": "bitcoin", "ETH": "ethereum", "ADA": "cardano", "DOT": "polkadot"}
+    COINGECKO_MAX_IDS_PER_CALL: int = 250
+    COINGECKO_RATE_LIMIT_PER_MINUTE: int = 30
+
+    # Outbound HTTP: pooled keep-alive connections, per-request timeout and jittered retries
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_RETRIES: int = 3
+    HTTP_POOL_SIZE: int = 10
+
+    # System alerts: one per (symbol, condition) per cooldown window.
+    # Use "redis" so every worker process shares the cooldown index.
+    ALERT_COOLDOWN_SECONDS: int = 900
+    ALERT_COOLDOWN_BACKEND: str = "memory"
+
+    # User price alerts: prices for every COINGECKO_IDS coin are fetched every PRICE_TICK_SECONDS
+    # and checked against the alerts; full index rebuild interval (new alerts are picked up every tick)
+    PRICE_TICK_SECONDS: int = 60
+    PRICE_RULES_RESYNC_SECONDS: int = 300
+
+    # Market data: "yfinance" or "local" (CSV files in LOCAL_MARKET_DATA_DIR)
+    MARKET_DATA_PROVIDER: str = "yfinance"
+    MARKET_DATA_DIR: str = "data/market"
+    LOCAL_MARKET_DATA_DIR: str = "data/local_market"
+    MARKET_DATA_REFRESH_SECONDS: int = 60
+
+    # Candle intervals the API and the worker analyse, candles kept on disk per
+    # (symbol, interval), and candles handed to one analysis
+    ANALYSIS_INTERVALS: List[str] = ["1m", "5m", "15m", "1h", "1d"]
+    CANDLE_RETENTION: Dict[str, int] = {"1m": 10080, "5m": 8640, "15m": 5760, "1h": 8760, "1d": 3650}
+    ANALYSIS_MAX_CANDLES: int = 500
+
+    # Live candles per (symbol, interval): sequence_length + 50 rows in "float64" or "float32" arrays
+    CANDLE_BUFFER_MAX_SERIES: int = 10000
+    CANDLE_BUFFER_DTYPE: str = "float64"
+
+    # Adaptive thresholds: per (symbol, interval) quantile of recent reconstruction errors from a
+    # P² sketch with an effective memory of WINDOW scores, clamped to MIN/MAX_FACTOR x the model's
+    # threshold. Off by default: turning it on changes which scores raise alerts, per series.
+    # Scores are folded in by the worker's persist step and saved to a Redis hash ("redis",
+    # shared by the API and every worker) or a JSON file ("file", single host); every process
+    # re-reads a series' sketch after REFRESH_SECONDS.
+    ADAPTIVE_THRESHOLDS: bool = False
+    ADAPTIVE_THRESHOLD_QUANTILE: float = 0.99
+    ADAPTIVE_THRESHOLD_WINDOW: int = 500
+    ADAPTIVE_THRESHOLD_MIN_SAMPLES: int = 50
+    ADAPTIVE_THRESHOLD_MIN_FACTOR: float = 0.5
+    ADAPTIVE_THRESHOLD_MAX_FACTOR: float = 3.0
+    ADAPTIVE_THRESHOLD_BACKEND: str = "redis"
+    ADAPTIVE_THRESHOLD_FILE: str = "data/thresholds.json"
+    ADAPTIVE_THRESHOLD_REFRESH_SECONDS: int = 60
+
+    # Analysis executor: worker threads and distinct symbols allowed in flight
+    ANALYSIS_MAX_WORKERS: int = 4
+    ANALYSIS_MAX_PENDING: int = 32
+    # Backtests run on a separate, smaller executor
+    BACKTEST_MAX_WORKERS: int = 1
+    BACKTEST_MAX_PENDING: int = 4
+
+    # Analysis result cache: "memory" (per process) or "redis" (shared)
+    REDIS_URL: str = "redis://redis:6379/0"
+    RESULT_CACHE_BACKEND: str = "memory"
+    RESULT_CACHE_TTL_SECONDS: int = 60
+    RESULT_CACHE_STALE_SECONDS: int = 300
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+
+    # Live result stream: worker -> pub/sub -> WebSocket/SSE clients. Results are published by the
+    # Celery workers and streamed by the API, so this needs "redis"; "memory" only reaches listeners
+    # in the publishing process (single-process runs and tests).
+    PUBSUB_BACKEND: str = "redis"
+    STREAM_MAX_SUBSCRIBERS: int = 10000
+    STREAM_MAX_SYMBOLS_PER_CLIENT: int = 100
+    STREAM_SEND_TIMEOUT_SECONDS: int = 10
+    STREAM_HEARTBEAT_SECONDS: int = 15
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,159 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Latency buckets from sub-millisecond pandas/NumPy steps up to slow network fetches
+_STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+ANALYSIS_STAGE_SECONDS = Histogram(
+    "crypto_sentry_analysis_stage_seconds",
+    "Time spent in each stage of an anomaly analysis",
+    ["stage"],
+    buckets=_STAGE_BUCKETS
+)
+ANALYSIS_REQUESTS = Counter(
+    "crypto_sentry_analysis_requests_total",
+    "Analyses served, by result cache status",
+    ["cache_status"]
+)
+ANALYSIS_RESULTS = Counter(
+    "crypto_sentry_analysis_results_total",
+    "Computed analyses by model status (real_model, real_model_failed, demo_model)",
+    ["model_status"]
+)
+ANALYSIS_ERRORS = Counter(
+    "crypto_sentry_analysis_errors_total",
+    "Errors raised inside an analysis stage",
+    ["stage"]
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "crypto_sentry_http_request_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+CELERY_TASK_SECONDS = Histogram(
+    "crypto_sentry_celery_task_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=_STAGE_BUCKETS + (60.0, 120.0)
+)
+CELERY_QUEUE_LAG_SECONDS = Histogram(
+    "crypto_sentry_celery_queue_lag_seconds",
+    "Time between a task being published and a worker starting it",
+    ["task"],
+    buckets=_STAGE_BUCKETS + (60.0, 120.0)
+)
+CELERY_TASKS_IN_PROGRESS = Gauge(
+    "crypto_sentry_celery_tasks_in_progress",
+    "Celery tasks currently running",
+    ["task"],
+    multiprocess_mode="livesum"
+)
+
+SCHEDULER_DECISIONS = Counter(
+    "crypto_sentry_scheduler_decisions_total",
+    "Watchlist symbols per scheduler tick: executed, skipped (no new candle due) or pending (dispatched recently)",
+    ["interval", "decision"]
+)
+
+STREAM_SUBSCRIBERS = Gauge(
+    "crypto_sentry_stream_subscribers",
+    "Open WebSocket/SSE result stream subscriptions",
+    ["transport"],
+    multiprocess_mode="livesum"
+)
+STREAM_MESSAGES = Counter(
+    "crypto_sentry_stream_messages_total",
+    "Result stream messages by outcome (sent, or coalesced for a slow client)",
+    ["outcome"]
+)
+
+INFERENCE_REQUESTS = Counter(
+    "crypto_sentry_inference_requests_total",
+    "Predict requests received by the inference server"
+)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "crypto_sentry_inference_queue_depth",
+    "Predict requests waiting for the inference server's next batch",
+    multiprocess_mode="livesum"
+)
+INFERENCE_QUEUE_WAIT_SECONDS = Histogram(
+    "crypto_sentry_inference_queue_wait_seconds",
+    "Time a predict request waited for its batch to start",
+    buckets=_STAGE_BUCKETS
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "crypto_sentry_inference_batch_size",
+    "Windows per forward pass in the inference server",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the wrapped block into the analysis stage histogram and count its errors"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ANALYSIS_ERRORS.labels(name).inc()
+        raise
+    finally:
+        ANALYSIS_STAGE_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+def metrics_registry():
+    """Registry to expose: the default one, or an aggregate of every process under PROMETHEUS_MULTIPROC_DIR
+
+    Set PROMETHEUS_MULTIPROC_DIR when running several uvicorn workers or
+    Celery prefork children so /metrics reports all of them.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        from prometheus_client import REGISTRY
+
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics():
+    """Return (body, content type) in the Prometheus text format"""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording request latency by method, route template and status
+
+    Routes are labelled by their template (/api/ai/analyze/{symbol}), not
+    the raw path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status["code"])
+            ).observe(time.perf_counter() - started)
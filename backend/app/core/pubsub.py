@@ -0,0 +1,112 @@
+import json
+import logging
+import threading
+from typing import Callable, Dict, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Listener signature: (symbol, message)
+Listener = Callable[[str, Dict], None]
+
+
+class InMemoryBroker:
+    """Delivers published results to listeners in the same process, for tests and single-process runs"""
+
+    def __init__(self):
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def publish(self, symbol: str, message: Dict) -> int:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(symbol, message)
+            except Exception as e:
+                logger.error(f"❌ Stream listener failed for {symbol}: {e}")
+        return len(listeners)
+
+    def start(self, listener: Listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def stop(self):
+        with self._lock:
+            self._listeners.clear()
+
+
+class RedisBroker:
+    """Publishes results on one Redis channel per symbol and listens on the whole prefix
+
+    The listener runs in a daemon thread and reconnects with a growing
+    delay (up to 30s) when Redis goes away; results published meanwhile
+    are lost, which is fine for a live view that is refreshed every tick.
+    """
+
+    def __init__(self, url: str, prefix: str = "crypto-sentry:results:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def publish(self, symbol: str, message: Dict) -> int:
+        return self.client.publish(self.prefix + symbol, json.dumps(message, default=str))
+
+    def start(self, listener: Listener):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, args=(listener,), name="stream-listener", daemon=True)
+        self._thread.start()
+
+    def _listen(self, listener: Listener):
+        delay = 1.0
+        while not self._stopping.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.prefix + "*")
+                delay = 1.0
+                while not self._stopping.is_set():
+                    item = pubsub.get_message(timeout=1.0)
+                    if item is None:
+                        continue
+                    symbol = item['channel'].decode()[len(self.prefix):]
+                    listener(symbol, json.loads(item['data']))
+            except Exception as e:
+                logger.warning(f"⚠️ Result stream listener lost Redis, reconnecting in {delay:.0f}s: {e}")
+                self._stopping.wait(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                pubsub.close()
+
+    def stop(self):
+        self._stopping.set()
+
+
+def build_broker(backend: str, redis_url: str):
+    """Build the result broker selected in the settings"""
+    if backend == 'redis':
+        return RedisBroker(redis_url)
+    if backend == 'memory':
+        return InMemoryBroker()
+    raise ValueError(f"Unknown pub/sub backend: {backend}")
+
+
+# Results served from the cache unchanged; subscribers already received them
+UNCHANGED_CACHE_STATUSES = ('hit', 'stale', 'revalidated')
+
+
+def publish_result(symbol: str, result: Dict):
+    """Publish one new analysis result; never lets a broker outage fail the analysis"""
+    if result.get('cache_status') in UNCHANGED_CACHE_STATUSES:
+        return
+    try:
+        result_broker.publish(symbol, dict(result, symbol=symbol))
+    except Exception as e:
+        logger.warning(f"⚠️ Could not publish result for {symbol}: {e}")
+
+
+# Global instance
+result_broker = build_broker(settings.PUBSUB_BACKEND, settings.REDIS_URL)
@@ -1,5 +1,8 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.core.config import settings
@@ -12,12 +15,69 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class PasswordHasherBusy(Exception):
+    """Raised when too many bcrypt operations are already queued or running"""
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool with a bounded queue
+
+    bcrypt is deliberately slow, so it gets its own workers instead of the
+    shared threadpool used by sync endpoints. Calls beyond max_pending are
+    rejected with PasswordHasherBusy rather than queued without limit.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self.completed = 0
+        self.rejected = 0
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self._pending} password operations already pending")
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def stats(self) -> Dict:
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'pending': self._pending,
+            'completed': self.completed,
+            'rejected': self.rejected
+        }
+
+# Global instance
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=15)
+    # iat lets a password change revoke every token issued before it
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
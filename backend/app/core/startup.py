@@ -0,0 +1,102 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+# Reference point for every cold-start measurement in this process
+PROCESS_STARTED = time.perf_counter()
+
+
+class StartupReport:
+    """Records how long each cold-start phase took in this process"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] = round(seconds, 4)
+
+    def phase(self, name: str):
+        """Context manager that records the duration of the wrapped block"""
+        report = self
+
+        class _Phase:
+            def __enter__(self):
+                self.started = time.perf_counter()
+
+            def __exit__(self, *exc):
+                report.record(name, time.perf_counter() - self.started)
+
+        return _Phase()
+
+    def mark_ready(self):
+        with self._lock:
+            self.ready_at = time.perf_counter()
+
+    def mark_failed(self, error: str):
+        with self._lock:
+            self.error = error
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_at is not None
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'ready': self.ready_at is not None,
+                'seconds_to_ready': round(self.ready_at - PROCESS_STARTED, 4) if self.ready_at else None,
+                'uptime_seconds': round(time.perf_counter() - PROCESS_STARTED, 4),
+                'phases': dict(self.phases),
+                'error': self.error
+            }
+
+
+# Global instance
+startup_report = StartupReport()
+
+
+_MEASURE_SCRIPT = """
+import json, time
+started = time.perf_counter()
+timings = {}
+for module in %r:
+    t = time.perf_counter()
+    __import__(module)
+    timings['import ' + module] = round(time.perf_counter() - t, 4)
+if %r:
+    from app.ai_model.service import ai_service
+    t = time.perf_counter()
+    ai_service.warm_up()
+    timings['model load + warm-up'] = round(time.perf_counter() - t, 4)
+timings['total'] = round(time.perf_counter() - started, 4)
+print(json.dumps(timings))
+"""
+
+
+def measure_cold_start(modules=("app.main", "app.worker.tasks"), warm_up: bool = True) -> Dict:
+    """Measure imports and model warm-up in a fresh interpreter, as a new pod would see them"""
+    output = subprocess.run(
+        [sys.executable, "-c", _MEASURE_SCRIPT % (list(modules), warm_up)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure API and worker cold-start time")
+    parser.add_argument("--no-warm-up", action="store_true", help="only measure imports")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [measure_cold_start(warm_up=not args.no_warm_up) for _ in range(args.runs)]
+    report = {phase: {'min': min(r[phase] for r in runs), 'max': max(r[phase] for r in runs)} for phase in runs[0]}
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,43 @@
+# app/db/migrations.py
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.db.base import engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def alembic_config(connection=None) -> Config:
+    """Alembic config for running migrations from code, optionally on an open connection"""
+    # No ini file: it would reconfigure logging for the whole process
+    config = Config()
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_database(bind=None):
+    """Bring the schema up to the latest migration, like `alembic upgrade head`
+
+    Databases created by create_all before migrations existed have no
+    alembic_version table. They are first stamped with the revision their
+    alerts table matches: 0001 for the original columns, head for the
+    current ones.
+    """
+    with (bind or engine).begin() as connection:
+        config = alembic_config(connection)
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        if "alembic_version" not in tables and "alerts" in tables:
+            columns = {column["name"] for column in inspector.get_columns("alerts")}
+            revision = "0001" if "crypto_symbol" in columns else "head"
+            logger.info(f"🗃️ Unversioned database, stamping it at {revision}")
+            command.stamp(config, revision)
+        command.upgrade(config, "head")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -13,11 +14,26 @@ class User(Base):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Keyset pagination: a user's alerts, newest first (id breaks ties)
+        Index("ix_alerts_owner_created", "owner_id", "created_at", "id"),
+        # System alerts by condition (owner_id IS NULL), newest first
+        Index("ix_alerts_condition_owner_created", "condition", "owner_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    crypto_symbol = Column(String, index=True, nullable=False)
-    alert_type = Column(String, nullable=False) # e.g., 'ANOMALY', 'TREND_UP', 'PRICE_TARGET'
-    is_active = Column(Boolean, default=True)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    cryptocurrency = Column(String, index=True, nullable=False)
+    condition = Column(String, nullable=False) # "price_above", "price_below", "ai_anomaly"
+    threshold_value = Column(Float, nullable=True)
+    current_value = Column(Float, nullable=True)
+    is_triggered = Column(Boolean, default=False, server_default="0", nullable=False)
+    message = Column(String, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False
+    )
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True) # None for system-generated alerts
 
     owner = relationship("User", back_populates="alerts")
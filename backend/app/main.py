@@ -1,12 +1,57 @@
+# Imported first so the cold-start clock covers every other import
+from app.core.startup import startup_report, PROCESS_STARTED
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import auth, alerts, ai  # Add ai import
-from app.db.base import Base, engine
+from fastapi.responses import JSONResponse, Response
+from app.api.endpoints import auth, alerts, ai, stream  # Add ai import
+from app.db.migrations import upgrade_database
 from app.core.config import settings
+from app.core.metrics import PrometheusMiddleware, render_metrics
+from app.ai_model.service import ai_service
+from app.api.stream_hub import stream_hub
+from app.api.pagination import NEXT_CURSOR_HEADER
 
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Crypto-Sentry AI API")
+startup_report.record('imports', time.perf_counter() - PROCESS_STARTED)
+
+def _warm_up_model():
+    """Load and warm up the model, then mark the process ready
+
+    Without warm-up the model loads on first use and the process is ready
+    at once. With warm-up, a model that fails to load or warm up leaves
+    /ready at 503 (the API would only serve demo results).
+    """
+    try:
+        if settings.AI_WARMUP_ON_STARTUP and not ai_service.warm_up():
+            startup_report.mark_failed("AI model could not be loaded or warmed up")
+            return
+        startup_report.mark_ready()
+    except Exception as e:
+        startup_report.mark_failed(str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_MIGRATE_ON_STARTUP:
+        with startup_report.phase('db_init'):
+            upgrade_database()
+
+    # Warm up in the background so /health answers while the model loads
+    threading.Thread(target=_warm_up_model, name="model-warm-up", daemon=True).start()
+
+    # Relay results the workers publish to WebSocket/SSE subscribers
+    if settings.PUBSUB_BACKEND == 'memory':
+        logger.error("❌ PUBSUB_BACKEND=memory: results published by Celery workers will not reach WebSocket/SSE clients, use redis")
+    stream_hub.start(asyncio.get_running_loop())
+    yield
+    stream_hub.stop()
+
+app = FastAPI(title="Crypto-Sentry AI API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,12 +59,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination cursor for the alert lists
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(PrometheusMiddleware)
 
 # Include API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"])
 app.include_router(ai.router, prefix="/api/ai", tags=["ai"])  # Add AI router
+app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
 
 @app.get("/")
 def read_root():
@@ -28,3 +77,15 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "service": "Crypto-Sentry AI API"}
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 200 once the model is loaded and warmed up, or at once when AI_WARMUP_ON_STARTUP is off"""
+    report = startup_report.as_dict()
+    return JSONResponse(status_code=200 if report['ready'] else 503, content=report)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics: analysis stages, HTTP latency and, in multiprocess mode, Celery tasks"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
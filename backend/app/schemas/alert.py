@@ -28,4 +28,6 @@ class AIAnalysisResult(BaseModel):
     threshold: float
     confidence: Optional[float] = None
     timestamp: Optional[str] = None
+    interval: Optional[str] = None
+    candle: Optional[str] = None
     error: Optional[str] = None
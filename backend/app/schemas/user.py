@@ -12,3 +12,8 @@ class User(BaseModel):
 
     class Config:
         from_attributes = True  # Replaces orm_mode in Pydantic v2
+
+# Properties to receive via API on password change
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
@@ -0,0 +1,163 @@
+# app/worker/alert_writer.py
+import logging
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db import models
+from app.db.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryCooldownIndex:
+    """Per-process record of when each (symbol, condition) last raised an alert"""
+
+    def __init__(self):
+        self._last_alert: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, symbol: str, condition: str, cooldown_seconds: float) -> bool:
+        """Return True, and start a new cooldown, if no alert was raised within the window"""
+        key = (symbol, condition)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_alert.get(key)
+            if last is not None and now - last < cooldown_seconds:
+                return False
+            self._last_alert[key] = now
+
+            # Forget keys whose cooldown has long expired so the index stays small
+            if len(self._last_alert) > 10000:
+                self._last_alert = {k: t for k, t in self._last_alert.items() if now - t < cooldown_seconds}
+            return True
+
+    def release(self, symbol: str, condition: str):
+        with self._lock:
+            self._last_alert.pop((symbol, condition), None)
+
+
+class RedisCooldownIndex:
+    """Cooldown index shared by every worker process through Redis keys with a TTL"""
+
+    def __init__(self, url: str, prefix: str = "crypto-sentry:alert-cooldown:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def acquire(self, symbol: str, condition: str, cooldown_seconds: float) -> bool:
+        return bool(self.client.set(f"{self.prefix}{symbol}:{condition}", 1, nx=True, ex=max(1, int(cooldown_seconds))))
+
+    def release(self, symbol: str, condition: str):
+        self.client.delete(f"{self.prefix}{symbol}:{condition}")
+
+
+class AlertWriter:
+    """Buffers system alerts and writes them with one bulk insert per flush
+
+    Alerts for a (symbol, condition) pair that already raised one within
+    cooldown_seconds are dropped, so a persistent anomaly produces one row
+    per cooldown window instead of one per tick.
+    """
+
+    def __init__(self, session_factory, cooldown_index, cooldown_seconds: float = 900, max_buffer: int = 10000):
+        self.session_factory = session_factory
+        self.cooldown_index = cooldown_index
+        self.cooldown_seconds = cooldown_seconds
+        self.max_buffer = max_buffer
+        # (symbol, row) pairs; the symbol is kept to release its cooldown if the row is dropped
+        self._buffer: List[Tuple[str, Dict]] = []
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.suppressed = 0
+        self.failed_flushes = 0
+
+    def add(self, symbol: str, condition: str, **fields) -> bool:
+        """Queue an alert; returns False when it was suppressed by the cooldown"""
+        try:
+            allowed = self.cooldown_index.acquire(symbol, condition, self.cooldown_seconds)
+        except Exception as e:
+            # Better a duplicate alert than a lost one when the index is unreachable
+            logger.warning(f"⚠️ Alert cooldown index unavailable: {e}")
+            allowed = True
+
+        if not allowed:
+            self.suppressed += 1
+            logger.info(f"🔕 Suppressed duplicate {condition} alert for {symbol}")
+            return False
+
+        with self._lock:
+            full = len(self._buffer) >= self.max_buffer
+            if not full:
+                self._buffer.append((symbol, dict(fields, cryptocurrency=symbol.split('-')[0], condition=condition)))
+        if full:
+            logger.error(f"❌ Alert buffer full, dropping {condition} alert for {symbol}")
+            # The alert was never written, so the next tick may raise it again
+            self._release(symbol, condition)
+            return False
+        return True
+
+    def _release(self, symbol: str, condition: str):
+        try:
+            self.cooldown_index.release(symbol, condition)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not release alert cooldown for {symbol}: {e}")
+
+    def flush(self) -> int:
+        """Insert every buffered alert with a single statement and commit"""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+        rows = [row for _, row in entries]
+
+        db = self.session_factory()
+        try:
+            db.execute(insert(models.Alert), rows)
+            db.commit()
+            self.written += len(rows)
+            logger.info(f"📝 Saved {len(rows)} alerts in one insert")
+            return len(rows)
+        except Exception as db_error:
+            logger.error(f"❌ Database error: {db_error}")
+            db.rollback()
+            self.failed_flushes += 1
+            # Keep the rows for the next flush rather than losing them
+            with self._lock:
+                kept = entries + self._buffer
+                self._buffer, dropped = kept[:self.max_buffer], kept[self.max_buffer:]
+            for symbol, row in dropped:
+                self._release(symbol, row['condition'])
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        return {
+            'buffered': len(self._buffer),
+            'written': self.written,
+            'suppressed': self.suppressed,
+            'failed_flushes': self.failed_flushes
+        }
+
+
+def build_cooldown_index(backend: str, redis_url: str):
+    """Build the cooldown index selected in the settings"""
+    if backend == 'redis':
+        return RedisCooldownIndex(redis_url)
+    if backend == 'memory':
+        return InMemoryCooldownIndex()
+    raise ValueError(f"Unknown alert cooldown backend: {backend}")
+
+
+# Global instance
+alert_writer = AlertWriter(
+    SessionLocal,
+    build_cooldown_index(settings.ALERT_COOLDOWN_BACKEND, settings.REDIS_URL),
+    cooldown_seconds=settings.ALERT_COOLDOWN_SECONDS
+)
@@ -1,6 +1,16 @@
 from celery import Celery
-from celery.schedules import crontab
+import logging
+import os
+import time
+from celery.signals import (
+    before_task_publish, celeryd_after_setup, task_postrun, task_prerun, worker_init, worker_process_init,
+    worker_process_shutdown, worker_ready
+)
 from app.core.config import settings
+from celery.exceptions import WorkerShutdown
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
 
 celery = Celery(
     "tasks",
@@ -9,10 +19,78 @@ celery = Celery(
     include=["app.worker.tasks"]
 )
 
-# Optional: Add a periodic task schedule
+# A short tick; the task itself only dispatches symbols that have a new candle due.
+# Price ticks run separately and check user price alerts.
 celery.conf.beat_schedule = {
-    'fetch-crypto-data-every-minute': {
-        'task': 'app.worker.tasks.fetch_crypto_data',
-        'schedule': crontab(minute='*'), # Runs every minute
+    'dispatch-due-analyses': {
+        'task': 'app.worker.tasks.dispatch_due_analyses',
+        'schedule': settings.SCHEDULER_TICK_SECONDS,
     },
+    'price-tick': {
+        'task': 'app.worker.tasks.price_tick',
+        'schedule': settings.PRICE_TICK_SECONDS,
+    }
 }
+
+@celeryd_after_setup.connect
+def check_scheduler_state(sender=None, instance=None, **kwargs):
+    """Refuse per-process scheduler state in a worker with several prefork children"""
+    # due() and record() run in whichever child takes the task, so they would not see each other's state
+    multi_process = instance.pool_cls.__module__.endswith('prefork') and instance.concurrency > 1
+    if settings.SCHEDULER_STATE_BACKEND == 'memory' and multi_process:
+        # Signal handlers' exceptions are only logged; WorkerShutdown stops the worker
+        logger.error(f"❌ SCHEDULER_STATE_BACKEND=memory with {instance.concurrency} worker processes: use redis or --concurrency 1")
+        raise WorkerShutdown(1)
+
+@worker_init.connect
+def preload_model(**kwargs):
+    """Load the model in the parent so prefork children share its pages copy-on-write"""
+    if settings.AI_PRELOAD_BEFORE_FORK:
+        from app.ai_model.service import ai_service
+        ai_service.ensure_loaded()
+
+@worker_process_init.connect
+def warm_up_model(**kwargs):
+    """Load and warm up the model in each worker process before it takes tasks"""
+    if settings.AI_WARMUP_ON_STARTUP:
+        from app.ai_model.service import ai_service
+        ai_service.warm_up()
+
+# Task metrics. Run workers with PROMETHEUS_MULTIPROC_DIR set so the
+# prefork children's samples are aggregated by the metrics server below.
+_task_started = {}
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """Record the publish time so the worker can measure queue lag"""
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at is not None:
+        metrics.CELERY_QUEUE_LAG_SECONDS.labels(task.name).observe(max(0.0, time.time() - float(published_at)))
+    metrics.CELERY_TASKS_IN_PROGRESS.labels(task.name).inc()
+    _task_started[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def record_task_end(task_id=None, task=None, state=None, **kwargs):
+    metrics.CELERY_TASKS_IN_PROGRESS.labels(task.name).dec()
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.CELERY_TASK_SECONDS.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """Expose worker metrics for Prometheus to scrape"""
+    if settings.WORKER_METRICS_PORT:
+        from prometheus_client import start_http_server
+        start_http_server(settings.WORKER_METRICS_PORT, registry=metrics.metrics_registry())
+
+@worker_process_shutdown.connect
+def drop_live_metrics(pid=None, **kwargs):
+    """Stop counting a finished child's in-progress gauge in multiprocess mode"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
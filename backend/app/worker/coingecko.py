@@ -0,0 +1,172 @@
+# app/worker/coingecko.py
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per `per_seconds`, with bursts up to `rate`"""
+
+    def __init__(self, rate: float, per_seconds: float = 60.0):
+        self.capacity = float(rate)
+        self.refill_per_second = rate / per_seconds
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.refill_per_second
+            time.sleep(wait)
+
+
+def build_session(pool_size: int) -> requests.Session:
+    """Session with a keep-alive connection pool; retries are handled by the caller"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/json", "User-Agent": "crypto-sentry-ai"})
+    return session
+
+
+class CoinGeckoClient:
+    """Bulk price client for CoinGecko's simple/price endpoint
+
+    Ids are sent in chunks of max_ids_per_call, so a watchlist costs
+    ceil(n / max_ids_per_call) calls per tick. Calls share a pooled
+    session, pass through a client-side rate limiter and retry timeouts,
+    connection errors, 429 and 5xx with full-jitter exponential backoff,
+    honouring Retry-After.
+    """
+
+    def __init__(self, base_url: str, max_ids_per_call: int = 250, rate_per_minute: float = 30,
+                 timeout: float = 10.0, retries: int = 3, backoff_seconds: float = 0.5,
+                 max_backoff_seconds: float = 30.0, pool_size: int = 10):
+        self.base_url = base_url.rstrip('/')
+        self.max_ids_per_call = max_ids_per_call
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.pool_size = pool_size
+        self.limiter = RateLimiter(rate_per_minute)
+        self._session: Optional[requests.Session] = None
+        self._session_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.retried = 0
+        self.rate_limited = 0
+
+    @property
+    def session(self) -> requests.Session:
+        # One pool per process: sockets must not be shared with forked Celery children
+        if self._session is None or self._session_pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    self._session = build_session(self.pool_size)
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff_seconds)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt))
+
+    def get(self, path: str, params: Dict) -> Dict:
+        """GET a JSON document, retrying transient failures"""
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            self.calls += 1
+            retry_after = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                if response.status_code == 429:
+                    self.rate_limited += 1
+                retry_after = response.headers.get("Retry-After")
+                error = requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.retries:
+                raise error
+            delay = self._backoff(attempt, retry_after)
+            self.retried += 1
+            logger.warning(f"⚠️ CoinGecko request failed ({error}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+    def simple_prices(self, ids: Iterable[str], vs_currency: str = "usd") -> Dict[str, Dict]:
+        """Price and 24h volume for every id, using as few calls as the chunk size allows"""
+        ids = sorted(set(ids))
+        prices: Dict[str, Dict] = {}
+        for i in range(0, len(ids), self.max_ids_per_call):
+            chunk = ids[i:i + self.max_ids_per_call]
+            prices.update(self.get("simple/price", {
+                "ids": ",".join(chunk),
+                "vs_currencies": vs_currency,
+                "include_24hr_vol": "true"
+            }))
+        return prices
+
+    def stats(self) -> Dict:
+        return {'calls': self.calls, 'retried': self.retried, 'rate_limited': self.rate_limited}
+
+
+def price_ticker(symbol: str) -> str:
+    """The ticker prices are keyed by: 'BTC-USD', 'btc' and the CoinGecko id 'bitcoin' all give 'BTC'"""
+    ticker = symbol.strip().split('-')[0].upper()
+    for known, cg_id in settings.COINGECKO_IDS.items():
+        if ticker == cg_id.upper():
+            return known
+    return ticker
+
+
+def coingecko_ids(symbols: List[str]) -> Dict[str, str]:
+    """Map watchlist symbols ('BTC-USD') to CoinGecko ids, skipping unknown tickers"""
+    ids = {}
+    for symbol in symbols:
+        ticker = price_ticker(symbol)
+        if ticker in settings.COINGECKO_IDS:
+            ids[ticker] = settings.COINGECKO_IDS[ticker]
+        else:
+            logger.warning(f"⚠️ No CoinGecko id configured for {ticker}, skipping its price")
+    return ids
+
+
+# Global instance
+coingecko = CoinGeckoClient(
+    settings.COINGECKO_API_URL,
+    max_ids_per_call=settings.COINGECKO_MAX_IDS_PER_CALL,
+    rate_per_minute=settings.COINGECKO_RATE_LIMIT_PER_MINUTE,
+    timeout=settings.HTTP_TIMEOUT_SECONDS,
+    retries=settings.HTTP_RETRIES,
+    pool_size=settings.HTTP_POOL_SIZE
+)
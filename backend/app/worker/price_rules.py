@@ -0,0 +1,231 @@
+# app/worker/price_rules.py
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.db import models
+from .coingecko import price_ticker
+
+logger = logging.getLogger(__name__)
+
+PRICE_CONDITIONS = ("price_above", "price_below")
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+_UPDATE_CHUNK = 500
+
+
+class _SymbolRules:
+    """Active rules for one symbol, kept in sorted threshold arrays
+
+    Both arrays are ordered so that the rules a price move crosses sit at
+    the tail: price_above rules by descending threshold (stored negated so
+    bisect can be used) and price_below rules by ascending threshold.
+    Triggered rules are then removed with an O(k) tail delete.
+    """
+
+    __slots__ = ('above_keys', 'above_ids', 'below_keys', 'below_ids')
+
+    def __init__(self):
+        self.above_keys: List[float] = []
+        self.above_ids: List[int] = []
+        self.below_keys: List[float] = []
+        self.below_ids: List[int] = []
+
+    def _side(self, condition: str) -> Tuple[List[float], List[int]]:
+        if condition == "price_above":
+            return self.above_keys, self.above_ids
+        return self.below_keys, self.below_ids
+
+    @staticmethod
+    def _key(condition: str, threshold: float) -> float:
+        return -threshold if condition == "price_above" else threshold
+
+    def add(self, rule_id: int, condition: str, threshold: float):
+        keys, ids = self._side(condition)
+        key = self._key(condition, threshold)
+        position = bisect.bisect_right(keys, key)
+        keys.insert(position, key)
+        ids.insert(position, rule_id)
+
+    def remove(self, rule_id: int, condition: str, threshold: float) -> bool:
+        keys, ids = self._side(condition)
+        key = self._key(condition, threshold)
+        position = bisect.bisect_left(keys, key)
+        while position < len(keys) and keys[position] == key:
+            if ids[position] == rule_id:
+                del keys[position]
+                del ids[position]
+                return True
+            position += 1
+        return False
+
+    def pop_crossed(self, price: float) -> List[int]:
+        """Remove and return every rule the price has reached, in O(log n + k)"""
+        crossed: List[int] = []
+
+        # price_above: threshold <= price  <=>  -threshold >= -price
+        position = bisect.bisect_left(self.above_keys, -price)
+        if position < len(self.above_keys):
+            crossed.extend(self.above_ids[position:])
+            del self.above_keys[position:]
+            del self.above_ids[position:]
+
+        # price_below: threshold >= price
+        position = bisect.bisect_left(self.below_keys, price)
+        if position < len(self.below_keys):
+            crossed.extend(self.below_ids[position:])
+            del self.below_keys[position:]
+            del self.below_ids[position:]
+
+        return crossed
+
+    def __len__(self) -> int:
+        return len(self.above_ids) + len(self.below_ids)
+
+
+class PriceRuleEngine:
+    """Evaluates user price_above / price_below alerts against price ticks
+
+    Active rules are indexed per ticker (the user-entered symbol
+    normalised with price_ticker, the way prices are keyed) in sorted
+    threshold arrays, so a tick finds the crossed rules with a bisect
+    instead of scanning every alert row. Rules can be added and removed one at a time; the worker
+    picks up newly created alerts with sync_new_rules() and rebuilds the
+    index from the database periodically to catch edits and deletions.
+    """
+
+    def __init__(self):
+        self._symbols: Dict[str, _SymbolRules] = {}
+        self._rules: Dict[int, Tuple[str, str, float]] = {}
+        self._lock = threading.Lock()
+        self.max_loaded_id = 0
+        self.loaded_at: Optional[float] = None
+
+    def load_rules(self, rules: Iterable[Tuple[int, str, str, float]]):
+        """Replace the index with (id, symbol, condition, threshold) rules, sorting once"""
+        grouped: Dict[str, Dict[str, List[Tuple[float, int]]]] = {}
+        registry: Dict[int, Tuple[str, str, float]] = {}
+        max_id = 0
+
+        for rule_id, symbol, condition, threshold in rules:
+            if condition not in PRICE_CONDITIONS or threshold is None:
+                continue
+            threshold = float(threshold)
+            symbol = price_ticker(symbol)
+            key = -threshold if condition == "price_above" else threshold
+            grouped.setdefault(symbol, {}).setdefault(condition, []).append((key, rule_id))
+            registry[rule_id] = (symbol, condition, threshold)
+            max_id = max(max_id, rule_id)
+
+        symbols: Dict[str, _SymbolRules] = {}
+        for symbol, by_condition in grouped.items():
+            rules_for_symbol = _SymbolRules()
+            for condition, entries in by_condition.items():
+                entries.sort()
+                keys, ids = rules_for_symbol._side(condition)
+                keys.extend(key for key, _ in entries)
+                ids.extend(rule_id for _, rule_id in entries)
+            symbols[symbol] = rules_for_symbol
+
+        with self._lock:
+            self._symbols = symbols
+            self._rules = registry
+            self.max_loaded_id = max_id
+            self.loaded_at = time.monotonic()
+
+    def add_rule(self, rule_id: int, symbol: str, condition: str, threshold: float):
+        if condition not in PRICE_CONDITIONS or threshold is None:
+            return
+        symbol = price_ticker(symbol)
+        with self._lock:
+            if rule_id in self._rules:
+                self._remove(rule_id)
+            self._symbols.setdefault(symbol, _SymbolRules()).add(rule_id, condition, float(threshold))
+            self._rules[rule_id] = (symbol, condition, float(threshold))
+            self.max_loaded_id = max(self.max_loaded_id, rule_id)
+
+    def remove_rule(self, rule_id: int) -> bool:
+        with self._lock:
+            return self._remove(rule_id)
+
+    def _remove(self, rule_id: int) -> bool:
+        rule = self._rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        symbol, condition, threshold = rule
+        return self._symbols[symbol].remove(rule_id, condition, threshold)
+
+    def evaluate(self, symbol: str, price: float) -> List[int]:
+        """Return the ids of the rules this price crossed and drop them from the index"""
+        with self._lock:
+            rules = self._symbols.get(symbol)
+            if rules is None:
+                return []
+            crossed = rules.pop_crossed(float(price))
+            for rule_id in crossed:
+                del self._rules[rule_id]
+            return crossed
+
+    def evaluate_many(self, prices: Dict[str, float]) -> Dict[str, List[int]]:
+        """Evaluate one tick of prices; returns symbol -> crossed rule ids"""
+        triggered = {}
+        for symbol, price in prices.items():
+            crossed = self.evaluate(symbol, price)
+            if crossed:
+                triggered[symbol] = crossed
+        return triggered
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    # Database integration
+
+    def load_from_db(self, db: Session):
+        """Rebuild the index from every active price alert"""
+        rows = db.query(
+            models.Alert.id, models.Alert.cryptocurrency, models.Alert.condition, models.Alert.threshold_value
+        ).filter(
+            models.Alert.condition.in_(PRICE_CONDITIONS),
+            models.Alert.is_triggered.is_(False)
+        ).yield_per(10000)
+        self.load_rules(rows)
+        logger.info(f"📚 Loaded {len(self)} active price rules")
+
+    def sync_new_rules(self, db: Session) -> int:
+        """Add alerts created since the last load or sync, using the id as a watermark"""
+        rows = db.query(
+            models.Alert.id, models.Alert.cryptocurrency, models.Alert.condition, models.Alert.threshold_value
+        ).filter(
+            models.Alert.id > self.max_loaded_id,
+            models.Alert.condition.in_(PRICE_CONDITIONS),
+            models.Alert.is_triggered.is_(False)
+        ).order_by(models.Alert.id).all()
+
+        for rule_id, symbol, condition, threshold in rows:
+            self.add_rule(rule_id, symbol, condition, threshold)
+        return len(rows)
+
+    @staticmethod
+    def mark_triggered(db: Session, triggered: Dict[str, List[int]], prices: Dict[str, float]) -> int:
+        """Mark matched rules triggered with one UPDATE per symbol (chunked) and a single commit"""
+        updated = 0
+        for symbol, rule_ids in triggered.items():
+            for i in range(0, len(rule_ids), _UPDATE_CHUNK):
+                chunk = rule_ids[i:i + _UPDATE_CHUNK]
+                result = db.execute(
+                    update(models.Alert)
+                    .where(models.Alert.id.in_(chunk), models.Alert.is_triggered.is_(False))
+                    .values(is_triggered=True, current_value=prices[symbol])
+                )
+                updated += result.rowcount
+        db.commit()
+        return updated
+
+
+# Global instance, one per worker process
+price_rule_engine = PriceRuleEngine()
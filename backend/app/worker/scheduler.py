@@ -0,0 +1,158 @@
+# app/worker/scheduler.py
+import json
+import logging
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import SCHEDULER_DECISIONS
+
+logger = logging.getLogger(__name__)
+
+
+class InMemorySchedulerState:
+    """Per-process record of the last analysed candle and dispatch time per (symbol, interval)"""
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, interval: str, symbols: Iterable[str]) -> Dict[str, Dict]:
+        with self._lock:
+            return {symbol: dict(self._states.get((symbol, interval), {})) for symbol in symbols}
+
+    def set_many(self, interval: str, states: Dict[str, Dict]):
+        with self._lock:
+            for symbol, state in states.items():
+                self._states[(symbol, interval)] = dict(state)
+
+
+class RedisSchedulerState:
+    """Scheduler state in one Redis hash per interval, shared by every worker process"""
+
+    def __init__(self, url: str, prefix: str = "crypto-sentry:scheduler:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get_many(self, interval: str, symbols: Iterable[str]) -> Dict[str, Dict]:
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        values = self.client.hmget(self.prefix + interval, symbols)
+        return {symbol: json.loads(raw) if raw else {} for symbol, raw in zip(symbols, values)}
+
+    def set_many(self, interval: str, states: Dict[str, Dict]):
+        if states:
+            self.client.hset(self.prefix + interval, mapping={symbol: json.dumps(state) for symbol, state in states.items()})
+
+
+def _candle_epoch(candle: str) -> float:
+    return datetime.fromisoformat(candle).timestamp()
+
+
+class ChangeAwareScheduler:
+    """Decides which (symbol, interval) pairs have a new candle worth analysing
+
+    Analyses only use closed candles. A symbol whose last analysed candle
+    opened at C has no newer closed candle before the next one closes at
+    C + 2 * interval, so it is skipped until then, plus a fixed
+    settle delay for provider latency and a per-symbol jitter (a stable
+    hash of the symbol, up to jitter_fraction of the interval) so hundreds
+    of symbols do not all fire in the same second. Each tick returns the
+    symbols due before the next tick with the delay until their due time,
+    so the jitter is not rounded to the tick. A dispatched symbol is not
+    dispatched again for retry_seconds, which covers both the analysis in
+    flight and a provider that has not published the candle yet.
+    """
+
+    def __init__(self, state, tick_seconds: float = 15, settle_seconds: float = 5, jitter_fraction: float = 0.1,
+                 max_jitter_seconds: float = 300, retry_seconds: float = 60):
+        self.state = state
+        self.tick_seconds = tick_seconds
+        self.settle_seconds = settle_seconds
+        self.jitter_fraction = jitter_fraction
+        self.max_jitter_seconds = max_jitter_seconds
+        self.retry_seconds = retry_seconds
+
+    @staticmethod
+    def _interval_seconds(interval: str) -> float:
+        from app.ai_model.market_data import interval_to_timedelta
+
+        return interval_to_timedelta(interval).total_seconds()
+
+    def offset(self, symbol: str, interval: str) -> float:
+        """Seconds after a candle opens before this symbol is analysed; stable across processes"""
+        window = min(self._interval_seconds(interval) * self.jitter_fraction, self.max_jitter_seconds)
+        fraction = zlib.crc32(f"{symbol}:{interval}".encode()) / 0xFFFFFFFF
+        return self.settle_seconds + fraction * window
+
+    def due(self, symbols: List[str], interval: str, now: Optional[float] = None) -> Tuple[Dict[str, float], Dict[str, int]]:
+        """Return {symbol: seconds to wait before analysing} for this tick, marking them dispatched, and the decision counts"""
+        now = time.time() if now is None else now
+        period = self._interval_seconds(interval)
+        retry = min(self.retry_seconds, period)
+
+        due, counts = {}, {'executed': 0, 'skipped': 0, 'pending': 0}
+        states = self.state.get_many(interval, symbols)
+        for symbol, state in states.items():
+            candle = state.get('candle')
+            offset = self.offset(symbol, interval)
+            if candle is not None and candle + 2 * period + offset >= now + self.tick_seconds:
+                # The next candle has not closed yet
+                counts['skipped'] += 1
+            elif now - state.get('dispatched_at', 0) < retry:
+                # Dispatched recently: still running, or the provider is behind
+                counts['pending'] += 1
+            else:
+                # Never analysed: run now, spread over the jitter window
+                due[symbol] = offset - self.settle_seconds if candle is None else max(0.0, candle + 2 * period + offset - now)
+                counts['executed'] += 1
+
+        if due:
+            self.state.set_many(interval, {symbol: dict(states[symbol], dispatched_at=now + delay) for symbol, delay in due.items()})
+        for decision, count in counts.items():
+            SCHEDULER_DECISIONS.labels(interval, decision).inc(count)
+        return due, counts
+
+    def record(self, interval: str, results: Dict[str, Dict]):
+        """Remember the newest candle each successful analysis used"""
+        candles = {
+            symbol: _candle_epoch(result['candle'])
+            for symbol, result in results.items()
+            if result.get('candle') and not result.get('error')
+        }
+        if not candles:
+            return
+        states = self.state.get_many(interval, candles)
+        updates = {}
+        for symbol, candle in candles.items():
+            state = states[symbol]
+            if candle > state.get('candle', float('-inf')):
+                # dispatched_at is kept so a feed that stopped updating is retried at most every retry_seconds
+                updates[symbol] = dict(state, candle=candle)
+        self.state.set_many(interval, updates)
+
+
+def build_scheduler_state(backend: str, redis_url: str):
+    """Build the scheduler state store selected in the settings"""
+    if backend == 'redis':
+        return RedisSchedulerState(redis_url)
+    if backend == 'memory':
+        return InMemorySchedulerState()
+    raise ValueError(f"Unknown scheduler state backend: {backend}")
+
+
+# Global instance
+scheduler = ChangeAwareScheduler(
+    build_scheduler_state(settings.SCHEDULER_STATE_BACKEND, settings.REDIS_URL),
+    tick_seconds=settings.SCHEDULER_TICK_SECONDS,
+    settle_seconds=settings.SCHEDULER_SETTLE_SECONDS,
+    jitter_fraction=settings.SCHEDULER_JITTER_FRACTION,
+    max_jitter_seconds=settings.SCHEDULER_MAX_JITTER_SECONDS,
+    retry_seconds=settings.SCHEDULER_RETRY_SECONDS
+)
@@ -1,69 +1,71 @@
 # app/worker/tasks.py
 import requests
+from typing import Dict, List, Optional
+from celery import chord
+from celery.exceptions import SoftTimeLimitExceeded
 from .celery_app import celery
 import logging
 from app.ai_model.service import ai_service
-from app.db.base import get_db
-from app.db import models
-from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.pubsub import publish_result
+from .alert_writer import alert_writer
+from .coingecko import coingecko, coingecko_ids
+from .price_rules import price_rule_engine
+from .scheduler import scheduler
+from app.db.base import SessionLocal
+import time
 
 logger = logging.getLogger(__name__)
 
 @celery.task
-def fetch_crypto_data():
+def fetch_crypto_data(symbol: str = "BTC-USD", interval: str = "1d"):
     """
     Enhanced task to fetch crypto data and run AI anomaly detection
     """
     logger.info("🤖 Starting crypto data fetch and AI analysis...")
 
     try:
-        # 1. Fetch Bitcoin price from CoinGecko (your existing code)
-        url = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_24hr_vol=true"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        btc_price = data['bitcoin']['usd']
-        btc_volume = data['bitcoin']['usd_24h_vol']
+        # 1. Fetch prices for the whole watchlist in bulk simple/price calls
+        ids = coingecko_ids(settings.WATCHLIST + [symbol])
+        data = coingecko.simple_prices(ids.values())
+        prices = {ticker: data[cg_id]['usd'] for ticker, cg_id in ids.items() if cg_id in data}
+        volumes = {ticker: data[cg_id].get('usd_24h_vol') for ticker, cg_id in ids.items() if cg_id in data}
+        btc_price = prices.get('BTC')
+        btc_volume = volumes.get('BTC')
 
-        logger.info(f"✅ Successfully fetched Bitcoin data: Price=${btc_price}, Volume=${btc_volume}")
+        logger.info(f"✅ Fetched {len(prices)} prices from CoinGecko: BTC=${btc_price}, Volume=${btc_volume}")
+
+        # Check user price alerts against the new prices
+        evaluate_price_rules(prices)
 
         # 2. Run AI Anomaly Detection
         logger.info("🔍 Running AI anomaly detection...")
-        ai_result = ai_service.check_market_anomaly("BTC-USD")
+        ai_result = ai_service.check_market_anomaly(symbol, interval)
+        publish_result(symbol, ai_result)
 
         # 3. If anomaly detected, create alert in database
         if ai_result.get('is_anomaly') and not ai_result.get('error'):
             logger.info(f"🚨 AI detected anomaly! Score: {ai_result['anomaly_score']:.3f}")
 
-            # Get database session
-            db: Session = next(get_db())
-            try:
-                # Create system alert for the anomaly
-                alert = models.Alert(
-                    cryptocurrency="BTC",
-                    condition="ai_anomaly",
-                    threshold_value=ai_result['threshold'],
-                    current_value=ai_result['reconstruction_error'],
-                    is_triggered=True,
-                    owner_id=None,  # System-generated alert
-                    message=f"AI detected market anomaly: Score {ai_result['anomaly_score']:.3f} (Error: {ai_result['reconstruction_error']:.4f})"
-                )
-                db.add(alert)
-                db.commit()
-                logger.info("📝 Anomaly alert saved to database")
-
-            except Exception as db_error:
-                logger.error(f"❌ Database error: {db_error}")
-                db.rollback()
-            finally:
-                db.close()
+            # Create system alert for the anomaly, unless one is still cooling down
+            alert_writer.add(
+                symbol,
+                "ai_anomaly",
+                threshold_value=ai_result['threshold'],
+                current_value=ai_result['reconstruction_error'],
+                is_triggered=True,
+                owner_id=None,  # System-generated alert
+                message=f"AI detected market anomaly: Score {ai_result['anomaly_score']:.3f} (Error: {ai_result['reconstruction_error']:.4f})"
+            )
+            alert_writer.flush()
         else:
             logger.info("✅ No anomalies detected by AI")
 
         return {
             "price_data": {
                 "btc_price": btc_price,
-                "btc_volume": btc_volume
+                "btc_volume": btc_volume,
+                "prices": prices
             },
             "ai_analysis": ai_result,
             "message": "Data fetch and AI analysis completed successfully"
@@ -77,7 +79,22 @@ def fetch_crypto_data():
         return {"error": str(e)}
 
 @celery.task
-def run_ai_analysis_only():
+def price_tick():
+    """
+    Fetch every configured coin's price in bulk and check user price
+    alerts against them
+    """
+    try:
+        data = coingecko.simple_prices(settings.COINGECKO_IDS.values())
+        prices = {ticker: data[cg_id]['usd'] for ticker, cg_id in settings.COINGECKO_IDS.items() if cg_id in data}
+        logger.info(f"💱 Price tick: {len(prices)} prices from CoinGecko")
+        return {"prices": prices, "rules": evaluate_price_rules(prices)}
+    except requests.exceptions.RequestException as e:
+        logger.error(f"❌ Error fetching prices from CoinGecko: {e}")
+        return {"error": "Failed to fetch price data"}
+
+@celery.task
+def run_ai_analysis_only(symbol: str = "BTC-USD", interval: str = "1d"):
     """
     Task to run only AI analysis without fetching new price data
     Useful for more frequent anomaly checks
@@ -85,29 +102,21 @@ def run_ai_analysis_only():
     logger.info("🧠 Running standalone AI analysis...")
 
     try:
-        ai_result = ai_service.check_market_anomaly("BTC-USD")
+        ai_result = ai_service.check_market_anomaly(symbol, interval)
+        publish_result(symbol, ai_result)
 
         # Create alert if anomaly detected
         if ai_result.get('is_anomaly') and not ai_result.get('error'):
-            db: Session = next(get_db())
-            try:
-                alert = models.Alert(
-                    cryptocurrency="BTC",
-                    condition="ai_anomaly",
-                    threshold_value=ai_result['threshold'],
-                    current_value=ai_result['reconstruction_error'],
-                    is_triggered=True,
-                    owner_id=None,
-                    message=f"AI Anomaly Detected: Score {ai_result['anomaly_score']:.3f}"
-                )
-                db.add(alert)
-                db.commit()
-                logger.info("🚨 Anomaly alert created")
-            except Exception as db_error:
-                logger.error(f"Database error: {db_error}")
-                db.rollback()
-            finally:
-                db.close()
+            alert_writer.add(
+                symbol,
+                "ai_anomaly",
+                threshold_value=ai_result['threshold'],
+                current_value=ai_result['reconstruction_error'],
+                is_triggered=True,
+                owner_id=None,
+                message=f"AI Anomaly Detected: Score {ai_result['anomaly_score']:.3f}"
+            )
+            alert_writer.flush()
 
         return {
             "ai_analysis": ai_result,
@@ -117,3 +126,138 @@ def run_ai_analysis_only():
     except Exception as e:
         logger.error(f"Error in AI analysis: {e}")
         return {"error": str(e)}
+
+
+def _chunks(symbols: List[str], size: int) -> List[List[str]]:
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+def _dispatch_chunks(symbols: List[str], interval: str, delays: Optional[Dict[str, float]] = None) -> List[List[str]]:
+    """Chord of chunk analyses, each started once its last symbol is due, with one persist step"""
+    delays = delays or {}
+    chunks = _chunks(sorted(symbols, key=lambda symbol: delays.get(symbol, 0.0)), settings.WATCHLIST_CHUNK_SIZE)
+    chord(
+        analyze_symbol_chunk.s(chunk, interval).set(countdown=max(delays.get(symbol, 0.0) for symbol in chunk))
+        for chunk in chunks
+    )(persist_analysis_results.s())
+    return chunks
+
+@celery.task
+def dispatch_due_analyses(intervals: Optional[List[str]] = None):
+    """
+    Scheduler tick: analyse only the watchlist symbols whose next candle
+    is due, per interval
+    """
+    report = {}
+    for interval in intervals or settings.WATCHLIST_INTERVALS:
+        due, counts = scheduler.due(settings.WATCHLIST, interval)
+        if due:
+            _dispatch_chunks(list(due), interval, due)
+        report[interval] = counts
+
+    logger.info(f"🗓️ Scheduler tick: {report}")
+    return report
+
+@celery.task
+def analyze_watchlist(symbols: Optional[List[str]] = None, interval: str = "1d"):
+    """
+    Fan the watchlist out into chunks analysed in parallel by the workers,
+    then persist every chunk's anomalies in one step
+    """
+    symbols = symbols or settings.WATCHLIST
+    chunks = _dispatch_chunks(symbols, interval)
+    logger.info(f"🛰️ Dispatched {len(symbols)} symbols in {len(chunks)} chunks")
+
+    return {"symbols": len(symbols), "chunks": len(chunks)}
+
+@celery.task(
+    bind=True,
+    autoretry_for=(ConnectionError, TimeoutError),
+    retry_backoff=True,
+    max_retries=2,
+    soft_time_limit=settings.WATCHLIST_CHUNK_TIME_LIMIT_SECONDS,
+    time_limit=settings.WATCHLIST_CHUNK_TIME_LIMIT_SECONDS + 10
+)
+def analyze_symbol_chunk(self, symbols: List[str], interval: str = "1d") -> Dict[str, Dict]:
+    """
+    Fetch market data for a chunk of symbols concurrently and score them
+    with one batched forward pass
+    """
+    try:
+        results = ai_service.check_market_anomaly_batch(
+            symbols, interval, fetch_timeout=settings.WATCHLIST_SYMBOL_TIMEOUT_SECONDS
+        )
+        scheduler.record(interval, results)
+        # Push to live dashboards now rather than after the whole chord finishes
+        for symbol, result in results.items():
+            if not result.get('error'):
+                publish_result(symbol, dict(result, interval=interval))
+        return results
+    except SoftTimeLimitExceeded:
+        logger.error(f"⏱️ Chunk of {len(symbols)} symbols hit the time limit")
+        return {
+            symbol: {'error': 'Chunk time limit exceeded', 'is_anomaly': False, 'anomaly_score': 0.0}
+            for symbol in symbols
+        }
+
+@celery.task
+def persist_analysis_results(chunk_results: List[Dict[str, Dict]]):
+    """
+    Collect every chunk's results, save the anomalies with one bulk insert
+    and fold the scores into the adaptive thresholds
+    """
+    results = {symbol: result for chunk in chunk_results for symbol, result in chunk.items()}
+    # The only writer of the threshold sketches, so concurrent workers cannot overwrite each other
+    observed = ai_service.observe_scores(results)
+    anomalies = {
+        symbol: result for symbol, result in results.items()
+        if result.get('is_anomaly') and not result.get('error')
+    }
+    errors = [symbol for symbol, result in results.items() if result.get('error')]
+
+    for symbol, result in anomalies.items():
+        alert_writer.add(
+            symbol,
+            "ai_anomaly",
+            threshold_value=result['threshold'],
+            current_value=result['reconstruction_error'],
+            is_triggered=True,
+            owner_id=None,
+            message=f"AI Anomaly Detected for {symbol}: Score {result['anomaly_score']:.3f}"
+        )
+    saved = alert_writer.flush()
+
+    logger.info(f"✅ Watchlist analysis done: {len(results)} symbols, {len(anomalies)} anomalies, {saved} alerts saved, {observed} thresholds updated, {len(errors)} errors")
+    return {
+        "symbols": len(results),
+        "anomalies": sorted(anomalies),
+        "alerts_saved": saved,
+        "thresholds_updated": observed,
+        "errors": sorted(errors)
+    }
+
+@celery.task
+def evaluate_price_rules(prices: Dict[str, float]):
+    """
+    Check user price_above / price_below alerts against a tick of prices
+    and mark every crossed rule triggered in bulk
+    """
+    db = SessionLocal()
+    try:
+        # Pick up new alerts incrementally; rebuild now and then to catch edits and deletions
+        if price_rule_engine.loaded_at is None or time.monotonic() - price_rule_engine.loaded_at > settings.PRICE_RULES_RESYNC_SECONDS:
+            price_rule_engine.load_from_db(db)
+        else:
+            price_rule_engine.sync_new_rules(db)
+
+        triggered = price_rule_engine.evaluate_many(prices)
+        updated = price_rule_engine.mark_triggered(db, triggered, prices) if triggered else 0
+        if updated:
+            logger.info(f"🔔 Triggered {updated} price alerts")
+
+        return {"triggered": updated, "active_rules": len(price_rule_engine)}
+    except Exception as e:
+        logger.error(f"❌ Error evaluating price alerts: {e}")
+        db.rollback()
+        return {"error": str(e)}
+    finally:
+        db.close()
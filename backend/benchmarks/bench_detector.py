@@ -0,0 +1,167 @@
+"""
+Micro-benchmarks for the anomaly detection hot path.
+
+Runs fully offline on synthetic OHLCV: feature engineering, scaler
+transform, model inference, detect_anomaly, check_market_anomaly against
+a stubbed market data provider and the demo fallback, across history
+lengths and symbol counts. Records median/p95 time and peak traced
+memory per case.
+
+    python -m benchmarks.bench_detector --save-baseline
+    python -m benchmarks.bench_detector --max-regression 15   # exits 1 on regression
+
+Baselines are machine-specific; record one on the machine you compare on.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from app.ai_model.anomaly_detector import CryptoAnomalyDetector
+from app.ai_model.cache import InMemoryCacheBackend, ResultCache
+from app.ai_model.fallback import FallbackModelCache
+from app.ai_model.market_data import CandleStore
+from app.ai_model.model_set import ModelSet
+from app.ai_model.service import AIService
+from benchmarks.harness import compare, load_baseline, measure, print_table, save_baseline
+from benchmarks.synthetic import SyntheticProvider, synthetic_ohlcv
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "ai_model", "model_artifacts")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "detector.json")
+
+
+def load_detector(backend: str) -> CryptoAnomalyDetector:
+    return CryptoAnomalyDetector(
+        os.path.join(ARTIFACTS_DIR, "lstm_autoencoder.h5"),
+        os.path.join(ARTIFACTS_DIR, "scaler.pkl"),
+        os.path.join(ARTIFACTS_DIR, "model_metadata.pkl"),
+        backend=backend
+    )
+
+
+def padded_history(detector: CryptoAnomalyDetector, periods: int, seed: int):
+    """Synthetic OHLCV plus constant columns for model features calculate_basic_features does not produce
+
+    Without the padding detect_anomaly stops at the feature check and the
+    scaler and model would never be timed.
+    """
+    data = synthetic_ohlcv(periods, seed=seed)
+    computed = detector.calculate_basic_features(data.head(60)).columns
+    for name in detector.feature_names:
+        if name not in computed:
+            data[name] = 0.0
+    return data
+
+
+def build_service(detector: CryptoAnomalyDetector, store_dir: str, history: int) -> AIService:
+    """AIService with the given detector and an offline candle store"""
+    service = AIService()
+    service.candle_store = CandleStore(store_dir, SyntheticProvider(history), refresh_seconds=3600)
+    service.active = ModelSet("bench", detector, {"1d": detector}, ARTIFACTS_DIR)
+    service._load_attempted = True
+    return service
+
+
+def run(args) -> dict:
+    detector = load_detector(args.backend)
+    seq = detector.sequence_length
+    results = {}
+
+    for n in args.history:
+        data = padded_history(detector, n, seed=n)
+        processed = detector.calculate_basic_features(data)
+        window = processed[detector.feature_names].tail(seq)
+        full = processed[detector.feature_names].replace([np.inf, -np.inf], np.nan).ffill().bfill()
+
+        results[f"features[n={n}]"] = measure(lambda: detector.calculate_basic_features(data), args.repeat)
+        results[f"scaler_transform[rows={n}]"] = measure(lambda: detector.scaler.transform(full), args.repeat)
+        results[f"detect_anomaly[n={n}]"] = measure(lambda: detector.detect_anomaly(data), args.repeat)
+
+    results[f"scaler_transform[rows={seq}]"] = measure(lambda: detector.scaler.transform(window), args.repeat)
+
+    for batch in args.batch:
+        x = np.random.default_rng(batch).standard_normal((batch, seq, len(detector.feature_names))).astype(np.float32)
+        results[f"predict[batch={batch}]"] = measure(lambda: detector.model.predict(x, verbose=0), args.repeat)
+
+    # Demo fallback, with and without the fitted-model cache
+    service = AIService()
+    for n in args.history:
+        data = synthetic_ohlcv(n, seed=n)
+        results[f"demo_analysis_cached[n={n}]"] = measure(lambda: service._demo_analysis(data, "BTC-USD"), args.repeat)
+
+        def uncached():
+            service.fallback_models = FallbackModelCache()
+            service._demo_analysis(data, "BTC-USD")
+
+        results[f"demo_analysis_refit[n={n}]"] = measure(uncached, max(3, args.repeat // 5), warmup=1)
+
+    # Full request path against a stubbed provider: cold misses the result cache every call
+    statuses = {}
+    with tempfile.TemporaryDirectory() as store_dir:
+        for count in args.symbols:
+            service = build_service(detector, store_dir, history=max(args.history))
+            symbols = [f"SYM{i}-USD" for i in range(count)]
+            for symbol in symbols:
+                service.candle_store.sync(symbol, "1d", "60d")
+
+            def cold():
+                service.result_cache = ResultCache(InMemoryCacheBackend())
+                for symbol in symbols:
+                    statuses[symbol] = service.check_market_anomaly(symbol).get('model_status')
+
+            def warm():
+                for symbol in symbols:
+                    service.check_market_anomaly(symbol)
+
+            results[f"check_market_anomaly_cold[symbols={count}]"] = measure(cold, max(3, args.repeat // 5), warmup=1)
+            results[f"check_market_anomaly_cached[symbols={count}]"] = measure(warm, args.repeat)
+
+    return results, sorted(set(statuses.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="numpy", choices=("numpy", "keras"))
+    parser.add_argument("--history", type=int, nargs="+", default=[60, 500, 5000])
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 64])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown in percent")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    # Detector errors on the expected fallback path would drown the table
+    logging.disable(logging.ERROR)
+    results, statuses = run(args)
+    meta = {'backend': args.backend, 'repeat': args.repeat, 'check_market_anomaly_model_status': statuses}
+
+    baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) and not args.save_baseline else None
+    if args.json:
+        print(json.dumps({'meta': meta, 'results': results}, indent=2))
+    else:
+        print_table(results, baseline)
+        print(f"\ncheck_market_anomaly model_status: {statuses}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, meta)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.max_regression}%:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.max_regression}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for the shared inference server against per-process models.
+
+Starts N client processes that each score single windows as fast as they
+can, first with their own NumPy model copy, then through the inference
+server (started as a subprocess). Reports windows per second, the mean
+batch size the server reached, and the model memory each client holds.
+
+    python -m benchmarks.bench_inference_server --clients 8 --seconds 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.ai_model.inference_server import RemoteModel, server_stats
+from app.ai_model.numpy_backend import load_inference_model
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "ai_model", "model_artifacts")
+MODEL_PATH = os.path.join(ARTIFACTS_DIR, "lstm_autoencoder.h5")
+
+
+def client(backend: str, socket_path: str, seconds: float, seed: int, results):
+    tracemalloc.start()
+    if backend == "remote":
+        model = RemoteModel(MODEL_PATH, socket_path)
+    else:
+        model = load_inference_model(MODEL_PATH, backend)
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    x = np.random.default_rng(seed).standard_normal((1, 10, 12)).astype(np.float32)
+    model.predict(x)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        model.predict(x)
+        count += 1
+    results.put((count, model_bytes))
+
+
+def run_clients(backend: str, clients: int, seconds: float, socket_path: str) -> dict:
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=client, args=(backend, socket_path, seconds, i, results))
+        for i in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {
+        'windows_per_second': round(sum(count for count, _ in outcomes) / seconds, 1),
+        'model_kib_per_client': round(np.mean([size for _, size in outcomes]) / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    env = dict(os.environ, MODEL_ARTIFACTS_DIR=ARTIFACTS_DIR)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.ai_model.inference_server", "--socket", socket_path, "--backend", "numpy",
+         "--max-batch-size", str(args.max_batch_size), "--max-wait-ms", str(args.max_wait_ms), "--metrics-port", "0"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while not os.path.exists(socket_path):
+            if server.poll() is not None:
+                sys.exit(f"Inference server exited with code {server.returncode}")
+            if time.monotonic() > deadline:
+                sys.exit("Inference server did not start within 60s")
+            time.sleep(0.05)
+
+        report = {}
+        for clients in args.clients:
+            before = server_stats(socket_path)
+            local = run_clients("numpy", clients, args.seconds, socket_path)
+            remote = run_clients("remote", clients, args.seconds, socket_path)
+            after = server_stats(socket_path)
+            batches = after['batches'] - before['batches']
+            remote['mean_batch_size'] = round((after['windows'] - before['windows']) / batches, 2) if batches else 0.0
+            report[f"clients={clients}"] = {'local': local, 'server': remote}
+        print(json.dumps(report, indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
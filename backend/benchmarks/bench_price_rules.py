@@ -0,0 +1,112 @@
+"""
+Benchmark for the indexed price-rule engine.
+
+Loads a million price_above / price_below rules spread over a set of
+symbols, then replays price ticks and compares the bisect-based engine
+with a naive scan over every rule.
+
+    python -m benchmarks.bench_price_rules --rules 1000000 --ticks 200
+"""
+import argparse
+import json
+import random
+import time
+
+from app.worker.price_rules import PriceRuleEngine
+
+
+def generate_rules(count: int, symbols: int, seed: int):
+    rng = random.Random(seed)
+    base_prices = {f"SYM{i}": rng.uniform(1, 50000) for i in range(symbols)}
+    names = list(base_prices)
+    rules = []
+    for rule_id in range(1, count + 1):
+        symbol = rng.choice(names)
+        condition = rng.choice(("price_above", "price_below"))
+        # Thresholds within +-20% of the starting price, on the side that has not triggered yet
+        offset = rng.uniform(0.001, 0.2)
+        factor = 1 + offset if condition == "price_above" else 1 - offset
+        rules.append((rule_id, symbol, condition, base_prices[symbol] * factor))
+    return rules, base_prices
+
+
+def generate_ticks(base_prices, ticks: int, seed: int):
+    rng = random.Random(seed + 1)
+    prices = dict(base_prices)
+    out = []
+    for _ in range(ticks):
+        # Small random walk, roughly what a one-minute tick looks like
+        prices = {s: p * (1 + rng.gauss(0, 0.002)) for s, p in prices.items()}
+        out.append(prices)
+    return out
+
+
+def naive_scan(rules, active, prices):
+    crossed = []
+    for rule_id, symbol, condition, threshold in rules:
+        if rule_id not in active:
+            continue
+        price = prices[symbol]
+        if (condition == "price_above" and price >= threshold) or (condition == "price_below" and price <= threshold):
+            crossed.append(rule_id)
+    active.difference_update(crossed)
+    return crossed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--naive-ticks", type=int, default=3, help="ticks to time the naive scan on (it is slow)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rules, base_prices = generate_rules(args.rules, args.symbols, args.seed)
+    ticks = generate_ticks(base_prices, args.ticks, args.seed)
+
+    engine = PriceRuleEngine()
+    started = time.perf_counter()
+    engine.load_rules(rules)
+    load_seconds = time.perf_counter() - started
+
+    tick_seconds = []
+    triggered_total = 0
+    for prices in ticks:
+        started = time.perf_counter()
+        triggered = engine.evaluate_many(prices)
+        tick_seconds.append(time.perf_counter() - started)
+        triggered_total += sum(len(ids) for ids in triggered.values())
+
+    # Incremental updates against the loaded index
+    started = time.perf_counter()
+    for rule_id in range(args.rules + 1, args.rules + 1001):
+        engine.add_rule(rule_id, "SYM0", "price_above", base_prices["SYM0"] * 1.5)
+    for rule_id in range(args.rules + 1, args.rules + 1001):
+        engine.remove_rule(rule_id)
+    update_seconds = (time.perf_counter() - started) / 2000
+
+    active = {rule[0] for rule in rules}
+    naive_seconds = []
+    for prices in ticks[:args.naive_ticks]:
+        started = time.perf_counter()
+        naive_scan(rules, active, prices)
+        naive_seconds.append(time.perf_counter() - started)
+
+    tick_seconds.sort()
+    report = {
+        "rules": args.rules,
+        "symbols": args.symbols,
+        "ticks": args.ticks,
+        "load_seconds": round(load_seconds, 3),
+        "tick_p50_ms": round(tick_seconds[len(tick_seconds) // 2] * 1000, 3),
+        "tick_max_ms": round(tick_seconds[-1] * 1000, 3),
+        "triggered_total": triggered_total,
+        "add_or_remove_us": round(update_seconds * 1e6, 2),
+        "naive_scan_tick_ms": round(sum(naive_seconds) / len(naive_seconds) * 1000, 3) if naive_seconds else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
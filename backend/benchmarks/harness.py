@@ -0,0 +1,99 @@
+"""
+Timing, peak-memory and baseline helpers shared by the benchmark scripts.
+"""
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+
+def measure(fn: Callable, repeat: int = 20, warmup: int = 2) -> Dict:
+    """Time fn over `repeat` calls after `warmup` calls, then record its peak traced memory"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    gc.collect()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+
+    # Separate run: tracemalloc slows allocation-heavy code down too much to time under it
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'median_ms': round(statistics.median(samples) * 1000, 4),
+        'min_ms': round(samples[0] * 1000, 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4),
+        'peak_kib': round(peak / 1024, 1)
+    }
+
+
+def environment() -> Dict:
+    import numpy
+    import pandas
+
+    return {
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor() or None,
+        'cpus': os.cpu_count(),
+        'recorded_at': datetime.now(timezone.utc).isoformat()
+    }
+
+
+def save_baseline(path: str, results: Dict[str, Dict], meta: Dict):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            max_regression_pct: float, min_delta_ms: float = 0.05) -> List[str]:
+    """List the cases whose median time or peak memory regressed by more than max_regression_pct
+
+    Differences smaller than min_delta_ms are treated as timer noise.
+    """
+    regressions = []
+    factor = 1 + max_regression_pct / 100
+    for name, current in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if current['median_ms'] > before['median_ms'] * factor and current['median_ms'] - before['median_ms'] > min_delta_ms:
+            regressions.append(f"{name}: median {before['median_ms']} ms -> {current['median_ms']} ms")
+        if current['peak_kib'] > before['peak_kib'] * factor and current['peak_kib'] - before['peak_kib'] > 64:
+            regressions.append(f"{name}: peak memory {before['peak_kib']} KiB -> {current['peak_kib']} KiB")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict], baseline: Dict[str, Dict] = None, out=sys.stdout):
+    width = max(len(name) for name in results) + 2
+    out.write(f"{'case':<{width}}{'median ms':>12}{'p95 ms':>12}{'peak KiB':>12}{'vs base':>10}\n")
+    for name, r in results.items():
+        change = ''
+        if baseline and name in baseline and baseline[name]['median_ms'] > 0:
+            change = f"{(r['median_ms'] / baseline[name]['median_ms'] - 1) * 100:+.1f}%"
+        out.write(f"{name:<{width}}{r['median_ms']:>12}{r['p95_ms']:>12}{r['peak_kib']:>12}{change:>10}\n")
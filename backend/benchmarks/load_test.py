@@ -0,0 +1,411 @@
+"""
+End-to-end HTTP load test of the FastAPI app with stubbed market data.
+
+Starts app.main:app under uvicorn in a subprocess. Candles come from
+deterministic synthetic CSVs (MARKET_DATA_PROVIDER=local, so yf.Ticker is
+never called). COINGECKO_API_URL points at an in-process stub. The database
+is a throwaway SQLite file unless --database-url is given (e.g. a local
+Postgres). Virtual users then run a weighted mix of login, alert listing
+and creation, analysis and system-alert requests for --duration seconds.
+The JSON report has p50/p95/p99 latency, throughput and error rate per route.
+
+    python -m benchmarks.load_test --users 20 --duration 30 --report load.json
+    python -m benchmarks.load_test --mix login=1,alerts=6,create_alert=1,analyze=4,system_alerts=3
+    python -m benchmarks.load_test --save-baseline
+    python -m benchmarks.load_test --max-regression 25   # exits 1 on regression
+
+Baselines are machine-specific; record one on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+from benchmarks.harness import environment
+from benchmarks.synthetic import synthetic_ohlcv
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "load.json")
+DEFAULT_MIX = "login=1,alerts=6,create_alert=1,analyze=4,system_alerts=3"
+PASSWORD = "load-test-password"
+
+
+def write_market_data(directory: str, symbols: List[str], intervals: List[str], history: int):
+    """Deterministic candles per symbol, ending at the current candle so the store treats them as live"""
+    os.makedirs(directory, exist_ok=True)
+    for symbol in symbols:
+        for interval in intervals:
+            freq = pd.Timedelta(interval.replace('m', 'min') if interval.endswith('m') else interval)
+            end = pd.Timestamp.now(tz="UTC").floor(freq)
+            data = synthetic_ohlcv(history, seed=zlib.crc32(f"{symbol}:{interval}".encode()), freq=freq, end=end)
+            data.to_csv(os.path.join(directory, f"{symbol}_{interval}.csv"), index_label="Date")
+
+
+class _CoinGeckoStubHandler(BaseHTTPRequestHandler):
+    """/simple/price with a fixed price and volume per id"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.endswith("/simple/price"):
+            self.send_error(404)
+            return
+        ids = parse_qs(url.query).get("ids", [""])[0].split(",")
+        body = json.dumps({
+            cg_id: {"usd": 10 + zlib.crc32(cg_id.encode()) % 50000, "usd_24h_vol": 1e9}
+            for cg_id in ids if cg_id
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_coingecko_stub() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CoinGeckoStubHandler)
+    threading.Thread(target=server.serve_forever, name="coingecko-stub", daemon=True).start()
+    return server
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(workdir: str, args, coingecko_url: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url,
+        SECRET_KEY="load-test-secret",
+        MARKET_DATA_PROVIDER="local",
+        LOCAL_MARKET_DATA_DIR=os.path.join(workdir, "local_market"),
+        MARKET_DATA_DIR=os.path.join(workdir, "candles"),
+        COINGECKO_API_URL=coingecko_url,
+        AI_INFERENCE_BACKEND=args.backend,
+        RESULT_CACHE_BACKEND="memory",
+        AUTH_REVOCATION_BACKEND="memory",
+        PUBSUB_BACKEND="memory",
+        ADAPTIVE_THRESHOLD_BACKEND="file",
+        ADAPTIVE_THRESHOLD_FILE=os.path.join(workdir, "thresholds.json"),
+        ANALYSIS_INTERVALS=json.dumps(args.intervals)
+    )
+    log = open(os.path.join(workdir, "api.log"), "w")
+    if args.workers > 1:
+        # Migrate once up front rather than in every worker at the same time
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env,
+                       stdout=log, stderr=subprocess.STDOUT, check=True)
+        env["DB_MIGRATE_ON_STARTUP"] = "false"
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def wait_ready(base_url: str, timeout: float):
+    """Wait for /ready, i.e. the model loaded and warmed up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"API at {base_url} not ready after {timeout}s")
+
+
+def seed(base_url: str, args) -> List[str]:
+    """Register the virtual users, give each some alerts and insert system alerts directly"""
+    emails = [f"load-{i}@example.com" for i in range(args.users)]
+    for email in emails:
+        requests.post(f"{base_url}/api/auth/register", json={"email": email, "password": PASSWORD}, timeout=30)
+        token = requests.post(
+            f"{base_url}/api/auth/login", data={"username": email, "password": PASSWORD}, timeout=30
+        ).json()["access_token"]
+        for i in range(args.alerts_per_user):
+            requests.post(
+                f"{base_url}/api/alerts/", json=_alert_body(random.Random(i)),
+                headers={"Authorization": f"Bearer {token}"}, timeout=30
+            )
+
+    if args.database_url and args.system_alerts:
+        from sqlalchemy import MetaData, Table, create_engine, insert
+
+        engine = create_engine(args.database_url)
+        alerts = Table("alerts", MetaData(), autoload_with=engine)
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"cryptocurrency": args.symbols[i % len(args.symbols)].split("-")[0], "condition": "ai_anomaly",
+             "threshold_value": 0.79, "current_value": 1.0 + i % 7 / 10, "is_triggered": True, "owner_id": None,
+             "message": "Seeded by the load test", "created_at": now - pd.Timedelta(minutes=i)}
+            for i in range(args.system_alerts)
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(alerts), rows)
+        engine.dispose()
+    return emails
+
+
+def _alert_body(rng: random.Random) -> Dict:
+    return {
+        "cryptocurrency": rng.choice(["BTC", "ETH", "ADA", "DOT"]),
+        "condition": rng.choice(["price_above", "price_below"]),
+        "threshold_value": round(rng.uniform(1, 100000), 2)
+    }
+
+
+class VirtualUser:
+    """One logged-in client running the request mix on its own keep-alive session"""
+
+    def __init__(self, base_url: str, email: str, args, seed: int):
+        self.base_url = base_url
+        self.email = email
+        self.symbols = args.symbols
+        self.intervals = args.intervals
+        self.timeout = args.timeout
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+        self.token: Optional[str] = None
+
+    def _auth(self) -> Dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def login(self) -> requests.Response:
+        response = self.session.post(
+            f"{self.base_url}/api/auth/login", data={"username": self.email, "password": PASSWORD}, timeout=self.timeout
+        )
+        if response.status_code == 200:
+            self.token = response.json()["access_token"]
+        return response
+
+    def alerts(self) -> requests.Response:
+        return self.session.get(f"{self.base_url}/api/alerts/", params={"limit": 50}, headers=self._auth(), timeout=self.timeout)
+
+    def create_alert(self) -> requests.Response:
+        return self.session.post(f"{self.base_url}/api/alerts/", json=_alert_body(self.rng), headers=self._auth(), timeout=self.timeout)
+
+    def analyze(self) -> requests.Response:
+        return self.session.get(
+            f"{self.base_url}/api/ai/analyze/{self.rng.choice(self.symbols)}",
+            params={"interval": self.rng.choice(self.intervals)}, timeout=self.timeout
+        )
+
+    def system_alerts(self) -> requests.Response:
+        return self.session.get(
+            f"{self.base_url}/api/alerts/ai/system-alerts", params={"limit": 50}, headers=self._auth(), timeout=self.timeout
+        )
+
+
+# Report keys: the route template each mix entry hits
+ROUTES = {
+    "login": "POST /api/auth/login",
+    "alerts": "GET /api/alerts/",
+    "create_alert": "POST /api/alerts/",
+    "analyze": "GET /api/ai/analyze/{symbol}",
+    "system_alerts": "GET /api/alerts/ai/system-alerts",
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ROUTES:
+            raise ValueError(f"Unknown route {name!r} in mix, expected some of {sorted(ROUTES)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def run_user(user: VirtualUser, mix: Dict[str, float], warmup_until: float, deadline: float,
+             samples: Dict[str, List], statuses: Dict[str, Dict[str, int]]):
+    names, weights = list(mix), list(mix.values())
+    user.login()
+    while time.monotonic() < deadline:
+        name = user.rng.choices(names, weights)[0]
+        request: Callable[[], requests.Response] = getattr(user, name)
+        started = time.monotonic()
+        try:
+            response = request()
+            status = str(response.status_code)
+            if name == "analyze" and response.ok and "error" in response.json():
+                # The analysis endpoints report data and model failures in the body
+                status = f"{status} error"
+        except (requests.RequestException, ValueError) as e:
+            status = type(e).__name__
+        finished = time.monotonic()
+        if started >= warmup_until:
+            samples[name].append((finished - started, not status.startswith(("2", "3")) or status.endswith("error")))
+            statuses[name][status] = statuses[name].get(status, 0) + 1
+
+
+def summarize(samples: List, statuses: Dict[str, int], seconds: float) -> Dict:
+    latencies = np.array([s[0] for s in samples]) * 1000
+    errors = sum(1 for s in samples if s[1])
+    if not len(latencies):
+        return {"requests": 0, "errors": 0, "error_rate": 0.0, "throughput_rps": 0.0, "status_codes": statuses}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4),
+        "throughput_rps": round(len(samples) / seconds, 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(latencies.mean()), 2),
+        "max_ms": round(float(latencies.max()), 2),
+        "status_codes": statuses
+    }
+
+
+def run_load(base_url: str, emails: List[str], args) -> Dict:
+    mix = parse_mix(args.mix)
+    samples = {name: [] for name in mix}
+    statuses = {name: {} for name in mix}
+    # Per-user dicts would need merging; list.append and dict updates are atomic enough under the GIL
+    started = time.monotonic()
+    warmup_until = started + args.warmup
+    deadline = warmup_until + args.duration
+    threads = [
+        threading.Thread(
+            target=run_user,
+            args=(VirtualUser(base_url, emails[i % len(emails)], args, args.seed + i), mix, warmup_until, deadline, samples, statuses),
+            daemon=True
+        )
+        for i in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.monotonic() - warmup_until
+
+    routes = {ROUTES[name]: summarize(samples[name], statuses[name], seconds) for name in mix}
+    everything = [s for name in mix for s in samples[name]]
+    total_statuses: Dict[str, int] = {}
+    for name in mix:
+        for status, count in statuses[name].items():
+            total_statuses[status] = total_statuses.get(status, 0) + count
+    return {
+        "config": {
+            "users": args.users, "duration_seconds": args.duration, "warmup_seconds": args.warmup, "mix": mix,
+            "workers": args.workers, "backend": args.backend, "symbols": args.symbols, "intervals": args.intervals,
+            "database": args.database_url.split(":", 1)[0] if args.database_url else None
+        },
+        "environment": environment(),
+        "measured_seconds": round(seconds, 2),
+        "routes": routes,
+        "total": summarize(everything, total_statuses, seconds)
+    }
+
+
+def compare(report: Dict, baseline: Dict, max_regression_pct: float, min_delta_ms: float = 2.0) -> List[str]:
+    """Routes whose p95 latency or error rate got worse than the baseline allows"""
+    regressions = []
+    factor = 1 + max_regression_pct / 100
+    for route, current in sorted(report["routes"].items()):
+        before = baseline["routes"].get(route)
+        if not before or not before.get("requests") or not current.get("requests"):
+            continue
+        if current["p95_ms"] > before["p95_ms"] * factor and current["p95_ms"] - before["p95_ms"] > min_delta_ms:
+            regressions.append(f"{route}: p95 {before['p95_ms']} ms -> {current['p95_ms']} ms")
+        if current["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{route}: error rate {before['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(report: Dict, out=sys.stderr):
+    width = max(len(route) for route in report["routes"]) + 2
+    out.write(f"{'route':<{width}}{'requests':>10}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}\n")
+    for route, r in list(report["routes"].items()) + [("total", report["total"])]:
+        if not r["requests"]:
+            out.write(f"{route:<{width}}{0:>10}\n")
+            continue
+        out.write(f"{route:<{width}}{r['requests']:>10}{r['throughput_rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                  f"{r['p99_ms']:>9}{r['error_rate']:>9.2%}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"route weights, from {sorted(ROUTES)}")
+    parser.add_argument("--symbols", nargs="+", default=["BTC-USD", "ETH-USD", "ADA-USD", "DOT-USD"])
+    parser.add_argument("--intervals", nargs="+", default=["1d", "1h"])
+    parser.add_argument("--history", type=int, default=1000, help="synthetic candles per symbol and interval")
+    parser.add_argument("--alerts-per-user", type=int, default=20)
+    parser.add_argument("--system-alerts", type=int, default=500)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--backend", default="numpy", choices=("numpy", "keras"))
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the report as the new baseline")
+    parser.add_argument("--max-regression", type=float, help="allowed p95 slowdown in percent; exits 1 when exceeded")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    workdir = tempfile.mkdtemp(prefix="crypto-sentry-load-")
+    args.database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    args.port = args.port or _free_port()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    write_market_data(os.path.join(workdir, "local_market"), args.symbols, args.intervals, args.history)
+    coingecko = start_coingecko_stub()
+    api = start_api(workdir, args, f"http://127.0.0.1:{coingecko.server_port}")
+    try:
+        wait_ready(base_url, timeout=120)
+        emails = seed(base_url, args)
+        report = run_load(base_url, emails, args)
+    finally:
+        api.terminate()
+        api.wait(timeout=30)
+        coingecko.shutdown()
+
+    print_report(report)
+    body = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(body)
+    else:
+        print(body)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            f.write(body)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+    elif args.max_regression is not None:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from app.ai_model import artifacts
+from app.ai_model.artifacts import (
+    CURRENT_FILE, SCALER_FILE, VERSIONS_DIR, ArtifactError, activate_version, publish, resolve_active
+)
+
+SHIPPED = os.path.join(os.path.dirname(__file__), "..", "app", "ai_model", "model_artifacts")
+
+
+@pytest.fixture
+def root(tmp_path):
+    publish(SHIPPED, str(tmp_path), version="v1", activate=True)
+    publish(SHIPPED, str(tmp_path), version="v2")
+    return str(tmp_path)
+
+
+def _current(root: str) -> str:
+    with open(os.path.join(root, CURRENT_FILE)) as f:
+        return f.read()
+
+
+def test_activation_refuses_a_version_that_fails_its_checksums(root):
+    with open(os.path.join(root, VERSIONS_DIR, "v2", SCALER_FILE), "ab") as f:
+        f.write(b"corrupt")
+
+    with pytest.raises(ArtifactError, match="Checksum mismatch"):
+        activate_version(root, "v2")
+
+    assert _current(root) == "v1\n"
+    assert resolve_active(root) == ("v1", os.path.join(root, VERSIONS_DIR, "v1"))
+
+
+def test_current_is_swapped_atomically(root, monkeypatch):
+    def interrupted(src, dst):
+        raise OSError("interrupted")
+
+    monkeypatch.setattr(artifacts.os, "replace", interrupted)
+    with pytest.raises(OSError):
+        activate_version(root, "v2")
+    # The new name was written to a temporary file; CURRENT itself was never touched
+    assert _current(root) == "v1\n"
+
+    monkeypatch.undo()
+    activate_version(root, "v2")
+    assert _current(root) == "v2\n"
@@ -0,0 +1,14 @@
+import os
+
+import pytest
+
+from app.ai_model.numpy_backend import verify_against_keras
+
+pytest.importorskip("tensorflow")
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "ai_model", "model_artifacts", "lstm_autoencoder.h5")
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 256])
+def test_numpy_backend_matches_keras_predict(batch_size):
+    assert verify_against_keras(MODEL_PATH, samples=batch_size, atol=1e-4) <= 1e-4
@@ -0,0 +1,42 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+from alembic import command
+from fastapi import Response
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.api.pagination import NEXT_CURSOR_HEADER, keyset_page
+from app.db import models
+from app.db.migrations import alembic_config, upgrade_database
+
+
+def test_keyset_pages_rows_migrated_from_the_legacy_schema(tmp_path):
+    """Rows back-filled with CURRENT_TIMESTAMP page correctly next to rows written by the app"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), "0001")
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')"))
+        for _ in range(5):
+            connection.execute(text(
+                "INSERT INTO alerts (crypto_symbol, alert_type, is_active, owner_id) VALUES ('BTC', 'price_above', 1, 1)"
+            ))
+
+    upgrade_database(engine)
+
+    with Session(engine) as db:
+        db.add_all(models.Alert(cryptocurrency="ETH", condition="price_below", threshold_value=1.0, owner_id=1) for _ in range(2))
+        db.commit()
+
+        seen, cursor = [], None
+        for _ in range(10):
+            response = Response()
+            query = db.query(models.Alert).filter(models.Alert.owner_id == 1)
+            seen.extend(alert.id for alert in keyset_page(query, models.Alert, response, cursor, limit=2))
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
@@ -0,0 +1,94 @@
+import os
+import random
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+from app.worker.price_rules import PriceRuleEngine
+from benchmarks.bench_price_rules import generate_rules, generate_ticks, naive_scan
+
+
+def test_crossing_is_inclusive_on_both_sides():
+    engine = PriceRuleEngine()
+    engine.load_rules([
+        (1, "BTC", "price_above", 100.0),
+        (2, "BTC", "price_above", 100.5),
+        (3, "BTC", "price_below", 99.0),
+        (4, "BTC", "price_below", 98.5),
+    ])
+
+    assert engine.evaluate("BTC", 99.5) == []
+    assert engine.evaluate("BTC", 100.0) == [1]
+    assert engine.evaluate("BTC", 99.0) == [3]
+    assert engine.evaluate("BTC", 100.4) == []
+    assert engine.evaluate("BTC", 100.5) == [2]
+    assert engine.evaluate("BTC", 98.5) == [4]
+
+
+def test_triggered_rules_stay_removed():
+    engine = PriceRuleEngine()
+    engine.load_rules([(1, "ETH", "price_above", 2000.0), (2, "ETH", "price_below", 1500.0)])
+
+    assert engine.evaluate("ETH", 2100.0) == [1]
+    assert engine.evaluate("ETH", 2100.0) == []
+    assert engine.evaluate("ETH", 1400.0) == [2]
+    assert engine.evaluate_many({"ETH": 3000.0}) == {}
+    assert len(engine) == 0
+    assert engine.remove_rule(1) is False
+
+
+def test_add_and_remove_keep_the_index_consistent():
+    engine = PriceRuleEngine()
+    # Equal thresholds, so removal has to find the right id among duplicates
+    for rule_id in range(1, 6):
+        engine.add_rule(rule_id, "ADA", "price_above", 1.0)
+    engine.add_rule(6, "ADA", "price_below", 0.5)
+
+    assert engine.remove_rule(3) is True
+    assert engine.remove_rule(3) is False
+    # Re-adding an id replaces the rule rather than indexing it twice
+    engine.add_rule(4, "ADA", "price_above", 2.0)
+    engine.add_rule(6, "ADA", "price_below", 0.25)
+
+    assert sorted(engine.evaluate("ADA", 1.0)) == [1, 2, 5]
+    assert engine.evaluate("ADA", 0.4) == []
+    assert engine.evaluate("ADA", 2.0) == [4]
+    assert engine.evaluate("ADA", 0.25) == [6]
+    assert len(engine) == 0
+
+
+def test_user_entered_symbols_fire_on_ticker_prices():
+    engine = PriceRuleEngine()
+    engine.load_rules([(1, "btc", "price_above", 50000.0), (2, "BTC-USD", "price_above", 50000.0)])
+    engine.add_rule(3, "bitcoin", "price_above", 50000.0)
+    engine.add_rule(4, " Eth-usd ", "price_below", 1000.0)
+
+    triggered = engine.evaluate_many({"BTC": 50000.0, "ETH": 999.0})
+
+    assert {symbol: sorted(ids) for symbol, ids in triggered.items()} == {"BTC": [1, 2, 3], "ETH": [4]}
+
+
+def test_matches_a_naive_scan_while_rules_come_and_go():
+    rules, base_prices = generate_rules(2000, symbols=10, seed=1)
+    engine = PriceRuleEngine()
+    engine.load_rules(rules[:1500])
+    active = {rule[0] for rule in rules[:1500]}
+    indexed = list(rules[:1500])
+    pending = list(rules[1500:])
+    rng = random.Random(2)
+
+    for prices in generate_ticks(base_prices, 300, seed=1):
+        if pending:
+            rule = pending.pop()
+            engine.add_rule(*rule)
+            indexed.append(rule)
+            active.add(rule[0])
+        if active and rng.random() < 0.5:
+            removed = rng.choice(sorted(active))
+            assert engine.remove_rule(removed) is True
+            active.discard(removed)
+
+        expected = naive_scan(indexed, active, prices)
+        crossed = [rule_id for ids in engine.evaluate_many(prices).values() for rule_id in ids]
+        assert sorted(crossed) == sorted(expected)
+        assert len(engine) == len(active)
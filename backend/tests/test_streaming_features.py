@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ai_model.anomaly_detector import CryptoAnomalyDetector
+from app.ai_model.features import FEATURE_COLUMNS, StreamingFeatureEngine
+
+WINDOW = 30
+
+
+def _candles(count: int, flat=None, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    if flat is not None:
+        close[flat] = close[flat.start - 1]
+    spread = np.abs(rng.normal(0, 0.005, count)) * close
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.002, count)),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(1e3, 1e6, count),
+    }, index=pd.date_range('2024-01-01', periods=count, freq='h', tz='UTC'))
+
+
+def _batch_window(df: pd.DataFrame, history: int) -> np.ndarray:
+    """What the batch path scores: features of the buffered candles, last WINDOW rows"""
+    detector = CryptoAnomalyDetector.__new__(CryptoAnomalyDetector)
+    features = detector.calculate_basic_features(df.tail(history))
+    return features[FEATURE_COLUMNS].tail(WINDOW).to_numpy()
+
+
+def _feed(engine: StreamingFeatureEngine, df: pd.DataFrame):
+    for timestamp, row in zip(df.index.asi8, df[['open', 'high', 'low', 'close', 'volume']].to_numpy()):
+        engine.update(int(timestamp), *row)
+
+
+@pytest.mark.parametrize("count", [80, 500, 2000])
+def test_window_matches_batch_features_however_long_the_engine_ran(count):
+    df = _candles(count)
+    engine = StreamingFeatureEngine(WINDOW)
+    _feed(engine, df)
+
+    assert engine.is_ready
+    np.testing.assert_allclose(engine.window(), _batch_window(df, engine.history), rtol=1e-9, atol=1e-9)
+
+
+def test_revised_candle_replaces_the_previous_version():
+    df = _candles(300)
+    engine = StreamingFeatureEngine(WINDOW)
+    _feed(engine, df.iloc[:-1])
+
+    # The in-progress candle arrives, then twice more with the same timestamp
+    revisions = df.iloc[-1:].copy()
+    for factor in (0.97, 1.05, 1.0):
+        revision = revisions.copy()
+        revision[['high', 'close']] *= factor
+        revision['volume'] *= factor
+        _feed(engine, revision)
+
+    final = pd.concat([df.iloc[:-1], revision])
+    np.testing.assert_allclose(engine.window(), _batch_window(final, engine.history), rtol=1e-9, atol=1e-9)
+
+
+def test_flat_prices_fill_rsi_like_the_batch_path():
+    # No price change for 20 candles: RSI is 0/0 there and must be back-filled, not forward-filled
+    df = _candles(300, flat=slice(260, 280))
+    engine = StreamingFeatureEngine(WINDOW)
+    _feed(engine, df)
+
+    rsi = FEATURE_COLUMNS.index('rsi')
+    expected = _batch_window(df, engine.history)
+    # The stretch with a 14-candle window of zero deltas lies inside the scored window
+    assert df['close'].iloc[260:280].nunique() == 1 and 260 + 14 >= len(df) - WINDOW
+    np.testing.assert_allclose(engine.window()[:, rsi], expected[:, rsi], rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(engine.window(), expected, rtol=1e-9, atol=1e-9)
@@ -0,0 +1,111 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import numpy as np
+import pytest
+
+from app.ai_model.thresholds import AdaptiveThresholds, P2Quantile
+from app.worker import tasks
+
+
+class DictStore:
+    """In-memory sketch store that counts saves"""
+
+    def __init__(self):
+        self.states = {}
+        self.saves = 0
+
+    def load(self, key):
+        return self.states.get(key)
+
+    def save(self, states):
+        self.saves += 1
+        self.states.update(states)
+
+
+@pytest.mark.parametrize("distribution", ["normal", "exponential", "lognormal"])
+@pytest.mark.parametrize("p", [0.5, 0.9, 0.99])
+def test_p2_estimate_tracks_numpy_quantile(distribution, p):
+    scores = getattr(np.random.default_rng(0), distribution)(size=20000)
+    sketch = P2Quantile(p, window=len(scores) + 1)
+    for score in scores:
+        sketch.update(score)
+
+    assert sketch.value() == pytest.approx(np.quantile(scores, p), abs=0.05 * np.std(scores))
+
+
+def test_p2_state_round_trips():
+    scores = np.random.default_rng(1).normal(size=2000)
+    sketch = P2Quantile(0.99, window=500)
+    for score in scores[:1000]:
+        sketch.update(score)
+    restored = P2Quantile.from_dict(sketch.to_dict(), 0.99, 500)
+    for score in scores[1000:]:
+        sketch.update(score)
+        restored.update(score)
+
+    assert restored.value() == sketch.value() and restored.count == sketch.count
+
+
+def test_window_lets_old_scores_fade_out():
+    rng = np.random.default_rng(2)
+    scores = np.concatenate([rng.normal(0, 1, 5000), rng.normal(10, 1, 5000)])
+    windowed, unbounded = P2Quantile(0.5, window=500), P2Quantile(0.5, window=len(scores) + 1)
+    for score in scores:
+        windowed.update(score)
+        unbounded.update(score)
+
+    assert windowed.n[4] <= 500
+    assert windowed.value() == pytest.approx(10, abs=0.3)
+    assert unbounded.value() < 8
+
+
+def _result(error, candle, version="v1", status="real_model"):
+    return {
+        'interval': '1h', 'candle': candle, 'model_version': version, 'model_status': status,
+        'reconstruction_error': error, 'is_anomaly': False
+    }
+
+
+@pytest.fixture
+def thresholds(monkeypatch):
+    adaptive = AdaptiveThresholds(DictStore(), quantile=0.9, min_samples=5, refresh_seconds=0)
+    monkeypatch.setattr(tasks.ai_service, "thresholds", adaptive)
+    return adaptive
+
+
+def test_scoring_reads_thresholds_without_writing(thresholds):
+    for _ in range(10):
+        assert thresholds.threshold_for("BTC-USD:1h", "v1", 1.0) == (1.0, 'global')
+
+    assert thresholds.store.saves == 0 and thresholds.store.states == {}
+
+
+def test_persist_step_folds_each_candle_in_once(thresholds):
+    for hour in range(10):
+        candle = f"2024-01-01T{hour:02d}:00:00+00:00"
+        chunk = {
+            "BTC-USD": _result(1.5, candle),
+            "ETH-USD": _result(9.0, candle, status="demo_model"),
+        }
+        # The same candle arrives twice, e.g. from a cache hit on the next tick
+        tasks.persist_analysis_results.run([chunk])
+        tasks.persist_analysis_results.run([chunk])
+
+    assert thresholds.store.saves == 10
+    assert set(thresholds.store.states) == {"BTC-USD:1h"}
+    assert thresholds.store.states["BTC-USD:1h"]['count'] == 10
+    assert thresholds.threshold_for("BTC-USD:1h", "v1", 1.0) == (1.5, 'adaptive')
+    # Scores of another model version do not count towards this one
+    assert thresholds.threshold_for("BTC-USD:1h", "v2", 1.0) == (1.0, 'global')
+
+
+def test_new_model_version_resets_the_sketch(thresholds):
+    for hour in range(10):
+        tasks.persist_analysis_results.run([{"BTC-USD": _result(1.5, f"v1-{hour}")}])
+    tasks.persist_analysis_results.run([{"BTC-USD": _result(2.0, "v2-0", version="v2")}])
+
+    assert thresholds.store.states["BTC-USD:1h"]['version'] == "v2"
+    assert thresholds.store.states["BTC-USD:1h"]['count'] == 1